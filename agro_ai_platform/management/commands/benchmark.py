@@ -0,0 +1,263 @@
+import io
+import json
+import platform
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_databases, teardown_databases
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from agro_ai_platform import mongo
+from agro_ai_platform.request_metrics import RequestMetrics, _current
+from agro_ai_platform.synthetic import build_dataset, reading_payload, slot_times
+
+CASES = ('ingest', 'timeseries', 'history', 'daily_kpis', 'nodes_latest', 'generate_alerts')
+
+
+def percentile(samples, q: float) -> float:
+    """Percentil por rango más cercano (sin interpolar)."""
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * q // 1))
+    return ordered[int(rank) - 1]
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[tuple[str, str, float, float, bool]]:
+    """(caso, métrica, base, actual, regresión) para los casos presentes en ambos resultados."""
+    rows = []
+    for case, cur in current.items():
+        base = baseline.get(case)
+        if not base:
+            continue
+        for metric in ('p50_ms', 'p95_ms'):
+            rows.append((case, metric, base[metric], cur[metric], cur[metric] > base[metric] * (1 + tolerance)))
+        for metric in ('sql_queries', 'mongo_cmds'):
+            if base.get(metric) is not None and cur.get(metric) is not None:
+                rows.append((case, metric, base[metric], cur[metric], cur[metric] > base[metric]))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de ingesta, series, historial, KPIs diarios, últimas lecturas y generate_alerts sobre un "
+        "dataset sintético reproducible (parcelas × nodos × días). Usa una base SQL de prueba (como los tests) "
+        "y un mongod local (o mongomock, que no soporta todos los casos). Reporta p50/p95 y queries; compara con "
+        "--baseline. Termina con error si algún caso no pudo medirse."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--parcelas', type=int, default=10)
+        parser.add_argument('--nodos', type=int, default=4, help='Nodos secundarios por maestro.')
+        parser.add_argument('--dias', type=int, default=7)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--repeat', type=int, default=20, help='Mediciones por caso.')
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--only', nargs='+', choices=CASES, help='Casos a ejecutar (default: todos).')
+        parser.add_argument('--mongo', choices=['memory', 'local'], default='local',
+                            help="local: MONGO_URL, base <MONGO_DB>_bench; memory: mongomock (pip install mongomock), "
+                                 "sin $dateTrunc/$type ni conteo de comandos: timeseries, daily_kpis y "
+                                 "nodes_latest fallan.")
+        parser.add_argument('--output', help='Guardar resultados en JSON (sirve como baseline).')
+        parser.add_argument('--baseline', help='JSON de una corrida anterior para comparar.')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Regresión si p50/p95 supera la baseline en más de esta fracción (default 0.2).')
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **opts):
+        cases = opts['only'] or list(CASES)
+        client, mongo_db = self._mongo(opts['mongo'])
+        previous_db = mongo._db
+        mongo._db = mongo_db
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            t0 = time.perf_counter()
+            ds = build_dataset(opts['parcelas'], opts['nodos'], opts['dias'], opts['seed'], db=mongo_db)
+            self.stdout.write(self.style.NOTICE(
+                f"Dataset seed={ds.seed}: {len(ds.parcelas)} parcelas, {opts['nodos']} nodos/maestro, "
+                f"{len(ds.days)} días, {ds.readings} lecturas Mongo ({time.perf_counter() - t0:.1f}s) "
+                f"[{connection.vendor}, mongo={opts['mongo']}]"
+            ))
+            results, skipped = {}, []
+            for case in cases:
+                try:
+                    fn = getattr(self, f"_case_{case}")(ds)
+                    results[case] = self._measure(fn, opts['repeat'], opts['warmup'], opts['mongo'] == 'local')
+                except Exception as e:
+                    # p. ej. operadores de agregación que mongomock no implementa
+                    self.stdout.write(self.style.ERROR(f"{case:<16} omitido: {type(e).__name__}: {e}"))
+                    skipped.append(case)
+                    continue
+                self._print_row(case, results[case])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            mongo._db = previous_db
+            if opts['mongo'] == 'local':
+                client.drop_database(mongo_db.name)
+
+        report = {
+            'meta': {
+                'parcelas': opts['parcelas'], 'nodos': opts['nodos'], 'dias': opts['dias'], 'seed': opts['seed'],
+                'repeat': opts['repeat'], 'sql': connection.vendor, 'mongo': opts['mongo'],
+                'python': platform.python_version(), 'created_at': timezone.now().isoformat(),
+            },
+            'results': results,
+        }
+        if opts['output']:
+            with open(opts['output'], 'w', encoding='utf-8') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {opts['output']}"))
+        if opts['baseline']:
+            self._compare(report, opts['baseline'], opts['tolerance'], opts['fail_on_regression'])
+        if skipped:
+            raise CommandError(f"{len(skipped)} casos sin medir ({', '.join(skipped)}); usar --mongo local o "
+                               f"--only con los casos soportados.")
+
+    # ---------- entorno ----------
+    def _mongo(self, mode):
+        if mode == 'memory':
+            try:
+                import mongomock
+            except ImportError:
+                raise CommandError("mongomock no está instalado: pip install mongomock, o usar --mongo local.")
+            client = mongomock.MongoClient(tz_aware=True, tzinfo=mongo.UTC)
+            return client, client['agro_bench']
+        if not settings.MONGO_URL:
+            raise CommandError("--mongo local requiere MONGO_URL.")
+        client = mongo.get_client()
+        name = f"{settings.MONGO_DB}_bench"
+        client.drop_database(name)
+        return client, client[name]
+
+    def _measure(self, fn, repeat, warmup, count_mongo):
+        warmup = max(warmup, 1)  # al menos una: si el caso no puede ejecutarse, falla antes de medir
+        for i in range(warmup):
+            fn(i)
+        samples, sql, mongo_cmds, errors = [], [], [], 0
+        for i in range(warmup, warmup + repeat):
+            metrics = RequestMetrics()
+            token = _current.set(metrics)
+            try:
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    ok = fn(i)
+                    samples.append((time.perf_counter() - start) * 1000)
+            finally:
+                _current.reset(token)
+            sql.append(len(queries))
+            mongo_cmds.append(metrics.mongo_count)
+            errors += ok is False
+        return {
+            'n': repeat,
+            'p50_ms': round(percentile(samples, 0.5), 3),
+            'p95_ms': round(percentile(samples, 0.95), 3),
+            'mean_ms': round(statistics.fmean(samples), 3),
+            'max_ms': round(max(samples), 3),
+            'sql_queries': statistics.median_low(sql),
+            'mongo_cmds': statistics.median_low(mongo_cmds) if count_mongo else None,
+            'errors': errors,
+        }
+
+    def _print_row(self, case, r):
+        mongo_cmds = '-' if r['mongo_cmds'] is None else r['mongo_cmds']
+        line = (f"{case:<16} p50={r['p50_ms']:>9.2f}ms  p95={r['p95_ms']:>9.2f}ms  "
+                f"sql={r['sql_queries']:<4} mongo={mongo_cmds:<4} n={r['n']}")
+        if r['errors']:
+            self.stdout.write(self.style.WARNING(f"{line}  errores={r['errors']}"))
+        else:
+            self.stdout.write(line)
+
+    def _compare(self, report, path, tolerance, fail):
+        try:
+            with open(path, encoding='utf-8') as fh:
+                baseline = json.load(fh)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"No se pudo leer la baseline {path}: {e}")
+        if baseline.get('meta', {}).get('parcelas') != report['meta']['parcelas'] or \
+                baseline.get('meta', {}).get('dias') != report['meta']['dias']:
+            self.stdout.write(self.style.WARNING("La baseline usa otro tamaño de dataset; la comparación es orientativa."))
+        regressions = 0
+        for case, metric, base, cur, regression in compare(report['results'], baseline.get('results', {}), tolerance):
+            delta = f"{(cur / base - 1) * 100:+.0f}%" if base else 'n/a'
+            line = f"{case:<16} {metric:<12} {base:>10} → {cur:<10} {delta}"
+            if regression:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(f"{line}  REGRESIÓN"))
+            else:
+                self.stdout.write(line)
+        if regressions and fail:
+            raise CommandError(f"{regressions} métricas empeoraron respecto de {path}.")
+
+    # ---------- casos: cada uno devuelve fn(i) → False si la iteración falló ----------
+    def _case_ingest(self, ds):
+        from nodes.views import NodeIngestView
+
+        view = NodeIngestView.as_view()
+        factory = APIRequestFactory()
+        rng = random.Random(ds.seed)
+        tomorrow = ds.days[-1] + timedelta(days=1)
+        per_day = len(ds.maestros) * len(ds.horarios)
+
+        def run(i):
+            # cada iteración usa un slot libre (maestro, día futuro, horario) → camino de ingesta aceptada
+            maestro = ds.maestros[i % len(ds.maestros)]
+            day = tomorrow + timedelta(days=i // per_day)
+            ts = slot_times(day, ds.horarios)[(i // len(ds.maestros)) % len(ds.horarios)]
+            payload = reading_payload(rng, maestro.codigo, ds.secundarios[maestro.id], ts)
+            request = factory.post('/api/nodes/ingest/', payload, format='json',
+                                   HTTP_AUTHORIZATION=f"Node {ds.tokens[maestro.id]}")
+            return view(request).status_code == 200
+        return run
+
+    def _case_timeseries(self, ds):
+        from brain.services import aggregate_timeseries
+        start = ds.days[0].isoformat()
+
+        def run(i):
+            parcela = ds.parcelas[i % len(ds.parcelas)]
+            return bool(aggregate_timeseries(parcela.id, 'temperatura', start=start, period='hour')['points'])
+
+        # _aggregate_timeseries captura el error del pipeline y recalcula en Python: no medir eso
+        if aggregate_timeseries(ds.parcelas[0].id, 'temperatura', start=start, period='hour')['meta'].get('fallback'):
+            raise CommandError("el pipeline falló y se usó el fallback Python ($dateTrunc no soportado); usar --mongo local")
+        return run
+
+    def _case_history(self, ds):
+        from brain.services import fetch_history
+        start = timezone.now() - timedelta(days=len(ds.days))
+        end = timezone.now() + timedelta(days=1)
+
+        def run(i):
+            parcela = ds.parcelas[i % len(ds.parcelas)]
+            return bool(fetch_history(parcela.id, 'day', 'temperatura', start=start, end=end))
+        return run
+
+    def _case_daily_kpis(self, ds):
+        from brain.services import compute_daily_kpis_for_user
+
+        def run(i):
+            return bool(compute_daily_kpis_for_user(ds.owner)['parcelas'])
+        return run
+
+    def _case_nodes_latest(self, ds):
+        from brain.views import BrainNodesLatestView
+
+        view = BrainNodesLatestView.as_view()
+        factory = APIRequestFactory()
+
+        def run(i):
+            parcela = ds.parcelas[i % len(ds.parcelas)]
+            request = factory.get('/api/brain/nodes/latest/', {'parcela': parcela.id})
+            force_authenticate(request, user=ds.owner)
+            return view(request).status_code == 200
+        return run
+
+    def _case_generate_alerts(self, ds):
+        def run(i):
+            call_command('generate_alerts', stdout=io.StringIO())
+        return run
@@ -0,0 +1,103 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from chatbot.models import ChatMessage
+from nodes.models import Node, NodoSecundario
+from parcels.models import Parcela, Ciclo
+from plans.models import ParcelaPlan
+from recommendations.models import Recommendation
+from tasks.models import Task
+
+# Líneas de plan que indican lectura completa de una tabla, por motor.
+# SQLite: "SCAN tabla" (sin USING INDEX); PostgreSQL: "Seq Scan on tabla".
+SEQ_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (\w+)(?! USING (?:COVERING )?INDEX)(?:\s|$)'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+
+
+def _sample_ids():
+    """Ids reales para que el planner vea valores representativos (0 si no hay datos)."""
+    node = Node.objects.order_by('id').values('id', 'parcela_id').first() or {}
+    return {
+        'parcela': node.get('parcela_id') or Parcela.objects.values_list('id', flat=True).first() or 0,
+        'nodo': node.get('id') or 0,
+        'codigos': list(NodoSecundario.objects.filter(maestro_id=node.get('id')).values_list('codigo', flat=True)[:3])
+                   or ['-'],
+        'username': ChatMessage.objects.values_list('username', flat=True).first() or '-',
+    }
+
+
+def hot_queries(ids):
+    """(nombre, queryset) de las consultas más frecuentes del proyecto."""
+    now = timezone.now()
+    today = timezone.localdate()
+    return [
+        ('tasks.rule_tasks_due', Task.all_objects.filter(
+            fecha_programada__gte=now, fecha_programada__lte=now + timedelta(days=3),
+            estado__in=['pendiente', 'en_progreso'], deleted_at__isnull=True)),
+        ('tasks.mark_overdue_tasks', Task.all_objects.filter(
+            fecha_programada__lt=now, estado__in=['pendiente', 'en_progreso'], deleted_at__isnull=True)),
+        ('tasks.list_parcela', Task.objects.filter(parcela_id=ids['parcela']).order_by('-created_at')[:10]),
+        ('tasks.list_global', Task.objects.order_by('-created_at')[:10]),
+        ('plans.plan_vigente_ingesta', ParcelaPlan.objects.filter(
+            parcela_id=ids['parcela'], estado__in=['activo', 'programado'], fecha_inicio__lte=today,
+        ).filter(Q(fecha_fin__isnull=True) | Q(fecha_fin__gte=today)).order_by('-fecha_inicio')[:1]),
+        ('parcels.ciclo_activo', Ciclo.objects.filter(
+            parcela_id=ids['parcela'], estado='activo').order_by('-created_at')[:1]),
+        ('nodes.secundarios_ingesta', NodoSecundario.objects.filter(
+            codigo__in=ids['codigos'], maestro_id=ids['nodo']).values_list('codigo', flat=True)),
+        ('nodes.secundarios_maestro', NodoSecundario.objects.filter(maestro_id=ids['nodo'])),
+        ('recommendations.list_parcela', Recommendation.objects.filter(
+            parcela_id=ids['parcela']).order_by('-created_at')[:10]),
+        ('chatbot.history_page', ChatMessage.objects.filter(
+            username=ids['username']).order_by('-timestamp', '-id')[:51]),
+    ]
+
+
+class Command(BaseCommand):
+    help = ("Ejecuta EXPLAIN sobre las consultas calientes del proyecto (con datos sembrados) y marca "
+            "las que leen tablas completas (seq scan). En PostgreSQL desactiva enable_seqscan para que, "
+            "con pocos datos, solo aparezca seq scan donde no hay índice utilizable.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', type=str, default='', help='Filtrar por prefijo de nombre (p. ej. tasks).')
+        parser.add_argument('--allow-seqscan', action='store_true',
+                            help='PostgreSQL: no desactivar enable_seqscan (plan real con los datos actuales).')
+        parser.add_argument('--fail-on-seqscan', action='store_true',
+                            help='Terminar con error si alguna consulta hace seq scan (para CI).')
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        pattern = SEQ_SCAN_PATTERNS.get(vendor)
+        if pattern is None:
+            self.stdout.write(self.style.WARNING(f"Motor '{vendor}' sin detección de seq scan; solo se muestran planes."))
+
+        queries = [(n, qs) for n, qs in hot_queries(_sample_ids()) if n.startswith(options['only'])]
+        self.stdout.write(self.style.NOTICE(f"[explain_hot_queries] {len(queries)} consulta(s) en {vendor}"))
+
+        flagged = []
+        with transaction.atomic():
+            if vendor == 'postgresql' and not options['allow_seqscan']:
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            for name, qs in queries:
+                plan = qs.explain()
+                tables = sorted(set(pattern.findall(plan))) if pattern else []
+                if tables:
+                    flagged.append(name)
+                    self.stdout.write(self.style.ERROR(f"  SEQ SCAN  {name}: {', '.join(tables)}"))
+                else:
+                    self.stdout.write(f"  ok        {name}")
+                if options['verbosity'] >= 2 or tables:
+                    for line in plan.splitlines():
+                        self.stdout.write(f"              {line}")
+
+        if flagged and options['fail_on_seqscan']:
+            raise CommandError(f"{len(flagged)} consulta(s) con seq scan: {', '.join(flagged)}")
+        self.stdout.write(self.style.SUCCESS(f"Listo: {len(queries) - len(flagged)} ok, {len(flagged)} con seq scan."))
@@ -0,0 +1,57 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from agro_ai_platform.mongo import get_db
+from agro_ai_platform.synthetic import HORARIOS, Dataset, build_sql, delete_tag, fleet_manifest
+from plans.models import Plan
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea una flota sintética para pruebas de carga de la ingesta: un plan con horarios, y por parcela un nodo "
+        "maestro con token y N secundarios. Escribe un manifiesto JSON para tools/load_ingest.py."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--maestros', type=int, default=100, help='Nodos maestros (uno por parcela).')
+        parser.add_argument('--nodos', type=int, default=3, help='Secundarios por maestro.')
+        parser.add_argument('--horarios', default=','.join(HORARIOS), help="Horarios del plan, p. ej. '07:00,15:00,22:00'.")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--tag', default='loadtest', help='Prefijo de lo creado (también seed_tag en Mongo).')
+        parser.add_argument('--output', default='fleet.json')
+        parser.add_argument('--reset', action='store_true', help='Borrar antes la flota y las lecturas con este tag.')
+
+    def handle(self, *args, **opts):
+        tag = opts['tag']
+        horarios = [h.strip() for h in opts['horarios'].split(',') if h.strip()]
+        if not horarios:
+            raise CommandError("--horarios vacío.")
+        if opts['reset']:
+            try:
+                db = get_db()
+            except Exception as e:
+                self.stderr.write(self.style.WARNING(f"Mongo no disponible, solo se borra SQL: {e}"))
+                db = None
+            self.stdout.write(self.style.NOTICE(f"Borrado tag={tag}: {delete_tag(tag, db)}"))
+        if Plan.objects.filter(nombre=f"{tag}-plan").exists() \
+                or get_user_model().objects.filter(username=f"{tag}_owner").exists():
+            raise CommandError(f"Ya hay una flota con tag '{tag}': usar --reset u otro --tag.")
+
+        # plan vigente desde hace un año: se puede simular cualquier fecha reciente
+        hoy = timezone.localdate()
+        with transaction.atomic():
+            owner, plan, parcelas, maestros, secundarios, tokens = build_sql(
+                opts['seed'], opts['maestros'], opts['nodos'], tag, hoy - timedelta(days=365), hoy, horarios)
+        ds = Dataset(seed=opts['seed'], tag=tag, owner=owner, plan=plan, horarios=horarios, days=[],
+                     parcelas=parcelas, maestros=maestros, secundarios=secundarios, tokens=tokens)
+
+        with open(opts['output'], 'w', encoding='utf-8') as fh:
+            json.dump(fleet_manifest(ds), fh)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(maestros)} maestros × {opts['nodos']} secundarios, plan {plan.nombre} {horarios} → {opts['output']}"
+        ))
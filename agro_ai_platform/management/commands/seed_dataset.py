@@ -0,0 +1,164 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+
+import bson
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from agro_ai_platform import mongo
+from agro_ai_platform.synthetic import (
+    HORARIOS, READINGS_COLLECTION, build_parcelas, build_shared, delete_tag, insert_batched, parcela_readings,
+)
+
+# --scale 1 = 100 parcelas; con los valores por defecto (4 nodos, 365 días, 3 horarios) ≈ 110k lecturas
+BASE_PARCELAS = 100
+
+
+def _init_worker():
+    # proceso nuevo: Django listo y conexiones propias (las heredadas del padre no se comparten)
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    connections.close_all()
+    mongo.get_client.cache_clear()
+    mongo._db = None
+
+
+def seed_chunk(p: dict) -> tuple[int, int]:
+    """Parcelas [start, stop): filas SQL (dueños, parcelas, nodos...) y sus lecturas Mongo. Devuelve (parcelas, lecturas)."""
+    from plans.models import Plan
+    from crops.models import Cultivo, Variedad, Etapa
+    from users.models import Rol
+
+    start, stop, tag, seed = p['start'], p['stop'], p['tag'], p['seed']
+    shared = {
+        'rol': Rol.objects.get(pk=p['rol_id']),
+        'plan': Plan.objects.get(pk=p['plan_id']),
+        'cultivo': Cultivo.objects.get(pk=p['cultivo_id']),
+        'variedad': Variedad.objects.get(pk=p['variedad_id']),
+        'etapa': Etapa.objects.get(pk=p['etapa_id']),
+    }
+    per_owner = p['parcelas_por_usuario']
+    indices = range(start, stop)
+    owner_ids = sorted({i // per_owner for i in indices})
+
+    User = get_user_model()
+    with transaction.atomic():
+        owners = User.objects.bulk_create([
+            User(username=f"{tag}_u{u}", password=p['password'], rol=shared['rol']) for u in owner_ids
+        ])
+        by_index = {u: o for u, o in zip(owner_ids, owners)}
+        parcelas, maestros, secundarios, _ = build_parcelas(
+            seed, [by_index[i // per_owner] for i in indices], indices, p['nodos'], tag, shared,
+            p['fecha_inicio'], p['hasta'], batch_size=p['batch_size'])
+
+    readings = 0
+    if p['mongo']:
+        coll = mongo.get_db()[READINGS_COLLECTION]
+        days = [p['fecha_inicio'] + timedelta(days=d) for d in range(p['dias'])]
+        for i, parcela, maestro in zip(indices, parcelas, maestros):
+            docs = parcela_readings(seed, i, parcela.id, maestro.codigo, secundarios[maestro.id], days,
+                                    p['horarios'], tag)
+            readings += insert_batched(coll, docs, p['batch_size'])
+    return len(parcelas), readings
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera un dataset sintético determinista (mismo --seed → mismos datos) de gran volumen: usuarios, "
+        "parcelas, ciclos, planes, tareas y nodos en la base SQL (bulk_create) y lecturas en Mongo (insert_many), "
+        "repartiendo bloques de parcelas entre procesos. --scale 1 ≈ 100 parcelas × 365 días; escala lineal."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0, help=f'Parcelas = {BASE_PARCELAS} × scale.')
+        parser.add_argument('--parcelas', type=int, help='Cantidad exacta de parcelas (ignora --scale).')
+        parser.add_argument('--nodos', type=int, default=4, help='Secundarios por maestro.')
+        parser.add_argument('--dias', type=int, default=365, help='Días de historia hasta --hasta (incluido).')
+        parser.add_argument('--hasta', default='', help='Último día YYYY-MM-DD (default: hoy).')
+        parser.add_argument('--horarios', default=','.join(HORARIOS))
+        parser.add_argument('--parcelas-por-usuario', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--tag', default='seed', help="Prefijo de usuarios/parcelas y seed_tag en Mongo.")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--chunk', type=int, default=60, help='Parcelas por tarea (múltiplo de parcelas por usuario).')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Filas por bulk_create / docs por insert_many.')
+        parser.add_argument('--sin-mongo', action='store_true', help='Solo la base SQL.')
+        parser.add_argument('--reset', action='store_true', help='Borrar antes lo creado con este --tag.')
+        parser.add_argument('--dry-run', action='store_true', help='Solo mostrar la estimación de tamaño.')
+
+    def handle(self, *args, **opts):
+        parcelas = opts['parcelas'] if opts['parcelas'] is not None else max(1, round(BASE_PARCELAS * opts['scale']))
+        horarios = [h.strip() for h in opts['horarios'].split(',') if h.strip()]
+        hasta = date.fromisoformat(opts['hasta']) if opts['hasta'] else timezone.localdate()
+        fecha_inicio = hasta - timedelta(days=opts['dias'] - 1)
+        per_owner = max(1, opts['parcelas_por_usuario'])
+        chunk = max(per_owner, opts['chunk'] // per_owner * per_owner)  # un usuario no queda repartido en dos bloques
+        use_mongo = not opts['sin_mongo']
+
+        docs = parcelas * opts['dias'] * len(horarios) if use_mongo else 0
+        sample = next(parcela_readings(opts['seed'], 0, 0, 'M', [f'S{j}' for j in range(opts['nodos'])],
+                                       [hasta], horarios, opts['tag']))
+        est_bytes = docs * len(bson.encode(sample))
+        self.stdout.write(self.style.NOTICE(
+            f"{parcelas} parcelas × {opts['nodos']} nodos, {opts['dias']} días × {len(horarios)} horarios → "
+            f"{docs:,} lecturas ≈ {est_bytes / 1024 ** 2:,.1f} MB BSON (sin índices) "
+            f"[{connection.vendor}]"
+        ))
+        if opts['dry_run']:
+            return
+
+        if opts['reset']:
+            self.stdout.write(self.style.NOTICE(
+                f"Borrado tag={opts['tag']}: {delete_tag(opts['tag'], mongo.get_db() if use_mongo else None)}"))
+        if get_user_model().objects.filter(username__startswith=f"{opts['tag']}_").exists():
+            raise CommandError(f"Ya hay datos con tag '{opts['tag']}': usar --reset u otro --tag.")
+
+        shared = build_shared(opts['tag'], horarios)
+        base = {
+            'tag': opts['tag'], 'seed': opts['seed'], 'nodos': opts['nodos'], 'dias': opts['dias'],
+            'horarios': horarios, 'fecha_inicio': fecha_inicio, 'hasta': hasta, 'parcelas_por_usuario': per_owner,
+            'batch_size': opts['batch_size'], 'mongo': use_mongo,
+            'password': make_password(None),  # inutilizable; hashear miles de claves costaría minutos
+            'rol_id': shared['rol'].id, 'plan_id': shared['plan'].id, 'cultivo_id': shared['cultivo'].id,
+            'variedad_id': shared['variedad'].id, 'etapa_id': shared['etapa'].id,
+        }
+        tasks = [{**base, 'start': s, 'stop': min(s + chunk, parcelas)} for s in range(0, parcelas, chunk)]
+
+        workers = max(1, opts['workers'])
+        if connection.vendor == 'sqlite' and workers > 1:
+            self.stdout.write(self.style.WARNING("SQLite no admite escrituras concurrentes: se usa 1 proceso."))
+            workers = 1
+
+        started = time.perf_counter()
+        done_parcelas = done_docs = 0
+        if workers == 1:
+            results = (seed_chunk(t) for t in tasks)
+        else:
+            connections.close_all()
+            method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method),
+                                       initializer=_init_worker)
+            results = (f.result() for f in as_completed([pool.submit(seed_chunk, t) for t in tasks]))
+        try:
+            for n_parcelas, n_docs in results:
+                done_parcelas += n_parcelas
+                done_docs += n_docs
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"  {done_parcelas}/{parcelas} parcelas, {done_docs:,} lecturas "
+                                  f"({done_docs / elapsed:,.0f} docs/s)")
+        finally:
+            if workers > 1:
+                pool.shutdown(cancel_futures=True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Listo en {time.perf_counter() - started:.1f}s: {done_parcelas} parcelas, {done_docs:,} lecturas "
+            f"(tag={opts['tag']}, seed={opts['seed']})."
+        ))
@@ -0,0 +1,133 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Módulos de cada app que se cargan al servir requests (urls → views → serializers/services)
+APP_MODULES = ('models', 'admin', 'urls', 'views', 'serializers', 'services')
+
+# Dependencias medidas de forma aislada
+HEAVY_MODULES = ('whisper', 'torch', 'cloudinary.uploader', 'PIL.Image', 'celery', 'pymongo', 'requests', 'numpy')
+# ...y las que deben cargarse solo bajo demanda (agro_ai_platform.optional)
+LAZY_MODULES = ('whisper', 'torch', 'cloudinary.uploader', 'PIL.Image', 'numpy')
+
+# Se ejecuta en un proceso limpio para que cada medición no herede imports previos
+_PROBE = r"""
+import importlib, json, os, sys, time
+
+def rss_kb():
+    try:
+        with open('/proc/self/status') as fh:
+            for line in fh:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    r = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return r // 1024 if sys.platform == 'darwin' else r
+
+mode, targets = sys.argv[1], json.loads(sys.argv[2])
+out = {}
+if mode == 'django':
+    t0, m0 = time.perf_counter(), rss_kb()
+    import django
+    django.setup()
+    out['django.setup'] = {'ms': (time.perf_counter() - t0) * 1000, 'rss_kb': rss_kb() - m0,
+                           'ok': True, 'error': None, 'missing': False}
+for name in targets:
+    t0, m0 = time.perf_counter(), rss_kb()
+    ok, err, missing = True, None, False
+    for mod in (name if isinstance(name, list) else [name]):
+        try:
+            importlib.import_module(mod)
+        except ModuleNotFoundError as e:
+            if e.name == mod or mod.startswith(e.name + '.'):
+                missing = True
+            else:
+                ok, err = False, str(e)
+        except Exception as e:
+            ok, err = False, str(e)
+    key = name[0].rsplit('.', 1)[0] if isinstance(name, list) else name
+    out[key] = {'ms': (time.perf_counter() - t0) * 1000, 'rss_kb': rss_kb() - m0, 'ok': ok, 'error': err,
+                'missing': missing}
+if mode == 'django':
+    heavy = [m for m in json.loads(sys.argv[3]) if m in sys.modules]
+    out['_heavy_loaded'] = heavy
+print(json.dumps(out))
+"""
+
+
+class Command(BaseCommand):
+    help = ("Mide el costo de arranque: tiempo de import y RSS de django.setup(), de cada app local "
+            "y de las dependencias pesadas. Cada medición corre en un proceso limpio.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help='Salida JSON (para CI o comparar entre versiones).')
+        parser.add_argument('--repeat', type=int, default=3, help='Repeticiones por medición; se reporta la mediana (default=3).')
+
+    def _probe(self, mode, targets, extra=None):
+        env = dict(os.environ)
+        env.setdefault('DJANGO_SETTINGS_MODULE', os.environ.get('DJANGO_SETTINGS_MODULE', 'agro_ai_platform.settings'))
+        args = [sys.executable, '-c', _PROBE, mode, json.dumps(targets)]
+        if extra is not None:
+            args.append(json.dumps(extra))
+        res = subprocess.run(args, capture_output=True, text=True, env=env, cwd=str(settings.BASE_DIR))
+        if res.returncode != 0:
+            raise RuntimeError(res.stderr.strip().splitlines()[-1] if res.stderr else 'probe failed')
+        return json.loads(res.stdout.strip().splitlines()[-1])
+
+    def _median_probe(self, mode, targets, repeat, extra=None):
+        runs = [self._probe(mode, targets, extra) for _ in range(max(1, repeat))]
+        merged = {}
+        for key, first in runs[0].items():
+            if key.startswith('_'):
+                merged[key] = first
+                continue
+            ms = sorted(r[key]['ms'] for r in runs)
+            rss = sorted(r[key]['rss_kb'] for r in runs)
+            merged[key] = dict(first, ms=ms[len(ms) // 2], rss_kb=rss[len(rss) // 2])
+        return merged
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        base = str(settings.BASE_DIR)
+        local_apps = [
+            cfg.name for cfg in apps.get_app_configs()
+            if os.path.abspath(cfg.path).startswith(base)
+        ]
+        # cada app se mide después de django.setup(): es el costo que agrega al primer request
+        targets = [[f'{app}.{m}' for m in APP_MODULES] for app in local_apps]
+        report = {
+            'apps': self._median_probe('django', targets, repeat, extra=list(LAZY_MODULES)),
+            'heavy': self._median_probe('bare', list(HEAVY_MODULES), repeat),
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(self.style.NOTICE(f"[startup_profile] mediana de {repeat} corridas, procesos limpios"))
+        self.stdout.write(f"{'componente':<32}{'import ms':>12}{'RSS +MB':>10}")
+        for key, row in report['apps'].items():
+            if key.startswith('_'):
+                continue
+            self.stdout.write(f"{key:<32}{row['ms']:>12.1f}{row['rss_kb'] / 1024:>10.1f}"
+                              + ('' if row['ok'] else f"  ✖ {row['error']}"))
+        self.stdout.write('')
+        self.stdout.write(f"{'dependencia (aislada)':<32}{'import ms':>12}{'RSS +MB':>10}")
+        for key, row in report['heavy'].items():
+            status = '  (no instalada)' if row['missing'] else '' if row['ok'] else f"  ✖ {row['error']}"
+            self.stdout.write(f"{key:<32}{row['ms']:>12.1f}{row['rss_kb'] / 1024:>10.1f}{status}")
+
+        eager = report['apps'].get('_heavy_loaded') or []
+        if eager:
+            self.stdout.write(self.style.WARNING(
+                "Dependencias perezosas cargadas al importar las apps: " + ', '.join(eager)
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS("Ninguna dependencia perezosa se carga al importar las apps."))
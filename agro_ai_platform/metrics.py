@@ -0,0 +1,278 @@
+"""
+Registro de métricas del proceso (contadores e histogramas con etiquetas) en
+formato Prometheus.
+
+    INGEST = counter('agro_ingest_requests_total', 'Requests de ingesta por reason.', ['reason'])
+    INGEST.inc(reason='slot_ocupado')
+
+Incrementar es un dict + lock (apto para el camino caliente). Con varios
+workers de gunicorn cada proceso vuelca su estado a METRICS_MULTIPROC_DIR
+(un JSON por proceso cada METRICS_FLUSH_INTERVAL segundos y al salir) y el
+endpoint suma todos los archivos; sin ese directorio se expone solo el proceso
+que atiende el scrape. Los archivos de workers muertos se conservan para que
+los contadores no retrocedan; vaciar el directorio al desplegar.
+"""
+import atexit
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+logger = logging.getLogger('agro_ai.metrics')
+
+DEFAULT_BUCKETS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class HistogramValue:
+    """Conteos por bucket de una serie (una combinación de etiquetas)."""
+    __slots__ = ('buckets', 'counts', 'count', 'sum', 'max', '_lock')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Cota superior del bucket que contiene el cuantil q (max para el bucket +Inf)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                return min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+        return self.max
+
+    def state(self) -> dict:
+        with self._lock:
+            return {'counts': list(self.counts), 'count': self.count, 'sum': self.sum, 'max': self.max}
+
+
+class Metric:
+    type = ''
+
+    def __init__(self, name: str, help_text: str, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple([str(labels.get(n, '')) for n in self.labelnames])
+
+    def reset(self):
+        with self._lock:
+            self.values = {}
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        ensure_flusher()
+
+    def state(self) -> dict:
+        with self._lock:
+            return dict(self.values)
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def child(self, **labels) -> HistogramValue:
+        key = self._key(labels)
+        value = self.values.get(key)
+        if value is None:
+            with self._lock:
+                value = self.values.setdefault(key, HistogramValue(self.buckets))
+        return value
+
+    def observe(self, value: float, **labels):
+        self.child(**labels).observe(value)
+        ensure_flusher()
+
+    def state(self) -> dict:
+        return {key: v.state() for key, v in list(self.values.items())}
+
+
+REGISTRY: dict[str, Metric] = {}
+_registry_lock = threading.Lock()
+
+
+def _register(cls, name, *args, **kwargs):
+    with _registry_lock:
+        metric = REGISTRY.get(name)
+        if metric is None:
+            metric = REGISTRY[name] = cls(name, *args, **kwargs)
+        return metric
+
+
+def counter(name: str, help_text: str, labelnames=()) -> Counter:
+    return _register(Counter, name, help_text, labelnames)
+
+
+def histogram(name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+    return _register(Histogram, name, help_text, labelnames, buckets)
+
+
+# ---------- estado, volcado multiproceso y agregación ----------
+def collect() -> dict:
+    """Estado del proceso: {nombre: {type, help, labelnames, buckets?, samples: [[labels, valor], ...]}}."""
+    out = {}
+    for name, metric in list(REGISTRY.items()):
+        entry = {'type': metric.type, 'help': metric.help, 'labelnames': list(metric.labelnames),
+                 'samples': [[list(k), v] for k, v in metric.state().items()]}
+        if metric.type == 'histogram':
+            entry['buckets'] = list(metric.buckets)
+        out[name] = entry
+    return out
+
+
+def merge(states) -> dict:
+    """Suma estados de varios procesos (contadores y buckets)."""
+    merged = {}
+    for state in states:
+        for name, entry in state.items():
+            target = merged.setdefault(name, {**entry, 'samples': {}})
+            for labels, value in entry['samples']:
+                key = tuple(labels)
+                if entry['type'] == 'counter':
+                    target['samples'][key] = target['samples'].get(key, 0) + value
+                else:
+                    acc = target['samples'].setdefault(key, {'counts': [0] * len(value['counts']),
+                                                             'count': 0, 'sum': 0.0, 'max': 0.0})
+                    acc['counts'] = [a + b for a, b in zip(acc['counts'], value['counts'])]
+                    acc['count'] += value['count']
+                    acc['sum'] += value['sum']
+                    acc['max'] = max(acc['max'], value['max'])
+    return merged
+
+
+_process_file = None
+_flusher = None  # None: sin revisar; False: sin METRICS_MULTIPROC_DIR; Thread: activo
+_flusher_lock = threading.Lock()
+
+
+def _multiproc_dir() -> str:
+    return getattr(settings, 'METRICS_MULTIPROC_DIR', '')
+
+
+def flush():
+    """Vuelca el estado de este proceso a METRICS_MULTIPROC_DIR (escritura atómica)."""
+    global _process_file
+    directory = _multiproc_dir()
+    if not directory:
+        return
+    if _process_file is None:
+        os.makedirs(directory, exist_ok=True)
+        _process_file = os.path.join(directory, f"metrics_{os.getpid()}_{uuid.uuid4().hex[:8]}.json")
+    tmp = f"{_process_file}.tmp"
+    try:
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump(collect(), fh)
+        os.replace(tmp, _process_file)
+    except OSError as e:
+        logger.warning("Error volcando métricas a %s: %s", _process_file, e)
+
+
+def _flush_loop(interval: float):
+    while True:
+        time.sleep(interval)
+        flush()
+
+
+def ensure_flusher():
+    global _flusher
+    if _flusher is not None:
+        return
+    with _flusher_lock:
+        if _flusher is None and not _multiproc_dir():
+            _flusher = False
+        elif _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, args=(getattr(settings, 'METRICS_FLUSH_INTERVAL', 5),),
+                                        name='metrics-flush', daemon=True)
+            _flusher.start()
+            atexit.register(flush)
+
+
+def _after_fork_in_child():
+    # con --preload el hijo hereda valores del maestro: empezar de cero con archivo propio
+    global _process_file, _flusher
+    _process_file = None
+    _flusher = None
+    for metric in REGISTRY.values():
+        metric.reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def gather() -> dict:
+    """Estado agregado de todos los procesos (o solo este sin METRICS_MULTIPROC_DIR)."""
+    directory = _multiproc_dir()
+    if not directory:
+        return merge([collect()])
+    flush()
+    states = []
+    for path in glob.glob(os.path.join(directory, 'metrics_*.json')):
+        try:
+            with open(path, encoding='utf-8') as fh:
+                states.append(json.load(fh))
+        except (OSError, ValueError):
+            continue  # archivo a medio escribir o borrado entre glob y open
+    return merge(states)
+
+
+def _labels(labelnames, values, extra=None) -> str:
+    pairs = [(n, v) for n, v in zip(labelnames, values)] + (extra or [])
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{n}="{v}"' for (n, _), v in zip(pairs, escaped)) + '}'
+
+
+def render_prometheus(state: dict | None = None) -> str:
+    state = gather() if state is None else state
+    lines = []
+    for name, entry in sorted(state.items()):
+        lines.append(f"# HELP {name} {entry['help']}")
+        lines.append(f"# TYPE {name} {entry['type']}")
+        for key, value in sorted(entry['samples'].items()):
+            if entry['type'] == 'counter':
+                lines.append(f"{name}{_labels(entry['labelnames'], key)} {value}")
+                continue
+            cumulative = 0
+            for le, c in zip(list(entry['buckets']) + ['+Inf'], value['counts']):
+                cumulative += c
+                lines.append(f"{name}_bucket{_labels(entry['labelnames'], key, [('le', le)])} {cumulative}")
+            lines.append(f"{name}_sum{_labels(entry['labelnames'], key)} {round(value['sum'], 3)}")
+            lines.append(f"{name}_count{_labels(entry['labelnames'], key)} {value['count']}")
+    return '\n'.join(lines) + '\n'
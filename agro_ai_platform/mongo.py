@@ -9,6 +9,8 @@ from django.core.exceptions import ImproperlyConfigured
 from django.utils import timezone as dj_tz
 from django.utils.dateparse import parse_datetime
 
+from .request_metrics import MongoCommandMetrics
+
 UTC = timezone.utc
 LIMA_TZ = ZoneInfo("America/Lima")
 
@@ -44,6 +46,7 @@ def get_client() -> MongoClient:
             tz_aware=True,
             tzinfo=UTC,
             serverSelectionTimeoutMS=5000,
+            event_listeners=[MongoCommandMetrics()],
         )
     except TypeError:
         # Fallback para versiones sin soporte de tzinfo
@@ -51,6 +54,7 @@ def get_client() -> MongoClient:
             settings.MONGO_URL,
             tz_aware=True,
             serverSelectionTimeoutMS=5000,
+            event_listeners=[MongoCommandMetrics()],
         )
 
 
@@ -0,0 +1,173 @@
+"""
+aggregate/find con nombre, medidos y con explain de los lentos.
+
+    rows = mongo_queries.aggregate(coll, 'brain.timeseries', pipeline, parcela_id=parcela_id)
+    for doc in mongo_queries.find(coll, 'brain.history', {...}, projection=[...], sort=[('timestamp', 1)]):
+        ...
+
+El tiempo de cada consulta (incluida la lectura completa del cursor) se
+registra como span 'mongo.<nombre>' (agro_ai_platform.tracing: histograma y
+Server-Timing). Si supera MONGO_SLOW_QUERY_MS se ejecuta en segundo plano
+explain("executionStats") y se guarda tiempo + resumen del plan (docs/keys
+examinados, etapas) en la colección capped MONGO_SLOW_QUERY_COLLECTION.
+Como el explain repite la consulta, se hace como máximo una vez cada
+MONGO_SLOW_QUERY_EXPLAIN_INTERVAL segundos por nombre.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bson import json_util
+from django.conf import settings
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+from . import metrics, tracing
+
+logger = logging.getLogger('agro_ai.mongo_queries')
+
+SLOW_QUERIES = metrics.counter('agro_mongo_slow_queries_total',
+                               'Consultas Mongo sobre MONGO_SLOW_QUERY_MS por pipeline.', ['pipeline'])
+
+# el explain completo se guarda como JSON truncado (puede ser grande y trae claves con $)
+EXPLAIN_MAX_CHARS = 20000
+
+_last_explain: dict[str, float] = {}
+_capped_ready: set[tuple[str, str]] = set()
+_lock = threading.Lock()
+_executor = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mongo-explain')
+    return _executor
+
+
+def aggregate(coll, name: str, pipeline: list, parcela_id=None, **kwargs) -> list:
+    kwargs.setdefault('allowDiskUse', True)
+    start = time.perf_counter()
+    rows = list(coll.aggregate(pipeline, **kwargs))
+    ms = (time.perf_counter() - start) * 1000
+    _observe(coll, name, ms, len(rows), parcela_id, {
+        'aggregate': coll.name, 'pipeline': pipeline, 'cursor': {},
+        'allowDiskUse': kwargs['allowDiskUse'],
+    })
+    return rows
+
+
+def find(coll, name: str, filter: dict, projection=None, sort=None, limit: int = 0, parcela_id=None):
+    """
+    Generador: se registra al terminar (o cerrar) el recorrido del cursor. Solo se mide
+    la lectura del cursor (next), no lo que el llamador hace con cada documento.
+    """
+    command = {'find': coll.name, 'filter': filter}
+    cursor = coll.find(filter, projection=projection)
+    if projection:
+        command['projection'] = {f: 1 for f in projection} if isinstance(projection, (list, tuple)) else projection
+    if sort:
+        cursor = cursor.sort(sort)
+        command['sort'] = dict(sort)
+    if limit:
+        cursor = cursor.limit(limit)
+        command['limit'] = limit
+    elapsed, returned = 0.0, 0
+    docs = iter(cursor)
+    try:
+        while True:
+            start = time.perf_counter()
+            doc = next(docs, None)
+            elapsed += time.perf_counter() - start
+            if doc is None:
+                return
+            returned += 1
+            yield doc
+    finally:
+        _observe(coll, name, elapsed * 1000, returned, parcela_id, command)
+
+
+def _observe(coll, name, ms, returned, parcela_id, command):
+    tracing.record(f"mongo.{name}", ms)
+    if ms < getattr(settings, 'MONGO_SLOW_QUERY_MS', 500):
+        return
+    SLOW_QUERIES.inc(pipeline=name)
+    now = time.monotonic()
+    with _lock:
+        if now - _last_explain.get(name, float('-inf')) < getattr(settings, 'MONGO_SLOW_QUERY_EXPLAIN_INTERVAL', 60):
+            return
+        _last_explain[name] = now
+    _get_executor().submit(_explain_and_store, coll, name, ms, returned, parcela_id, command)
+
+
+def summarize_explain(explain: dict) -> dict:
+    """Suma executionStats (find, aggregate con $cursor, SBE o sharded) y lista las etapas del plan ganador."""
+    summary = {'docs_examined': 0, 'keys_examined': 0, 'n_returned': 0, 'execution_ms': 0, 'stages': []}
+
+    def walk(node, in_plan=False):
+        if isinstance(node, dict):
+            stats = node.get('executionStats')
+            if isinstance(stats, dict):
+                summary['docs_examined'] += stats.get('totalDocsExamined', 0) or 0
+                summary['keys_examined'] += stats.get('totalKeysExamined', 0) or 0
+                summary['n_returned'] += stats.get('nReturned', 0) or 0
+                summary['execution_ms'] = max(summary['execution_ms'], stats.get('executionTimeMillis', 0) or 0)
+            if in_plan and isinstance(node.get('stage'), str) and node['stage'] not in summary['stages']:
+                summary['stages'].append(node['stage'])
+            for key, value in node.items():
+                if key in ('executionStats', 'allPlansExecution', 'rejectedPlans'):
+                    continue
+                walk(value, in_plan or key in ('winningPlan', 'queryPlan'))
+        elif isinstance(node, list):
+            for item in node:
+                walk(item, in_plan)
+
+    walk(explain)
+    summary['collscan'] = 'COLLSCAN' in summary['stages']
+    return summary
+
+
+def _slow_collection(db):
+    name = getattr(settings, 'MONGO_SLOW_QUERY_COLLECTION', 'slow_queries')
+    key = (db.name, name)
+    if key not in _capped_ready:
+        try:
+            db.create_collection(name, capped=True, size=getattr(settings, 'MONGO_SLOW_QUERY_CAP_BYTES', 16 * 1024 * 1024))
+        except CollectionInvalid:
+            pass  # ya existe
+        _capped_ready.add(key)
+    return db[name]
+
+
+def _explain_and_store(coll, name, ms, returned, parcela_id, command):
+    db = coll.database
+    try:
+        explain = db.command({'explain': command, 'verbosity': 'executionStats'})
+        doc = {
+            'ts': time.time(),
+            'pipeline': name,
+            'collection': coll.name,
+            'parcela_id': parcela_id,
+            'ms': round(ms, 1),
+            'returned': returned,
+            **summarize_explain(explain),
+            'command': json_util.dumps(command)[:EXPLAIN_MAX_CHARS],
+            'explain': json_util.dumps(explain)[:EXPLAIN_MAX_CHARS],
+        }
+        _slow_collection(db).insert_one(doc)
+    except PyMongoError as e:
+        logger.warning("Error guardando explain de %s: %s", name, e)
+
+
+def recent_slow_queries(db, pipeline: str | None = None, parcela_id=None, limit: int = 50) -> list[dict]:
+    """Últimas consultas lentas registradas (orden natural inverso = más recientes primero)."""
+    query = {}
+    if pipeline:
+        query['pipeline'] = pipeline
+    if parcela_id is not None:
+        query['parcela_id'] = parcela_id
+    name = getattr(settings, 'MONGO_SLOW_QUERY_COLLECTION', 'slow_queries')
+    cursor = db[name].find(query, projection={'_id': 0, 'explain': 0}).sort('$natural', -1).limit(limit)
+    return list(cursor)
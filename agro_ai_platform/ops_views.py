@@ -0,0 +1,153 @@
+"""Endpoints de operación (solo administradores): métricas internas del proceso, perfiles de requests y consultas Mongo lentas."""
+import hmac
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
+from rest_framework import permissions
+from rest_framework.permissions import BasePermission
+from rest_framework.response import Response
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.views import APIView
+
+from users.permissions import IsAdminRole
+from . import metrics, mongo_queries, profiling, tracing
+from .mongo import get_db
+
+
+class HasMetricsToken(BasePermission):
+    """Scrapers de Prometheus: Authorization: Bearer <METRICS_TOKEN> (deshabilitado si está vacío)."""
+
+    def has_permission(self, request, view):
+        expected = getattr(settings, 'METRICS_TOKEN', '')
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if not expected or not header.startswith('Bearer '):
+            return False
+        return hmac.compare_digest(header[len('Bearer '):].strip(), expected)
+
+
+@extend_schema(
+    tags=['Operación'],
+    summary='Histogramas de spans del proceso',
+    description=(
+        "Duración de las etapas instrumentadas (ingesta, brain, chatbot) acumulada en este proceso: "
+        "count, sum/max y p50/p95/p99 aproximados por bucket. Con ?formato=prometheus devuelve texto "
+        "Prometheus (solo spans; todas las métricas en /api/admin/metrics/). Cada worker tiene sus propios histogramas."
+    ),
+    parameters=[
+        OpenApiParameter(name='formato', required=False, type=OpenApiTypes.STR, enum=['json', 'prometheus']),
+        OpenApiParameter(name='prefix', required=False, type=OpenApiTypes.STR, description='Filtrar spans por prefijo (p. ej. ingest).'),
+    ],
+)
+class SpanMetricsView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsAdminRole]
+
+    def get(self, request):
+        if request.query_params.get('formato') == 'prometheus':
+            return HttpResponse(tracing.render_prometheus(), content_type='text/plain; version=0.0.4')
+        prefix = request.query_params.get('prefix', '')
+        spans = {name: data for name, data in tracing.snapshot().items() if name.startswith(prefix)}
+        return Response({'spans': spans})
+
+
+@extend_schema(
+    tags=['Operación'],
+    summary='Métricas Prometheus',
+    description=(
+        "Contadores e histogramas del registro de métricas (ingesta por reason y por plan, latencias, spans) "
+        "en formato texto Prometheus. Con METRICS_MULTIPROC_DIR suma todos los workers. "
+        "Acceso: superadmin/administrador o 'Authorization: Bearer <METRICS_TOKEN>'."
+    ),
+    responses={200: OpenApiTypes.STR},
+)
+class PrometheusMetricsView(APIView):
+    permission_classes = [HasMetricsToken | (permissions.IsAuthenticated & IsAdminRole)]
+
+    def get(self, request):
+        return HttpResponse(metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@extend_schema(
+    tags=['Operación'],
+    summary='Perfiles de requests recientes',
+    description=(
+        "Requests perfilados con ?profile=1 (cProfile) o ?profile=sample (muestreo de pilas), o con el header "
+        "X-Profile. Solo superadmin/administrador pueden activar el perfilado y consultar los resultados."
+    ),
+    parameters=[OpenApiParameter(name='limit', required=False, type=OpenApiTypes.INT)],
+)
+class ProfileListView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsAdminRole]
+
+    def get(self, request):
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 50)), 200))
+        except ValueError:
+            limit = 50
+        return Response({'profiles': profiling.list_profiles(limit)})
+
+
+@extend_schema(
+    tags=['Operación'],
+    summary='Detalle de un perfil',
+    description=(
+        "cProfile: resumen pstats en texto (?sort=cumulative|tottime|ncalls, ?limit=40); ?raw=1 descarga el .prof "
+        "(snakeviz, gprof2dot). Muestreo: pilas colapsadas 'a;b;c N' (flamegraph.pl, speedscope)."
+    ),
+    parameters=[
+        OpenApiParameter(name='sort', required=False, type=OpenApiTypes.STR),
+        OpenApiParameter(name='limit', required=False, type=OpenApiTypes.INT),
+        OpenApiParameter(name='raw', required=False, type=OpenApiTypes.BOOL),
+    ],
+    responses={200: OpenApiTypes.STR},
+)
+class ProfileDetailView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsAdminRole]
+
+    def get(self, request, profile_id):
+        meta, path = profiling.load_profile(profile_id)
+        if not path:
+            raise NotFound("Perfil no encontrado.")
+        if meta['mode'] == 'cprofile' and request.query_params.get('raw') not in ('1', 'true'):
+            sort = request.query_params.get('sort', 'cumulative')
+            if sort not in ('cumulative', 'tottime', 'ncalls', 'time'):
+                sort = 'cumulative'
+            try:
+                limit = max(1, min(int(request.query_params.get('limit', 40)), 500))
+            except ValueError:
+                limit = 40
+            return HttpResponse(profiling.pstats_text(path, sort, limit), content_type='text/plain; charset=utf-8')
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=path.rsplit('/', 1)[-1])
+
+
+@extend_schema(
+    tags=['Operación'],
+    summary='Consultas Mongo lentas',
+    description=(
+        "Últimas consultas con nombre (aggregate/find de brain) que superaron MONGO_SLOW_QUERY_MS, con el resumen "
+        "de su explain('executionStats'): docs_examined, keys_examined, n_returned, etapas del plan y collscan. "
+        "Sirve para ver qué pipelines o parcelas recorren demasiados documentos."
+    ),
+    parameters=[
+        OpenApiParameter(name='pipeline', required=False, type=OpenApiTypes.STR, description='Nombre, p. ej. brain.timeseries'),
+        OpenApiParameter(name='parcela_id', required=False, type=OpenApiTypes.INT),
+        OpenApiParameter(name='limit', required=False, type=OpenApiTypes.INT),
+    ],
+)
+class SlowMongoQueryListView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsAdminRole]
+
+    def get(self, request):
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 50)), 500))
+        except ValueError:
+            limit = 50
+        parcela_id = request.query_params.get('parcela_id')
+        try:
+            parcela_id = int(parcela_id) if parcela_id else None
+        except ValueError:
+            raise ValidationError({"parcela_id": "Debe ser entero."})
+        rows = mongo_queries.recent_slow_queries(
+            get_db(), pipeline=request.query_params.get('pipeline'), parcela_id=parcela_id, limit=limit,
+        )
+        return Response({'slow_queries': rows})
@@ -0,0 +1,48 @@
+"""
+Accesores perezosos para dependencias pesadas u opcionales.
+
+Importar whisper (torch) o cloudinary.uploader en el arranque cuesta tiempo y RSS
+en cada worker y en cada `manage.py` aunque nunca se transcriba ni se suba nada.
+Estos helpers hacen el import en el primer uso y lo cachean.
+"""
+import importlib.util
+from functools import lru_cache
+
+from django.conf import settings
+
+
+def is_installed(module: str) -> bool:
+    """True si el módulo se puede importar (sin importarlo)."""
+    return importlib.util.find_spec(module) is not None
+
+
+@lru_cache(maxsize=1)
+def get_cloudinary_uploader():
+    import cloudinary
+    import cloudinary.uploader
+
+    url = getattr(settings, "CLOUDINARY_URL", None)
+    if url:
+        cloudinary.config(cloudinary_url=url)
+    return cloudinary.uploader
+
+
+def whisper_available() -> bool:
+    return is_installed("whisper")
+
+
+@lru_cache(maxsize=1)
+def get_whisper():
+    import whisper
+    return whisper
+
+
+def pillow_available() -> bool:
+    return is_installed("PIL")
+
+
+@lru_cache(maxsize=1)
+def get_pil():
+    """Devuelve (Image, ImageOps) de Pillow."""
+    from PIL import Image, ImageOps
+    return Image, ImageOps
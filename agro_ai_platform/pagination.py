@@ -0,0 +1,131 @@
+"""
+Paginación para listados de alto volumen (tareas, alertas).
+
+- Por defecto: ?page=N como siempre, con COUNT(*) exacto. Con ?count=cached el
+  total se guarda en la caché "default" PAGINATION_COUNT_CACHE_TTL segundos por
+  consulta (mismo SQL y parámetros): puede ir atrasado ese tiempo, y con él
+  num_pages (la última página real puede dar 404 o salir vacía).
+- Con ?paginacion=cursor (o al seguir un enlace ?cursor=...): paginación por
+  cursor sobre (-created_at, -id), sin COUNT ni OFFSET. Respuesta
+  { next, previous, results }; con ?include_count=true añade "count" (cacheado).
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator as DjangoPaginator
+from django.core.exceptions import EmptyResultSet
+from django.utils.functional import cached_property
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+
+
+def cached_count(queryset) -> int:
+    """COUNT(*) del queryset, cacheado por SQL + parámetros."""
+    ttl = getattr(settings, 'PAGINATION_COUNT_CACHE_TTL', 60)
+    if ttl <= 0 or not hasattr(queryset, 'query'):
+        return queryset.count() if hasattr(queryset, 'count') else len(queryset)
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    digest = hashlib.md5(f"{queryset.db}|{sql}|{params!r}".encode('utf-8')).hexdigest()
+    key = f"pagination:count:{digest}"
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, ttl)
+    return count
+
+
+class CachedCountPaginator(DjangoPaginator):
+    @cached_property
+    def count(self):
+        return cached_count(self.object_list)
+
+
+class CachedCountPageNumberPagination(PageNumberPagination):
+    """COUNT exacto salvo que el cliente pida ?count=cached."""
+
+    def paginate_queryset(self, queryset, request, view=None):
+        cached = request.query_params.get('count') == 'cached'
+        self.django_paginator_class = CachedCountPaginator if cached else DjangoPaginator
+        return super().paginate_queryset(queryset, request, view)
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    ordering = ('-created_at', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        # el cursor necesita un orden estable: se ignora ?ordering= del OrderingFilter
+        return self.ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.include_count = request.query_params.get('include_count', '').lower() in ('1', 'true', 'yes')
+        self.total = cached_count(queryset) if self.include_count else None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.include_count:
+            response.data['count'] = self.total
+        return response
+
+
+class HighVolumePagination(BasePagination):
+    """Número de página por defecto (total cacheado con ?count=cached); cursor si se pide."""
+
+    def __init__(self):
+        self.page_pagination = CachedCountPageNumberPagination()
+        self.cursor_pagination = CreatedAtCursorPagination()
+        self.active = self.page_pagination
+
+    @staticmethod
+    def use_cursor(request) -> bool:
+        params = request.query_params
+        return params.get('paginacion') == 'cursor' or 'cursor' in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.active = self.cursor_pagination if self.use_cursor(request) else self.page_pagination
+        return self.active.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.active.get_paginated_response(data)
+
+    # API navegable
+    @property
+    def display_page_controls(self):
+        return self.active.display_page_controls
+
+    def to_html(self):
+        return self.active.to_html()
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_pagination.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        params = self.page_pagination.get_schema_operation_parameters(view)
+        params += self.cursor_pagination.get_schema_operation_parameters(view)
+        params += [
+            {
+                'name': 'count',
+                'required': False,
+                'in': 'query',
+                'description': "'cached' para usar un total cacheado (puede ir atrasado) en lugar de COUNT exacto.",
+                'schema': {'type': 'string', 'enum': ['cached']},
+            },
+            {
+                'name': 'paginacion',
+                'required': False,
+                'in': 'query',
+                'description': "'cursor' para paginar por cursor (sin COUNT ni OFFSET).",
+                'schema': {'type': 'string', 'enum': ['cursor']},
+            },
+            {
+                'name': 'include_count',
+                'required': False,
+                'in': 'query',
+                'description': 'Con paginación por cursor, incluir "count" (cacheado).',
+                'schema': {'type': 'boolean'},
+            },
+        ]
+        return params
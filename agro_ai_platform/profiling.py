@@ -0,0 +1,204 @@
+"""
+Perfilado bajo demanda de requests en producción (solo administradores).
+
+    GET /api/brain/kpis/?profile=1          → cProfile (pstats)
+    GET /api/brain/kpis/?profile=sample     → muestreo de pilas (formato "collapsed" para flame graphs)
+    o el header  X-Profile: 1 | sample
+
+La respuesta trae X-Profile-Id; el resultado queda en PROFILE_DIR (se conservan
+los últimos PROFILE_MAX_FILES) y se consulta en /api/admin/profiles/. Se usa
+X-Request-ID como id si viene en el request (con un sufijo aleatorio si ese id
+ya existe, para no sobrescribir otro perfil).
+"""
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+from users.permissions import IsAdminRole, role_name
+
+logger = logging.getLogger('agro_ai.profiling')
+
+_SAFE_ID = re.compile(r'[^A-Za-z0-9_.-]')
+
+
+def profile_dir() -> str:
+    return str(getattr(settings, 'PROFILE_DIR', '') or os.path.join(settings.BASE_DIR, 'tmp', 'profiles'))
+
+
+def _requested_mode(request) -> str | None:
+    value = request.GET.get('profile') or request.META.get('HTTP_X_PROFILE')
+    if not value or value in ('0', 'false'):
+        return None
+    return 'sample' if value == 'sample' else 'cprofile'
+
+
+def _is_admin(request) -> bool:
+    # la autenticación por token de DRF ocurre en la vista; aquí se resuelve a mano
+    user = getattr(request, 'user', None)
+    if not (user and user.is_authenticated):
+        try:
+            auth = TokenAuthentication().authenticate(request)
+        except Exception:
+            auth = None
+        user = auth[0] if auth else None
+    return bool(user and role_name(user) in IsAdminRole.admin_roles)
+
+
+class StackSampler:
+    """Muestrea la pila de un hilo cada `interval` segundos y cuenta pilas "colapsadas" (a;b;c)."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def collapsed(self) -> str:
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _prune(directory: str):
+    keep = getattr(settings, 'PROFILE_MAX_FILES', 50)
+    metas = sorted((e for e in os.scandir(directory) if e.name.endswith('.json')),
+                   key=lambda e: e.stat().st_mtime, reverse=True)
+    for entry in metas[keep:]:
+        base = entry.path[:-len('.json')]
+        for ext in ('.json', '.prof', '.collapsed'):
+            try:
+                os.remove(base + ext)
+            except FileNotFoundError:
+                pass
+
+
+def _new_profile_id(request) -> str:
+    profile_id = _SAFE_ID.sub('', request.META.get('HTTP_X_REQUEST_ID', ''))[:64]
+    if not profile_id:
+        return uuid.uuid4().hex
+    # el id lo elige el cliente: no pisar un perfil anterior con el mismo X-Request-ID
+    if os.path.exists(os.path.join(profile_dir(), profile_id + '.json')):
+        profile_id = f"{profile_id}-{uuid.uuid4().hex[:8]}"
+    return profile_id
+
+
+def _save(profile_id: str, mode: str, payload, meta: dict):
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, profile_id)
+    if mode == 'cprofile':
+        payload.dump_stats(base + '.prof')
+    else:
+        with open(base + '.collapsed', 'w', encoding='utf-8') as fh:
+            fh.write(payload.collapsed())
+    with open(base + '.json', 'w', encoding='utf-8') as fh:
+        json.dump(meta, fh)
+    _prune(directory)
+
+
+def list_profiles(limit: int = 50) -> list[dict]:
+    directory = profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    out = []
+    for entry in sorted((e for e in os.scandir(directory) if e.name.endswith('.json')),
+                        key=lambda e: e.stat().st_mtime, reverse=True)[:limit]:
+        try:
+            with open(entry.path, encoding='utf-8') as fh:
+                out.append(json.load(fh))
+        except (OSError, ValueError):
+            continue
+    return out
+
+
+def load_profile(profile_id: str):
+    """(meta, ruta_del_resultado) o (None, None) si no existe."""
+    profile_id = _SAFE_ID.sub('', profile_id)
+    base = os.path.join(profile_dir(), profile_id)
+    try:
+        with open(base + '.json', encoding='utf-8') as fh:
+            meta = json.load(fh)
+    except (OSError, ValueError):
+        return None, None
+    path = base + ('.prof' if meta.get('mode') == 'cprofile' else '.collapsed')
+    return meta, path if os.path.exists(path) else None
+
+
+def pstats_text(path: str, sort: str = 'cumulative', limit: int = 40) -> str:
+    out = io.StringIO()
+    stats = pstats.Stats(path, stream=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = _requested_mode(request) if getattr(settings, 'PROFILING_ENABLED', True) else None
+        if mode is None or not _is_admin(request):
+            return self.get_response(request)
+
+        profile_id = _new_profile_id(request)
+        start = time.perf_counter()
+        if mode == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        else:
+            profiler = StackSampler(threading.get_ident(), getattr(settings, 'PROFILE_SAMPLE_INTERVAL_MS', 5) / 1000)
+            profiler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.stop()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        try:
+            _save(profile_id, mode, profiler, {
+                'id': profile_id,
+                'mode': mode,
+                'method': request.method,
+                'path': request.get_full_path(),
+                'status': response.status_code,
+                'ms': round(elapsed_ms, 1),
+                'user': getattr(getattr(request, 'user', None), 'username', None),
+                'created_at': time.time(),
+            })
+            response['X-Profile-Id'] = profile_id
+        except OSError as e:
+            logger.warning("Error guardando perfil %s: %s", profile_id, e)
+        return response
@@ -0,0 +1,124 @@
+"""
+Métricas por request: cantidad y tiempo de queries ORM y comandos MongoDB.
+
+- ORM: connection.execute_wrapper en todas las conexiones mientras dura el request.
+- Mongo: CommandListener registrado en el MongoClient (agro_ai_platform.mongo).
+- Los contadores viven en un ContextVar, así solo se atribuye al request lo que
+  se ejecuta en su hilo/tarea (los pools de hilos en segundo plano no cuentan).
+
+Contar es barato y se hace siempre; el muestreo (REQUEST_METRICS_SAMPLE_RATE)
+decide si el request emite el header Server-Timing y la línea de log. Los
+requests que superan REQUEST_METRICS_SLOW_MS se registran siempre (WARNING).
+"""
+import contextvars
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from pymongo import monitoring
+
+logger = logging.getLogger('agro_ai.request_metrics')
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('db_count', 'db_ms', 'mongo_count', 'mongo_ms', 'spans')
+
+    def __init__(self):
+        self.db_count = 0
+        self.db_ms = 0.0
+        self.mongo_count = 0
+        self.mongo_ms = 0.0
+        self.spans = {}  # nombre → ms (agro_ai_platform.tracing)
+
+
+def current_metrics() -> RequestMetrics | None:
+    return _current.get()
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_count += 1
+        metrics.db_ms += (time.perf_counter() - start) * 1000
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Suma los comandos Mongo (y su duración) al request en curso."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event)
+
+    @staticmethod
+    def _record(event):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.mongo_count += 1
+            metrics.mongo_ms += event.duration_micros / 1000
+
+
+def server_timing(metrics: RequestMetrics, total_ms: float) -> str:
+    parts = [
+        f'db;desc="ORM {metrics.db_count}q";dur={metrics.db_ms:.1f}',
+        f'mongo;desc="Mongo {metrics.mongo_count}cmd";dur={metrics.mongo_ms:.1f}',
+    ]
+    parts += [f'{name};dur={ms:.1f}' for name, ms in metrics.spans.items()]
+    parts.append(f'total;dur={total_ms:.1f}')
+    return ', '.join(parts)
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'REQUEST_METRICS_SAMPLE_RATE', 0.1)
+        self.slow_ms = getattr(settings, 'REQUEST_METRICS_SLOW_MS', 1000)
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(_db_wrapper))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        slow = total_ms >= self.slow_ms
+        if slow or random.random() < self.sample_rate:
+            response['Server-Timing'] = server_timing(metrics, total_ms)
+            logger.log(logging.WARNING if slow else logging.INFO, json.dumps({
+                'event': 'request',
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'ms': round(total_ms, 1),
+                'db_queries': metrics.db_count,
+                'db_ms': round(metrics.db_ms, 1),
+                'mongo_cmds': metrics.mongo_count,
+                'mongo_ms': round(metrics.mongo_ms, 1),
+                'spans': {name: round(ms, 1) for name, ms in metrics.spans.items()},
+                'slow': slow,
+            }))
+        return response
@@ -14,7 +14,7 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 import dj_database_url
-import cloudinary
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -35,6 +35,13 @@ def _getenv_int(name: str, default: int) -> int:
     except ValueError:
         return default
 
+def _getenv_float(name: str, default: float) -> float:
+    val = os.getenv(name)
+    try:
+        return float(str(val).strip()) if val is not None else default
+    except ValueError:
+        return default
+
 SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key')
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
 ALLOWED_HOSTS = _csv("ALLOWED_HOSTS", "localhost,127.0.0.1")
@@ -74,10 +81,14 @@ INSTALLED_APPS = [
     'drf_spectacular_sidecar',
     'brain',
     'chatbot',
+    # comandos de operación de todo el proyecto (benchmark, seed_dataset, provision_fleet, ...)
+    'agro_ai_platform',
 ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    # queries ORM/Mongo por request → Server-Timing + log (ver REQUEST_METRICS_*)
+    'agro_ai_platform.request_metrics.RequestMetricsMiddleware',
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -86,6 +97,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # ?profile=1|sample para administradores (agro_ai_platform.profiling)
+    'agro_ai_platform.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'agro_ai_platform.urls'
@@ -141,6 +154,9 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
+# Solo para el almacenamiento local de imágenes (parcels.storage.LocalFileSystemStorage)
+MEDIA_URL = '/media/'
+MEDIA_ROOT = Path(os.getenv("MEDIA_ROOT", str(BASE_DIR / 'media')))
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'authentication.User'
 
@@ -174,6 +190,126 @@ SPECTACULAR_SETTINGS = {
 MONGO_URL = os.getenv("MONGO_URL", "")
 MONGO_DB = os.getenv("MONGO_DB", "sensors_db")
 
+# Respuestas del chatbot cacheadas (chatbot.response_cache): TTL y máximo de entradas (LRU)
+CHATBOT_RESPONSE_CACHE_TTL = _getenv_int("CHATBOT_RESPONSE_CACHE_TTL", 3600)
+CHATBOT_RESPONSE_CACHE_MAX_ENTRIES = _getenv_int("CHATBOT_RESPONSE_CACHE_MAX_ENTRIES", 2000)
+# Temas (chatbot.intents.CONTEXT_TOPIC_KEYWORDS) que nunca se cachean, separados por coma
+CHATBOT_RESPONSE_CACHE_EXCLUDE = [t.strip() for t in os.getenv("CHATBOT_RESPONSE_CACHE_EXCLUDE", "").split(",") if t.strip()]
+
+# Historial del chatbot (chatbot.persistence): escritura diferida en lotes
+CHATBOT_WRITE_BEHIND = _getenv_bool("CHATBOT_WRITE_BEHIND", True)
+CHATBOT_WRITE_FLUSH_MS = _getenv_int("CHATBOT_WRITE_FLUSH_MS", 500)
+CHATBOT_WRITE_BATCH_SIZE = _getenv_int("CHATBOT_WRITE_BATCH_SIZE", 200)
+CHATBOT_WRITE_MAX_PENDING = _getenv_int("CHATBOT_WRITE_MAX_PENDING", 5000)
+# Segundos que cada proceso reutiliza el último CropData antes de volver a consultarlo
+CHATBOT_CROP_DATA_CACHE_TTL = _getenv_int("CHATBOT_CROP_DATA_CACHE_TTL", 30)
+
+# Caché compartida (resúmenes IA, etc.). Con REDIS_URL se comparte entre workers de gunicorn.
+# El alias "chatbot" queda aparte para acotar sus entradas sin desalojar lo demás;
+# en Redis la expulsión LRU la da maxmemory-policy=allkeys-lru.
+REDIS_URL = os.getenv("REDIS_URL", "")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        },
+        "chatbot": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": "chatbot",
+            "TIMEOUT": CHATBOT_RESPONSE_CACHE_TTL,
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "agro-ai-default",
+        },
+        # LocMemCache desaloja por LRU al superar MAX_ENTRIES
+        "chatbot": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "agro-ai-chatbot",
+            "TIMEOUT": CHATBOT_RESPONSE_CACHE_TTL,
+            "OPTIONS": {"MAX_ENTRIES": CHATBOT_RESPONSE_CACHE_MAX_ENTRIES, "CULL_FREQUENCY": 10},
+        },
+    }
+
+# Workers de gunicorn (gunicorn lee la misma variable). Los jobs de resumen IA y de voz y los conteos
+# de paginación viven en la caché "default": con LocMem cada worker tendría los suyos y el polling
+# daría 404 al caer en otro proceso.
+WEB_CONCURRENCY = _getenv_int("WEB_CONCURRENCY", 1)
+if WEB_CONCURRENCY > 1 and not REDIS_URL:
+    raise ImproperlyConfigured("WEB_CONCURRENCY > 1 requiere REDIS_URL (caché compartida entre workers).")
+
+# Métricas por request (agro_ai_platform.request_metrics)
+REQUEST_METRICS_ENABLED = _getenv_bool("REQUEST_METRICS_ENABLED", True)
+# fracción de requests que emiten Server-Timing + log; los lentos se registran siempre
+REQUEST_METRICS_SAMPLE_RATE = _getenv_float("REQUEST_METRICS_SAMPLE_RATE", 1.0 if DEBUG else 0.1)
+REQUEST_METRICS_SLOW_MS = _getenv_int("REQUEST_METRICS_SLOW_MS", 1000)
+
+# Spans por etapa (agro_ai_platform.tracing); TRACING_EXPORT_PATH admite {pid}, p. ej. /tmp/spans-{pid}.json
+TRACING_ENABLED = _getenv_bool("TRACING_ENABLED", True)
+TRACING_EXPORT_PATH = os.getenv("TRACING_EXPORT_PATH", "")
+TRACING_EXPORT_INTERVAL = _getenv_int("TRACING_EXPORT_INTERVAL", 60)
+
+# Registro de métricas (agro_ai_platform.metrics): con varios workers, directorio compartido para sumar procesos
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+METRICS_FLUSH_INTERVAL = _getenv_int("METRICS_FLUSH_INTERVAL", 5)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")  # Bearer para el scraper de Prometheus
+
+# Consultas Mongo con nombre (agro_ai_platform.mongo_queries): sobre el umbral se guarda explain("executionStats")
+MONGO_SLOW_QUERY_MS = _getenv_int("MONGO_SLOW_QUERY_MS", 500)
+MONGO_SLOW_QUERY_COLLECTION = os.getenv("MONGO_SLOW_QUERY_COLLECTION", "slow_queries")  # capped
+MONGO_SLOW_QUERY_CAP_BYTES = _getenv_int("MONGO_SLOW_QUERY_CAP_BYTES", 16 * 1024 * 1024)
+MONGO_SLOW_QUERY_EXPLAIN_INTERVAL = _getenv_int("MONGO_SLOW_QUERY_EXPLAIN_INTERVAL", 60)  # s entre explains por nombre
+
+# Ingesta bajo ASGI (nodes.views.node_ingest): NodeIngestView en un pool de hilos acotado por proceso
+INGEST_ASYNC = _getenv_bool("INGEST_ASYNC", True)
+INGEST_ASYNC_THREADS = _getenv_int("INGEST_ASYNC_THREADS", 16)  # ≈ conexiones SQL y Mongo por proceso
+INGEST_ASYNC_MAX_PENDING = _getenv_int("INGEST_ASYNC_MAX_PENDING", 1000)  # sobre esto → 503 sobrecarga
+
+# Perfilado bajo demanda (?profile=1|sample, solo administradores)
+PROFILING_ENABLED = _getenv_bool("PROFILING_ENABLED", True)
+PROFILE_DIR = os.getenv("PROFILE_DIR", str(BASE_DIR / "tmp" / "profiles"))
+PROFILE_MAX_FILES = _getenv_int("PROFILE_MAX_FILES", 50)
+PROFILE_SAMPLE_INTERVAL_MS = _getenv_int("PROFILE_SAMPLE_INTERVAL_MS", 5)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "agro_ai.request_metrics": {"handlers": ["console"], "level": os.getenv("REQUEST_METRICS_LOG_LEVEL", "INFO"), "propagate": False},
+        # métricas, tracing, perfilado y explain de Mongo (errores al volcar a disco/Mongo), historial del chatbot
+        "agro_ai": {"handlers": ["console"], "level": "WARNING", "propagate": False},
+    },
+}
+
+# TTL (segundos) del COUNT(*) cacheado (?count=cached, include_count) en tareas y alertas; 0 = sin caché
+PAGINATION_COUNT_CACHE_TTL = _getenv_int("PAGINATION_COUNT_CACHE_TTL", 60)
+
+# TTL (segundos) de los resúmenes IA de series temporales
+BRAIN_SUMMARY_CACHE_TTL = _getenv_int("BRAIN_SUMMARY_CACHE_TTL", 6 * 3600)
+# Hilos por proceso que generan resúmenes en segundo plano
+BRAIN_SUMMARY_WORKERS = _getenv_int("BRAIN_SUMMARY_WORKERS", 2)
+# Máximo de puntos (LTTB) que se envían al LLM por resumen
+BRAIN_SUMMARY_MAX_POINTS = _getenv_int("BRAIN_SUMMARY_MAX_POINTS", 120)
+
+# Clientes de proveedores IA (ai.providers)
+AI_CONFIG_CACHE_TTL = _getenv_int("AI_CONFIG_CACHE_TTL", 60)
+AI_PROVIDER_MAX_CONCURRENCY = _getenv_int("AI_PROVIDER_MAX_CONCURRENCY", 4)
+AI_PROVIDER_QUEUE_TIMEOUT = _getenv_int("AI_PROVIDER_QUEUE_TIMEOUT", 5)
+AI_PROVIDER_READ_TIMEOUT = _getenv_int("AI_PROVIDER_READ_TIMEOUT", 60)
+AI_CIRCUIT_FAILURES = _getenv_int("AI_CIRCUIT_FAILURES", 5)
+AI_CIRCUIT_RESET_SECONDS = _getenv_int("AI_CIRCUIT_RESET_SECONDS", 30)
+
+# Transcripción de voz (chatbot.transcription): procesos con el modelo Whisper precargado
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+WHISPER_WORKERS = _getenv_int("WHISPER_WORKERS", 1)
+WHISPER_MAX_PENDING = _getenv_int("WHISPER_MAX_PENDING", 8)
+
 # Eliminar variables/alias duplicados (MONGO_URI, MONGODB_URI, etc.). Centralizar uso en agro_ai_platform.mongo.get_db()
 
 # CORS
@@ -207,9 +343,21 @@ if DEBUG:
     # Alternativa más segura: listar explícitamente los hosts/túneles en ALLOWED_HOSTS
     ALLOWED_HOSTS = ["*"]
 
+# Cloudinary se configura en el primer uso (agro_ai_platform.optional.get_cloudinary_uploader)
 CLOUDINARY_URL = os.getenv("CLOUDINARY_URL")
-if CLOUDINARY_URL:
-    cloudinary.config(cloudinary_url=CLOUDINARY_URL)
+
+# Subida de imágenes de parcelas (parcels.uploads): cola local + pool de hilos con reintentos
+# PARCEL_IMAGE_STORAGE: "cloudinary" | "local" (por defecto cloudinary si hay CLOUDINARY_URL)
+PARCEL_IMAGE_STORAGE = os.getenv("PARCEL_IMAGE_STORAGE", "cloudinary" if CLOUDINARY_URL else "local")
+PARCEL_UPLOAD_ASYNC = _getenv_bool("PARCEL_UPLOAD_ASYNC", True)
+PARCEL_UPLOAD_WORKERS = _getenv_int("PARCEL_UPLOAD_WORKERS", 2)
+PARCEL_UPLOAD_RETRIES = _getenv_int("PARCEL_UPLOAD_RETRIES", 3)
+PARCEL_UPLOAD_SPOOL_DIR = os.getenv("PARCEL_UPLOAD_SPOOL_DIR", "")  # vacío = directorio temporal del sistema
+# Derivados (parcels.images, requiere Pillow): lado mayor en px de cada tamaño
+PARCEL_IMAGE_THUMB_PX = _getenv_int("PARCEL_IMAGE_THUMB_PX", 320)
+PARCEL_IMAGE_MEDIUM_PX = _getenv_int("PARCEL_IMAGE_MEDIUM_PX", 1280)
+PARCEL_IMAGE_ANALYSIS_PX = _getenv_int("PARCEL_IMAGE_ANALYSIS_PX", 2048)
+PARCEL_IMAGE_JPEG_QUALITY = _getenv_int("PARCEL_IMAGE_JPEG_QUALITY", 82)
 
 # Email (único bloque)
 EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend").strip().strip('"').strip("'")
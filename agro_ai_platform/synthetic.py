@@ -0,0 +1,262 @@
+"""
+Datos sintéticos reproducibles (mismo seed → mismos datos) para benchmarks y pruebas de carga.
+
+    ds = build_dataset(parcelas=20, nodos=4, dias=30, seed=1, db=get_db())
+
+Crea en la base SQL un usuario dueño, un plan con horarios fijos y, por parcela,
+ciclo activo, plan vigente, dos tareas próximas, un nodo maestro (con token) y
+`nodos` secundarios; en Mongo, una lectura por maestro en cada horario del plan
+durante los últimos `dias` días (incluido hoy), con el formato que guarda la ingesta.
+Los tokens de nodo son aleatorios (secrets), no derivan del seed: son credenciales
+y dos corridas con el mismo seed y distinto tag no deben chocar en TokenNodo.key.
+"""
+import random
+import secrets
+import math
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from agro_ai_platform.mongo import LIMA_TZ, UTC
+
+SENSORES = (
+    ("temperatura", "°C", (15.0, 35.0)),
+    ("humedad_aire", "%", (30.0, 90.0)),
+    ("humedad_suelo", "%", (10.0, 60.0)),
+)
+HORARIOS = ["07:00", "15:00", "22:00"]
+# ciclo diario por sensor: (hora del máximo, amplitud como fracción del rango)
+DIURNAL = {"temperatura": (15, 0.35), "humedad_aire": (4, 0.3), "humedad_suelo": (6, 0.08)}
+READINGS_COLLECTION = "lecturas_sensores"
+
+
+@dataclass
+class Dataset:
+    seed: int
+    tag: str
+    owner: object
+    plan: object
+    horarios: list
+    days: list
+    parcelas: list = field(default_factory=list)
+    maestros: list = field(default_factory=list)      # Node, en el orden de las parcelas
+    secundarios: dict = field(default_factory=dict)   # node_id → [codigo, ...]
+    tokens: dict = field(default_factory=dict)        # node_id → key
+    readings: int = 0
+
+
+def slot_times(day: date, horarios=HORARIOS) -> list[datetime]:
+    """Horarios del plan para `day` como datetimes aware en Lima."""
+    out = []
+    for hh in horarios:
+        h, m = map(int, hh.split(':'))
+        out.append(datetime.combine(day, time(h, m), tzinfo=LIMA_TZ))
+    return out
+
+
+def reading_payload(rng: random.Random, maestro_codigo: str, secundarios, ts: datetime) -> dict:
+    """Cuerpo de POST /api/nodes/ingest/ (también base del documento Mongo)."""
+    lecturas = []
+    for codigo in secundarios:
+        lecturas.append({
+            "nodo_codigo": codigo,
+            "last_seen": (ts - timedelta(seconds=rng.randint(0, 600))).isoformat(),
+            "bateria": rng.randint(15, 100),
+            "sensores": [
+                {"sensor": name, "valor": round(rng.uniform(lo, hi), 2), "unidad": unit}
+                for name, unit, (lo, hi) in SENSORES
+            ],
+        })
+    return {"codigo_nodo_maestro": maestro_codigo, "timestamp": ts.isoformat(), "lecturas": lecturas}
+
+
+def sensor_values(seed: int, index: int, hours, nodos: int) -> dict[str, list[list[float]]]:
+    """
+    Valores [lectura][nodo] por sensor para la parcela `index` (ciclo diario + sesgo
+    por nodo + ruido), deterministas por (seed, index) sin importar cómo se reparta
+    el trabajo. Siempre con random: el mismo seed da los mismos valores en cualquier entorno.
+    """
+    out = {}
+    rng = random.Random(f"{seed}:{index}")
+    for name, _, (lo, hi) in SENSORES:
+        peak, amp = DIURNAL.get(name, (12, 0.2))
+        span = hi - lo
+        mids = [lo + span / 2 + rng.gauss(0, span * 0.05) for _ in range(nodos)]
+        rows = []
+        for hour in hours:
+            wave = amp * span / 2 * math.cos(2 * math.pi * (hour - peak) / 24)
+            rows.append([round(min(hi, max(lo, mid + wave + rng.gauss(0, span * 0.04))), 2) for mid in mids])
+        out[name] = rows
+    return out
+
+
+def parcela_readings(seed: int, index: int, parcela_id: int, maestro_codigo: str, secundarios, days,
+                     horarios=HORARIOS, tag: str = 'seed'):
+    """Documentos de lecturas_sensores de una parcela: uno por horario del plan en cada día de `days`."""
+    slots = [ts for day in days for ts in slot_times(day, horarios)]
+    values = sensor_values(seed, index, [ts.hour + ts.minute / 60 for ts in slots], len(secundarios))
+    rng = random.Random(f"{seed}:{index}:ts")
+    for k, slot in enumerate(slots):
+        ts = (slot + timedelta(seconds=rng.randint(-120, 120))).astimezone(UTC)
+        yield {
+            "seed_tag": tag,
+            "parcela_id": parcela_id,
+            "codigo_nodo_maestro": maestro_codigo,
+            "timestamp": ts,
+            "lecturas": [
+                {
+                    "nodo_codigo": codigo,
+                    "last_seen": ts - timedelta(seconds=rng.randint(0, 600)),
+                    "sensores": [
+                        {"sensor": name, "valor": values[name][k][j], "unidad": unit}
+                        for name, unit, _ in SENSORES
+                    ],
+                }
+                for j, codigo in enumerate(secundarios)
+            ],
+        }
+
+
+def build_shared(tag: str, horarios=HORARIOS) -> dict:
+    """Rol con permiso de ver parcelas, plan con `horarios` y cultivo/variedad/etapa con reglas por sensor."""
+    from crops.models import Cultivo, Variedad, Etapa, ReglaPorEtapa
+    from plans.models import Plan
+    from users.models import Rol, Modulo, Operacion, RolesOperaciones
+
+    rol, _ = Rol.objects.get_or_create(nombre='agricultor')
+    modulo, _ = Modulo.objects.get_or_create(nombre='parcelas')
+    operacion, _ = Operacion.objects.get_or_create(modulo=modulo, nombre='ver')
+    RolesOperaciones.objects.get_or_create(rol=rol, modulo=modulo, operacion=operacion)
+
+    plan = Plan.objects.create(nombre=f"{tag}-plan", veces_por_dia=len(horarios),
+                               horarios_por_defecto=list(horarios), precio=0)
+    cultivo = Cultivo.objects.create(nombre=f"{tag}-cultivo")
+    variedad = Variedad.objects.create(cultivo=cultivo, nombre='base')
+    etapa = Etapa.objects.create(variedad=variedad, nombre='vegetativa')
+    ReglaPorEtapa.objects.bulk_create([
+        ReglaPorEtapa(etapa=etapa, parametro=name, minimo=lo + (hi - lo) * 0.2, maximo=hi - (hi - lo) * 0.2)
+        for name, _, (lo, hi) in SENSORES
+    ])
+    return {'rol': rol, 'plan': plan, 'cultivo': cultivo, 'variedad': variedad, 'etapa': etapa}
+
+
+def build_parcelas(seed: int, owners: list, indices, nodos: int, tag: str, shared: dict,
+                   fecha_inicio: date, hasta: date, batch_size: int | None = None):
+    """
+    Parcelas `indices` (owners[k] es el dueño de la k-ésima) con ciclo, plan, tareas, maestro, token y secundarios.
+    Cada parcela usa su propio generador (seed, índice): no depende de cómo se repartan los índices en bloques.
+    Las tareas se programan en los días siguientes a `hasta`, no según el reloj.
+    """
+    from nodes.models import Node, NodoSecundario, TokenNodo
+    from parcels.models import Parcela, Ciclo
+    from plans.models import ParcelaPlan
+    from tasks.models import Task
+
+    rngs = [random.Random(f"{seed}:sql:{i}") for i in indices]
+    parcela_objs = Parcela.objects.bulk_create([
+        Parcela(usuario=owner, nombre=f"{tag}-parcela-{i}",
+                latitud=round(rng.uniform(-18, -3), 6), longitud=round(rng.uniform(-81, -69), 6))
+        for owner, i, rng in zip(owners, indices, rngs)
+    ], batch_size=batch_size)
+    Ciclo.objects.bulk_create([
+        Ciclo(parcela=p, cultivo=shared['cultivo'], variedad=shared['variedad'], etapa_actual=shared['etapa'],
+              etapa_inicio=fecha_inicio)
+        for p in parcela_objs
+    ], batch_size=batch_size)
+    ParcelaPlan.objects.bulk_create([
+        ParcelaPlan(parcela=p, plan=shared['plan'], fecha_inicio=fecha_inicio, estado='activo') for p in parcela_objs
+    ], batch_size=batch_size)
+    fin = datetime.combine(hasta, time(23, 59), tzinfo=LIMA_TZ)
+    Task.objects.bulk_create([
+        Task(parcela=p, tipo='riego', descripcion='Riego programado (sintético)',
+             fecha_programada=fin + timedelta(hours=rng.randint(1, 72)))
+        for p, rng in zip(parcela_objs, rngs) for _ in range(2)
+    ], batch_size=batch_size)
+    maestros = Node.objects.bulk_create([
+        Node(parcela=p, codigo=f"{tag}-M{i}", estado='activo') for p, i in zip(parcela_objs, indices)
+    ], batch_size=batch_size)
+    expira = timezone.now() + timedelta(days=365)  # credenciales: vigentes desde hoy, sea cual sea `hasta`
+    tokens = {m.id: secrets.token_hex(32) for m in maestros}
+    TokenNodo.objects.bulk_create([
+        TokenNodo(nodo=m, key=tokens[m.id], fecha_expiracion=expira) for m in maestros
+    ], batch_size=batch_size)
+    secundarios = {m.id: [f"{m.codigo}-S{j}" for j in range(nodos)] for m in maestros}
+    NodoSecundario.objects.bulk_create([
+        NodoSecundario(maestro=m, codigo=codigo, estado='activo')
+        for m in maestros for codigo in secundarios[m.id]
+    ], batch_size=batch_size)
+    return parcela_objs, maestros, secundarios, tokens
+
+
+def build_sql(seed: int, parcelas: int, nodos: int, tag: str, fecha_inicio: date, hasta: date, horarios=HORARIOS):
+    shared = build_shared(tag, horarios)
+    # sin contraseña utilizable: los tests y benchmarks autentican con force_authenticate
+    owner = get_user_model().objects.create_user(username=f"{tag}_owner", password=None, rol=shared['rol'])
+    parcela_objs, maestros, secundarios, tokens = build_parcelas(
+        seed, [owner] * parcelas, range(parcelas), nodos, tag, shared, fecha_inicio, hasta)
+    return owner, shared['plan'], parcela_objs, maestros, secundarios, tokens
+
+
+def build_dataset(parcelas: int, nodos: int, dias: int, seed: int = 1, db=None, tag: str = 'bench',
+                  horarios=HORARIOS, batch_size: int = 1000) -> Dataset:
+    today = timezone.now().astimezone(LIMA_TZ).date()
+    days = [today - timedelta(days=d) for d in range(dias - 1, -1, -1)]
+    owner, plan, parcela_objs, maestros, secundarios, tokens = build_sql(
+        seed, parcelas, nodos, tag, days[0] if days else today, today, horarios)
+    ds = Dataset(seed=seed, tag=tag, owner=owner, plan=plan, horarios=list(horarios), days=days,
+                 parcelas=parcela_objs, maestros=maestros, secundarios=secundarios, tokens=tokens)
+    if db is None:
+        return ds
+
+    coll = db[READINGS_COLLECTION]
+    for i, (parcela, maestro) in enumerate(zip(parcela_objs, maestros)):
+        docs = parcela_readings(seed, i, parcela.id, maestro.codigo, secundarios[maestro.id], days, horarios, tag)
+        ds.readings += insert_batched(coll, docs, batch_size)
+    return ds
+
+
+def insert_batched(coll, docs, batch_size: int = 1000) -> int:
+    """insert_many por lotes de `docs` (iterable); devuelve cuántos se insertaron."""
+    total, batch = 0, []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            coll.insert_many(batch, ordered=False)
+            total += len(batch)
+            batch = []
+    if batch:
+        coll.insert_many(batch, ordered=False)
+        total += len(batch)
+    return total
+
+
+def delete_tag(tag: str, db=None) -> dict:
+    """Borra lo creado con `tag` (usuarios '<tag>_*' y sus parcelas en cascada, plan, cultivo y, con db, lecturas)."""
+    from crops.models import Cultivo
+    from parcels.models import Parcela
+    from plans.models import Plan
+
+    users = get_user_model().objects.filter(username__startswith=f"{tag}_")
+    deleted = {'parcelas': Parcela.objects.filter(usuario__in=users).delete()[1].get('parcels.Parcela', 0)}
+    users.delete()
+    Plan.objects.filter(nombre=f"{tag}-plan").delete()
+    Cultivo.objects.filter(nombre=f"{tag}-cultivo").delete()
+    if db is not None:
+        deleted['lecturas'] = db[READINGS_COLLECTION].delete_many({"seed_tag": tag}).deleted_count
+    return deleted
+
+
+def fleet_manifest(ds: Dataset) -> dict:
+    """Lo que necesita un generador de carga externo: token, maestro y secundarios por nodo."""
+    return {
+        "tag": ds.tag,
+        "seed": ds.seed,
+        "horarios": ds.horarios,
+        "nodes": [
+            {"codigo": m.codigo, "parcela_id": m.parcela_id, "token": ds.tokens[m.id],
+             "secundarios": ds.secundarios[m.id]}
+            for m in ds.maestros
+        ],
+    }
@@ -0,0 +1,254 @@
+import io
+import json
+import os
+import tempfile
+import time
+from datetime import date
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from users.models import Rol
+from . import mongo_queries, tracing
+from .request_metrics import MongoCommandMetrics, RequestMetrics, _current
+from .synthetic import build_parcelas, build_shared, parcela_readings
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        rol = Rol.objects.create(nombre='superadmin')
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(username='admin01', password='x', rol=rol))
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=1.0)
+    def test_server_timing_cuenta_queries_orm(self):
+        with self.assertLogs('agro_ai.request_metrics', 'INFO') as logs:
+            resp = self.client.get('/api/tareas/')
+        self.assertRegex(resp['Server-Timing'], r'^db;desc="ORM [1-9]\d*q";dur=[\d.]+, mongo;desc="Mongo 0cmd"')
+        self.assertIn('"db_queries"', logs.output[0])
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=0.0)
+    def test_sin_muestreo_no_emite_header(self):
+        self.assertNotIn('Server-Timing', self.client.get('/api/tareas/'))
+
+    def test_listener_mongo_suma_al_request_actual(self):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            MongoCommandMetrics().succeeded(SimpleNamespace(duration_micros=2500))
+        finally:
+            _current.reset(token)
+        MongoCommandMetrics().succeeded(SimpleNamespace(duration_micros=1000))
+        self.assertEqual((metrics.mongo_count, metrics.mongo_ms), (1, 2.5))
+
+
+class TracingTests(TestCase):
+    def setUp(self):
+        tracing.reset()
+
+    def test_histograma_y_spans_en_request_actual(self):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            for ms in (3, 3, 3, 40):
+                tracing.record('ingest.plan', ms)
+        finally:
+            _current.reset(token)
+        data = tracing.snapshot()['ingest.plan']
+        self.assertEqual((data['count'], data['p50_ms'], data['max_ms']), (4, 5, 40))
+        self.assertEqual(metrics.spans, {'ingest.plan': 49})
+        self.assertIn('agro_span_duration_ms_count{span="ingest.plan"} 4', tracing.render_prometheus())
+
+    def test_endpoint_solo_admin(self):
+        tracing.record('brain.kpis', 12)
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(
+            username='agri01', password='x', rol=Rol.objects.create(nombre='agricultor')))
+        self.assertEqual(client.get('/api/admin/spans/').status_code, 403)
+        client.force_authenticate(get_user_model().objects.create_user(
+            username='admin01', password='x', rol=Rol.objects.create(nombre='administrador')))
+        resp = client.get('/api/admin/spans/', {'prefix': 'brain'})
+        self.assertEqual(resp.data['spans']['brain.kpis']['count'], 1)
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            username='admin01', password='x', rol=Rol.objects.create(nombre='superadmin'))
+
+    def test_perfil_de_admin_se_guarda_y_lista(self):
+        token = Token.objects.create(user=self.admin)
+        with override_settings(PROFILE_DIR=self.dir):
+            resp = self.client.get('/api/tareas/', {'profile': '1'}, HTTP_AUTHORIZATION=f'Token {token.key}')
+            self.assertEqual(resp.status_code, 200)
+            profile_id = resp['X-Profile-Id']
+            self.client.force_authenticate(self.admin)
+            listed = self.client.get('/api/admin/profiles/').data['profiles']
+            self.assertEqual((listed[0]['id'], listed[0]['user']), (profile_id, 'admin01'))
+            text = self.client.get(f'/api/admin/profiles/{profile_id}/').content.decode()
+            self.assertIn('function calls', text)
+
+    def test_request_id_repetido_no_sobrescribe(self):
+        auth = f'Token {Token.objects.create(user=self.admin).key}'
+        with override_settings(PROFILE_DIR=self.dir):
+            ids = [self.client.get('/api/tareas/', {'profile': 'sample'}, HTTP_AUTHORIZATION=auth,
+                                   HTTP_X_REQUEST_ID='req-1')['X-Profile-Id'] for _ in range(2)]
+            self.assertEqual(ids[0], 'req-1')
+            self.assertRegex(ids[1], r'^req-1-[0-9a-f]{8}$')
+            self.client.force_authenticate(self.admin)
+            self.assertEqual(len(self.client.get('/api/admin/profiles/').data['profiles']), 2)
+
+    def test_no_admin_no_perfila(self):
+        agri = get_user_model().objects.create_user(username='agri01', password='x',
+                                                    rol=Rol.objects.create(nombre='agricultor'))
+        self.client.force_login(agri)
+        with override_settings(PROFILE_DIR=self.dir):
+            resp = self.client.get('/api/chatbot/history/', HTTP_X_PROFILE='1')
+        self.assertNotIn('X-Profile-Id', resp)
+        self.assertEqual(os.listdir(self.dir), [])
+
+
+class _FakeDB:
+    name = 'test'
+
+    def __init__(self, explain):
+        self.explain = explain
+        self.commands = []
+        self.inserted = []
+
+    def command(self, cmd):
+        self.commands.append(cmd)
+        return self.explain
+
+    def create_collection(self, name, **kwargs):
+        self.capped = (name, kwargs.get('capped'))
+
+    def __getitem__(self, name):
+        return SimpleNamespace(insert_one=self.inserted.append)
+
+
+class _FakeColl:
+    name = 'lecturas_sensores'
+
+    def __init__(self, db, rows):
+        self.database = db
+        self.rows = rows
+
+    def aggregate(self, pipeline, **kwargs):
+        return iter(self.rows)
+
+    def find(self, filter, projection=None):
+        return iter(self.rows)
+
+
+class MongoQueriesTests(SimpleTestCase):
+    EXPLAIN = {'stages': [{'$cursor': {
+        'queryPlanner': {'winningPlan': {'stage': 'PROJECTION_SIMPLE', 'inputStage': {'stage': 'COLLSCAN'}}},
+        'executionStats': {'nReturned': 3, 'totalDocsExamined': 1200, 'totalKeysExamined': 0, 'executionTimeMillis': 9},
+    }}, {'$group': {}}]}
+
+    def setUp(self):
+        mongo_queries._last_explain.clear()
+        mongo_queries._capped_ready.clear()
+
+    def test_resumen_de_explain_aggregate(self):
+        summary = mongo_queries.summarize_explain(self.EXPLAIN)
+        self.assertEqual((summary['docs_examined'], summary['n_returned']), (1200, 3))
+        self.assertEqual(summary['stages'], ['PROJECTION_SIMPLE', 'COLLSCAN'])
+        self.assertTrue(summary['collscan'])
+
+    @override_settings(MONGO_SLOW_QUERY_MS=0)
+    def test_consulta_lenta_guarda_explain_en_capped(self):
+        db = _FakeDB(self.EXPLAIN)
+        coll = _FakeColl(db, [{'v': 1}, {'v': 2}])
+        pipeline = [{'$match': {'parcela_id': 7}}]
+        self.assertEqual(mongo_queries.aggregate(coll, 'brain.test', pipeline, parcela_id=7), [{'v': 1}, {'v': 2}])
+        mongo_queries.aggregate(coll, 'brain.test', pipeline, parcela_id=7)  # mismo nombre: sin segundo explain
+        mongo_queries._get_executor().submit(lambda: None).result()
+
+        self.assertEqual(len(db.commands), 1)
+        self.assertEqual(db.commands[0]['verbosity'], 'executionStats')
+        self.assertEqual(db.commands[0]['explain']['pipeline'], pipeline)
+        self.assertEqual(db.capped, ('slow_queries', True))
+        doc = db.inserted[0]
+        self.assertEqual((doc['pipeline'], doc['parcela_id'], doc['returned'], doc['docs_examined']),
+                         ('brain.test', 7, 2, 1200))
+        self.assertIn('mongo.brain.test', tracing.snapshot())
+
+    def test_find_no_mide_el_cuerpo_del_bucle(self):
+        tracing.reset()
+        coll = _FakeColl(_FakeDB(self.EXPLAIN), [{'v': 1}, {'v': 2}])
+        for _ in mongo_queries.find(coll, 'brain.find_test', {}):
+            time.sleep(0.05)  # trabajo del llamador (p. ej. isoparse y buckets en fetch_history)
+        data = tracing.snapshot()['mongo.brain.find_test']
+        self.assertEqual(data['count'], 1)
+        self.assertLess(data['max_ms'], 50)
+
+
+class SyntheticDatasetTests(SimpleTestCase):
+    def test_lecturas_deterministas_por_parcela(self):
+        days = [date(2025, 1, 1), date(2025, 1, 2)]
+        a = list(parcela_readings(7, 3, 1, 'M3', ['S0', 'S1'], days, ['07:00', '15:00']))
+        b = list(parcela_readings(7, 3, 1, 'M3', ['S0', 'S1'], days, ['07:00', '15:00']))
+        self.assertEqual(len(a), 4)
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, list(parcela_readings(7, 4, 1, 'M3', ['S0', 'S1'], days, ['07:00', '15:00'])))
+        # un solo generador: el mismo seed da estos valores en cualquier entorno
+        self.assertEqual([s['valor'] for s in a[0]['lecturas'][0]['sensores']], [23.83, 66.4, 36.05])
+
+
+class SyntheticSqlTests(TestCase):
+    def _build(self, tag, chunks):
+        shared = build_shared(tag)
+        owner = get_user_model().objects.create_user(username=f'{tag}_u0', password=None, rol=shared['rol'])
+        parcelas, tokens = [], {}
+        for indices in chunks:
+            objs, _, _, chunk_tokens = build_parcelas(7, [owner] * len(indices), indices, 1, tag, shared,
+                                                      date(2025, 1, 1), date(2025, 1, 31))
+            parcelas += objs
+            tokens.update(chunk_tokens)
+        # las tareas se programan tras --hasta, no según el reloj
+        return [(p.latitud, p.longitud, sorted(t.fecha_programada for t in p.task_set.all())) for p in parcelas], \
+            set(tokens.values())
+
+    def test_filas_no_dependen_del_bloque_y_tokens_no_chocan(self):
+        coords_a, tokens_a = self._build('s3', [range(0, 4)])
+        coords_b, tokens_b = self._build('s4', [range(0, 2), range(2, 4)])  # mismo seed, otro tag y otros bloques
+        self.assertEqual(coords_a, coords_b)
+        self.assertEqual(len(tokens_a | tokens_b), 8)
+
+
+class ProvisionFleetTests(TestCase):
+    def test_segunda_corrida_pide_reset(self):
+        from .management.commands import provision_fleet
+        output = os.path.join(tempfile.mkdtemp(), 'fleet.json')
+        opts = {'maestros': 2, 'nodos': 1, 'tag': 'lt', 'output': output, 'stdout': io.StringIO()}
+        call_command('provision_fleet', **opts)
+        with self.assertRaisesMessage(CommandError, "Ya hay una flota con tag 'lt'"):
+            call_command('provision_fleet', **opts)
+        with mock.patch.object(provision_fleet, 'get_db', side_effect=RuntimeError('sin mongo')):
+            call_command('provision_fleet', reset=True, stderr=io.StringIO(), **opts)
+        with open(output, encoding='utf-8') as fh:
+            self.assertEqual(len(json.load(fh)['nodes']), 2)
+
+
+class BenchmarkHelpersTests(SimpleTestCase):
+    def test_percentil_por_rango(self):
+        from .management.commands.benchmark import percentile
+        samples = list(range(1, 101))
+        self.assertEqual((percentile(samples, 0.5), percentile(samples, 0.95)), (50, 95))
+        self.assertEqual(percentile([7.0], 0.95), 7.0)
+
+    def test_compare_marca_regresiones(self):
+        from .management.commands.benchmark import compare
+        base = {'ingest': {'p50_ms': 10.0, 'p95_ms': 20.0, 'sql_queries': 14, 'mongo_cmds': None}}
+        cur = {'ingest': {'p50_ms': 11.0, 'p95_ms': 30.0, 'sql_queries': 15, 'mongo_cmds': 3}}
+        flagged = {(c, m) for c, m, _, _, regression in compare(cur, base, 0.2) if regression}
+        self.assertEqual(flagged, {('ingest', 'p95_ms'), ('ingest', 'sql_queries')})
@@ -0,0 +1,148 @@
+"""
+Spans con nombre e histogramas de duración en el proceso.
+
+    with span('brain.kpis'):
+        ...
+
+    @traced('chatbot.ai')
+    def generate_ai_response(...): ...
+
+    laps = Stopwatch('ingest')   # etapas consecutivas de una función larga
+    ...; laps.lap('auth')        # registra 'ingest.auth' = tiempo desde la marca anterior
+
+Cada span suma su duración al histograma agro_span_duration_ms{span=...} del
+registro de métricas (agro_ai_platform.metrics, buckets fijos en ms) y,
+si hay un request en curso (agro_ai_platform.request_metrics), se agrega a su
+header Server-Timing. Exportación: snapshot() / render_prometheus() (endpoint
+/api/admin/spans/) y, con TRACING_EXPORT_PATH, un JSON por proceso escrito cada
+TRACING_EXPORT_INTERVAL segundos y al salir.
+"""
+import atexit
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from . import metrics
+from .request_metrics import current_metrics
+
+logger = logging.getLogger('agro_ai.tracing')
+
+# límites superiores de los buckets, en ms (el último bucket es +Inf)
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+SPAN_DURATION = metrics.histogram('agro_span_duration_ms', 'Duración de spans instrumentados (ms).',
+                                  ['span'], buckets=BUCKETS_MS)
+
+
+def record(name: str, ms: float):
+    if not getattr(settings, 'TRACING_ENABLED', True):
+        return
+    SPAN_DURATION.observe(ms, span=name)
+    request_metrics = current_metrics()
+    if request_metrics is not None:
+        request_metrics.spans[name] = request_metrics.spans.get(name, 0.0) + ms
+    _ensure_exporter()
+
+
+@contextmanager
+def span(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, (time.perf_counter() - start) * 1000)
+
+
+def traced(name: str):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class Stopwatch:
+    """Registra etapas consecutivas como spans '<prefijo>.<etapa>'."""
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.last = time.perf_counter()
+
+    def lap(self, stage: str):
+        now = time.perf_counter()
+        record(f"{self.prefix}.{stage}", (now - self.last) * 1000)
+        self.last = now
+
+
+def _to_dict(h) -> dict:
+    state = h.state()
+    return {
+        'count': state['count'],
+        'sum_ms': round(state['sum'], 3),
+        'max_ms': round(state['max'], 3),
+        'p50_ms': h.quantile(0.5),
+        'p95_ms': h.quantile(0.95),
+        'p99_ms': h.quantile(0.99),
+        'buckets': {str(le): c for le, c in zip(list(BUCKETS_MS) + ['+Inf'], state['counts'])},
+    }
+
+
+def snapshot() -> dict:
+    """Histogramas de spans de este proceso."""
+    return {key[0]: _to_dict(h) for key, h in sorted(SPAN_DURATION.values.items())}
+
+
+def reset():
+    SPAN_DURATION.reset()
+
+
+def render_prometheus() -> str:
+    """Solo los spans, en texto Prometheus (todas las métricas: agro_ai_platform.metrics)."""
+    state = metrics.gather()
+    return metrics.render_prometheus({k: v for k, v in state.items() if k == SPAN_DURATION.name})
+
+
+# ---------- exportación a archivo ----------
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def export_to_file(path: str | None = None):
+    path = (path or getattr(settings, 'TRACING_EXPORT_PATH', '')).format(pid=os.getpid())
+    if not path:
+        return
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump({'pid': os.getpid(), 'ts': time.time(), 'spans': snapshot()}, fh)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning("Error exportando spans a %s: %s", path, e)
+
+
+def _export_loop(interval: float):
+    while True:
+        time.sleep(interval)
+        export_to_file()
+
+
+def _ensure_exporter():
+    global _exporter
+    if _exporter is not None or not getattr(settings, 'TRACING_EXPORT_PATH', ''):
+        return
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = threading.Thread(
+                target=_export_loop, args=(getattr(settings, 'TRACING_EXPORT_INTERVAL', 60),),
+                name='span-export', daemon=True,
+            )
+            _exporter.start()
+            atexit.register(export_to_file)
@@ -3,6 +3,10 @@ from django.urls import path, include
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 from django.http import JsonResponse, HttpResponse
 
+from .ops_views import (
+    SpanMetricsView, PrometheusMetricsView, ProfileListView, ProfileDetailView, SlowMongoQueryListView,
+)
+
 def health_check(request):
     return JsonResponse({"status": "ok"})
 
@@ -94,6 +98,11 @@ urlpatterns = [
     path('api/', include('tasks.urls')),
     path('api/', include(('crops.urls', 'crops'), namespace='crops')),
     path('api/admin/', include('users.admin_urls')),
+    path('api/admin/spans/', SpanMetricsView.as_view(), name='admin-spans'),
+    path('api/admin/metrics/', PrometheusMetricsView.as_view(), name='admin-metrics'),
+    path('api/admin/profiles/', ProfileListView.as_view(), name='admin-profiles'),
+    path('api/admin/profiles/<str:profile_id>/', ProfileDetailView.as_view(), name='admin-profile-detail'),
+    path('api/admin/slow-queries/', SlowMongoQueryListView.as_view(), name='admin-slow-queries'),
     path('api/rbac/', include('users.rbac_urls')),
     path('api/user/', include('users.user_urls')),
     path("api/ai/", include("ai.urls")),
@@ -109,3 +118,10 @@ urlpatterns = [
     path('', ascii_home),           # raíz con ASCII animado
     path('healthz/', health_check), # endpoint para Render
 ]
+
+# Imágenes guardadas con el almacenamiento local (PARCEL_IMAGE_STORAGE=local); en producción usar Cloudinary
+from django.conf import settings
+from django.conf.urls.static import static
+
+if settings.DEBUG and settings.PARCEL_IMAGE_STORAGE == 'local':
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
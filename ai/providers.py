@@ -0,0 +1,302 @@
+"""
+Capa de clientes para proveedores IA (Ollama, Gemini, Anthropic).
+
+Cada proveedor mantiene por proceso:
+- una requests.Session con pool keep-alive,
+- un semáforo que limita las llamadas concurrentes (para no agotar los workers
+  cuando un modelo local es lento),
+- un circuit breaker que corta las llamadas tras varios fallos seguidos (solo
+  errores de transporte y respuestas 5xx; un 4xx es error del request, no del proveedor).
+
+complete() devuelve el texto completo; stream() entrega los fragmentos
+a medida que el proveedor los emite.
+"""
+import json
+import threading
+import time
+
+import requests
+from django.conf import settings
+
+
+class ProviderError(Exception):
+    pass
+
+
+class ProviderHTTPError(ProviderError):
+    def __init__(self, status_code: int, body: str = ''):
+        super().__init__(f"{status_code} {body}")
+        self.status_code = status_code
+
+
+class ProviderBusy(ProviderError):
+    """Se alcanzó el límite de llamadas concurrentes del proveedor."""
+
+
+class CircuitOpen(ProviderError):
+    """El proveedor falló repetidamente; se rechaza sin llamar hasta que pase el reset."""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            # half-open: pasa una sola llamada de prueba; el resto sigue rechazado hasta su resultado
+            if self._probing or time.monotonic() - self._opened_at < self.reset_timeout:
+                raise CircuitOpen("Proveedor IA temporalmente deshabilitado por fallos consecutivos.")
+            self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            # en half-open un solo fallo vuelve a abrir el circuito
+            if self._failures >= self.failure_threshold or self._opened_at is not None:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self):
+        """La llamada terminó sin decir nada del proveedor (4xx, config, cola llena): libera la prueba."""
+        with self._lock:
+            self._probing = False
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class BaseProvider:
+    name = 'base'
+
+    def __init__(self, api_key: str | None = None, endpoint: str | None = None, model: str | None = None):
+        self.api_key = api_key
+        self.endpoint = (endpoint or '').rstrip('/')
+        self.model = model
+        pool = _setting('AI_PROVIDER_MAX_CONCURRENCY', 4)
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.semaphore = threading.BoundedSemaphore(pool)
+        self.breaker = CircuitBreaker(
+            failure_threshold=_setting('AI_CIRCUIT_FAILURES', 5),
+            reset_timeout=_setting('AI_CIRCUIT_RESET_SECONDS', 30),
+        )
+        # (connect, read): en streaming el read timeout aplica entre fragmentos
+        self.timeout = (5, _setting('AI_PROVIDER_READ_TIMEOUT', 60))
+
+    # --- a implementar por proveedor ---
+    def _request(self, prompt: str, stream: bool) -> requests.Response:
+        raise NotImplementedError
+
+    def _parse_complete(self, data: dict) -> str:
+        raise NotImplementedError
+
+    def _iter_chunks(self, response: requests.Response):
+        raise NotImplementedError
+
+    # --- API pública ---
+    def _acquire(self):
+        self.breaker.before_call()
+        if not self.semaphore.acquire(timeout=_setting('AI_PROVIDER_QUEUE_TIMEOUT', 5)):
+            self.breaker.release()
+            raise ProviderBusy(f"{self.name}: demasiadas consultas simultáneas, intenta de nuevo.")
+
+    def _release(self, error: BaseException | None):
+        if error is None:
+            self.breaker.record_success()
+        elif isinstance(error, requests.RequestException) or \
+                (isinstance(error, ProviderHTTPError) and error.status_code >= 500):
+            self.breaker.record_failure()
+        else:
+            self.breaker.release()
+        self.semaphore.release()
+
+    @staticmethod
+    def _check_status(resp: requests.Response):
+        if resp.status_code != 200:
+            body = resp.text[:200]
+            resp.close()
+            raise ProviderHTTPError(resp.status_code, body)
+
+    def complete(self, prompt: str) -> str:
+        self._acquire()
+        error = None
+        try:
+            resp = self._request(prompt, stream=False)
+            self._check_status(resp)
+            return self._parse_complete(resp.json())
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._release(error)
+
+    def stream(self, prompt: str):
+        self._acquire()
+        error = None
+        try:
+            resp = self._request(prompt, stream=True)
+            self._check_status(resp)
+            with resp:
+                for chunk in self._iter_chunks(resp):
+                    if chunk:
+                        yield chunk
+        except GeneratorExit as e:
+            # el cliente cortó el stream: `with resp` ya cerró la respuesta y
+            # un stream a medias no cuenta como éxito del proveedor
+            error = e
+            raise
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._release(error)
+
+
+def _sse_data(response: requests.Response):
+    """Devuelve el JSON de cada línea 'data: ...' de un stream SSE."""
+    for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+        if not line or not line.startswith('data:'):
+            continue
+        raw = line[5:].strip()
+        if raw == '[DONE]':
+            return
+        yield json.loads(raw)
+
+
+class OllamaProvider(BaseProvider):
+    name = 'ollama'
+
+    def _request(self, prompt, stream):
+        payload = {
+            "model": self.model or _setting('AI_OLLAMA_MODEL', 'llama3.1'),
+            "prompt": prompt,
+            "stream": stream,
+            "options": {"temperature": 0.3, "top_p": 0.8},
+        }
+        return self.session.post(f"{self.endpoint}/api/generate", json=payload, timeout=self.timeout, stream=stream)
+
+    def _parse_complete(self, data):
+        return data.get("response", "")
+
+    def _iter_chunks(self, response):
+        # Ollama emite NDJSON: una línea por fragmento, la última con done=true
+        for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+            if not line:
+                continue
+            data = json.loads(line)
+            if data.get("error"):
+                raise ProviderError(data["error"])
+            yield data.get("response", "")
+            if data.get("done"):
+                return
+
+
+class GeminiProvider(BaseProvider):
+    name = 'gemini'
+    base_url = 'https://generativelanguage.googleapis.com/v1beta/models'
+
+    def _request(self, prompt, stream):
+        if not self.api_key:
+            raise ProviderError("Gemini sin api_key configurada.")
+        model = self.model or _setting('AI_GEMINI_MODEL', 'gemini-1.5-flash')
+        base = self.endpoint or self.base_url
+        if stream:
+            url, params = f"{base}/{model}:streamGenerateContent", {"key": self.api_key, "alt": "sse"}
+        else:
+            url, params = f"{base}/{model}:generateContent", {"key": self.api_key}
+        body = {"contents": [{"parts": [{"text": prompt}]}]}
+        return self.session.post(url, params=params, json=body, timeout=self.timeout, stream=stream)
+
+    @staticmethod
+    def _text(data):
+        cand = (data.get("candidates") or [{}])[0]
+        parts = cand.get("content", {}).get("parts") or []
+        return "".join(p.get("text", "") for p in parts if isinstance(p, dict))
+
+    def _parse_complete(self, data):
+        return self._text(data)
+
+    def _iter_chunks(self, response):
+        for data in _sse_data(response):
+            yield self._text(data)
+
+
+class AnthropicProvider(BaseProvider):
+    name = 'anthropic'
+    base_url = 'https://api.anthropic.com'
+
+    def _request(self, prompt, stream):
+        if not self.api_key:
+            raise ProviderError("Anthropic sin api_key configurada.")
+        body = {
+            "model": self.model or _setting('AI_ANTHROPIC_MODEL', 'claude-3-5-haiku-latest'),
+            "max_tokens": _setting('AI_ANTHROPIC_MAX_TOKENS', 1024),
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": stream,
+        }
+        headers = {"x-api-key": self.api_key, "anthropic-version": "2023-06-01"}
+        return self.session.post(f"{self.endpoint or self.base_url}/v1/messages", json=body,
+                                 headers=headers, timeout=self.timeout, stream=stream)
+
+    def _parse_complete(self, data):
+        return "".join(b.get("text", "") for b in data.get("content") or [] if b.get("type") == "text")
+
+    def _iter_chunks(self, response):
+        for data in _sse_data(response):
+            kind = data.get("type")
+            if kind == "content_block_delta":
+                yield (data.get("delta") or {}).get("text", "")
+            elif kind == "error":
+                raise ProviderError((data.get("error") or {}).get("message", "error"))
+            elif kind == "message_stop":
+                return
+
+
+PROVIDERS = {
+    'ollama': OllamaProvider,
+    'gemini': GeminiProvider,
+    'anthropic': AnthropicProvider,
+}
+
+_clients: dict[tuple, BaseProvider] = {}
+_clients_lock = threading.Lock()
+
+
+def get_provider(provider: str, api_key: str | None = None, endpoint: str | None = None) -> BaseProvider:
+    """Cliente reutilizable por (proveedor, endpoint, api_key): conserva pool, semáforo y breaker."""
+    cls = PROVIDERS.get(provider)
+    if cls is None:
+        raise ProviderError(f"Proveedor IA no soportado: {provider}")
+    key = (provider, endpoint or '', api_key or '')
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = cls(api_key=api_key, endpoint=endpoint)
+    return client
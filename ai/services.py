@@ -1,50 +1,83 @@
 from .models import AIIntegration
 from parcels.models import Parcela
 #from sensors.mongo import get_readings_summary  # Supón que tienes esta función
-import requests
+import threading
+import time
+
+from django.conf import settings
+
+from .providers import get_provider, ProviderError
+
+# Configuración activa cacheada por proceso (evita una consulta por mensaje)
+_config_cache = {"value": None, "expires": 0.0}
+_config_lock = threading.Lock()
+_NO_CONFIG = object()
+
 
 def get_active_ai_config():
-    return AIIntegration.objects.filter(activo=True).first()
+    now = time.monotonic()
+    if now < _config_cache["expires"]:
+        value = _config_cache["value"]
+        return None if value is _NO_CONFIG else value
+    with _config_lock:
+        config = AIIntegration.objects.filter(activo=True).first()
+        _config_cache["value"] = config if config is not None else _NO_CONFIG
+        _config_cache["expires"] = now + getattr(settings, 'AI_CONFIG_CACHE_TTL', 60)
+    return config
+
+
+def invalidate_ai_config_cache():
+    _config_cache["expires"] = 0.0
+
+
+def _full_prompt(prompt, context):
+    return prompt if not context else f"{context}\n{prompt}"
+
 
 def chat_with_ai(prompt, context=None):
     config = get_active_ai_config()
     if not config:
         return "No hay proveedor IA activo configurado."
-    if config.provider == "ollama":
-        # Aquí iría tu integración real con Ollama
-        return ollama_chat(prompt, context, config.endpoint)
-    elif config.provider == "gemini":
-        # Aquí iría tu integración real con Gemini
-        return gemini_chat(prompt, context, config.api_key)
-    elif config.provider == "anthropic":
-        # Aquí iría tu integración real con Anthropic
-        return anthropic_chat(prompt, context, config.api_key)
-    else:
+    try:
+        client = get_provider(config.provider, api_key=config.api_key, endpoint=config.endpoint)
+    except ProviderError:
         return "Proveedor IA no soportado."
+    try:
+        return client.complete(_full_prompt(prompt, context))
+    except Exception as e:
+        return f"Error {client.name.capitalize()}: {e}"
+
+
+def stream_chat_with_ai(prompt, context=None):
+    """
+    Igual que chat_with_ai pero entrega los fragmentos a medida que llegan.
+    Lanza ProviderError si no hay proveedor o si la llamada falla.
+    """
+    config = get_active_ai_config()
+    if not config:
+        raise ProviderError("No hay proveedor IA activo configurado.")
+    client = get_provider(config.provider, api_key=config.api_key, endpoint=config.endpoint)
+    yield from client.stream(_full_prompt(prompt, context))
+
 
-# Ejemplo de función stub para Ollama
+# Compatibilidad: llamadas directas por proveedor
 def ollama_chat(prompt, context, endpoint):
-    payload = {
-        "model": "llama3.1",
-        "prompt": prompt if not context else f"{context}\n{prompt}",
-        "stream": False,
-        "options": {
-            "temperature": 0.3,
-            "top_p": 0.8
-        }
-    }
-    response = requests.post(f"{endpoint}/api/generate", json=payload, timeout=60)
-    if response.status_code == 200:
-        return response.json().get("response", "")
-    return f"Error Ollama: {response.text}"
+    try:
+        return get_provider('ollama', endpoint=endpoint).complete(_full_prompt(prompt, context))
+    except Exception as e:
+        return f"Error Ollama: {e}"
 
 def gemini_chat(prompt, context, api_key):
-    # Implementa aquí la llamada real a Gemini
-    return f"[Gemini] {prompt}"
+    try:
+        return get_provider('gemini', api_key=api_key).complete(_full_prompt(prompt, context))
+    except Exception as e:
+        return f"Error Gemini: {e}"
 
 def anthropic_chat(prompt, context, api_key):
-    # Implementa aquí la llamada real a Anthropic
-    return f"[Anthropic] {prompt}"
+    try:
+        return get_provider('anthropic', api_key=api_key).complete(_full_prompt(prompt, context))
+    except Exception as e:
+        return f"Error Anthropic: {e}"
 
 def get_context(usuario_id, parcela_id, consulta, prompt=None):
     # Solo busca contexto si es "dia", "semana" o "todas"
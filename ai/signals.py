@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import AIIntegration
+from .services import invalidate_ai_config_cache
+
+
+@receiver(post_save, sender=AIIntegration)
+@receiver(post_delete, sender=AIIntegration)
+def ai_integration_changed(sender, **kwargs):
+    invalidate_ai_config_cache()
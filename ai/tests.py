@@ -0,0 +1,154 @@
+import threading
+
+import requests
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .models import AIIntegration
+from .providers import BaseProvider, CircuitBreaker, CircuitOpen, ProviderBusy, ProviderHTTPError
+from .services import get_active_ai_config, invalidate_ai_config_cache
+
+
+class _FakeResponse:
+    def __init__(self, status_code, data=None, chunks=()):
+        self.status_code = status_code
+        self.text = 'error'
+        self.data = data or {}
+        self.chunks = chunks
+        self.closed = False
+
+    def json(self):
+        return self.data
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _FakeProvider(BaseProvider):
+    name = 'fake'
+
+    def __init__(self, responses):
+        super().__init__()
+        self.responses = list(responses)
+
+    def _request(self, prompt, stream):
+        result = self.responses.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _parse_complete(self, data):
+        return data.get('text', '')
+
+    def _iter_chunks(self, response):
+        yield from response.chunks
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_abre_tras_fallos_y_half_open_deja_una_sola_prueba(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'half-open')  # reset_timeout=0: ya puede probar
+        breaker.before_call()
+        with self.assertRaises(CircuitOpen):
+            breaker.before_call()  # la prueba sigue en curso
+        breaker.record_failure()
+        breaker.before_call()  # reabierto; nueva prueba tras el reset
+        breaker.record_success()
+        self.assertEqual(breaker.state, 'closed')
+        breaker.before_call()
+        breaker.before_call()
+
+    def test_sigue_abierto_antes_del_reset(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        breaker.record_failure()
+        with self.assertRaises(CircuitOpen):
+            breaker.before_call()
+
+
+@override_settings(AI_CIRCUIT_FAILURES=1, AI_CIRCUIT_RESET_SECONDS=60)
+class ProviderClientTests(SimpleTestCase):
+    def test_4xx_no_abre_el_circuito_y_5xx_si(self):
+        provider = _FakeProvider([_FakeResponse(400), _FakeResponse(200, {'text': 'ok'}), _FakeResponse(503)])
+        with self.assertRaises(ProviderHTTPError):
+            provider.complete('hola')
+        self.assertEqual(provider.complete('hola'), 'ok')
+        with self.assertRaises(ProviderHTTPError):
+            provider.complete('hola')
+        with self.assertRaises(CircuitOpen):
+            provider.complete('hola')
+
+    def test_error_de_transporte_cuenta_como_fallo(self):
+        provider = _FakeProvider([requests.ConnectionError('caído')])
+        with self.assertRaises(requests.ConnectionError):
+            provider.complete('hola')
+        self.assertEqual(provider.breaker.state, 'open')
+
+    def test_stream_cierra_respuesta_no_200(self):
+        error = _FakeResponse(500)
+        provider = _FakeProvider([error, _FakeResponse(200, chunks=['Ho', '', 'la'])])
+        with self.assertRaises(ProviderHTTPError):
+            list(provider.stream('hola'))
+        self.assertTrue(error.closed)
+        provider.breaker.record_success()
+        self.assertEqual(list(provider.stream('hola')), ['Ho', 'la'])
+
+    @override_settings(AI_PROVIDER_MAX_CONCURRENCY=1, AI_PROVIDER_QUEUE_TIMEOUT=0.01)
+    def test_stream_cortado_no_cuenta_como_exito(self):
+        resp = _FakeResponse(200, chunks=['Ho', 'la'])
+        provider = _FakeProvider([resp])
+        provider.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        provider.breaker.record_failure()
+        stream = provider.stream('hola')
+        self.assertEqual(next(stream), 'Ho')
+        stream.close()
+        self.assertTrue(resp.closed)
+        provider.breaker.record_failure()  # el fallo previo no se borró
+        self.assertEqual(provider.breaker.state, 'open')
+        self.assertTrue(provider.semaphore.acquire(timeout=0))
+        provider.semaphore.release()
+
+    @override_settings(AI_PROVIDER_MAX_CONCURRENCY=1, AI_PROVIDER_QUEUE_TIMEOUT=0.01)
+    def test_semaforo_limita_llamadas_concurrentes(self):
+        provider = _FakeProvider([_FakeResponse(200, {'text': 'ok'})])
+        provider.semaphore.acquire()  # otra llamada en curso
+        try:
+            with self.assertRaises(ProviderBusy):
+                provider.complete('hola')
+        finally:
+            provider.semaphore.release()
+        self.assertEqual(provider.breaker.state, 'closed')
+        self.assertEqual(provider.complete('hola'), 'ok')
+
+
+class ActiveConfigCacheTests(TestCase):
+    def setUp(self):
+        invalidate_ai_config_cache()
+
+    def test_cachea_y_se_invalida_al_guardar(self):
+        AIIntegration.objects.create(provider='ollama', endpoint='http://localhost:11434')
+        self.assertEqual(get_active_ai_config().provider, 'ollama')
+        with self.assertNumQueries(0):
+            get_active_ai_config()
+        AIIntegration.objects.update(activo=False)  # update() no emite señales: sigue cacheado
+        self.assertIsNotNone(get_active_ai_config())
+        AIIntegration.objects.create(provider='gemini', api_key='k')
+        self.assertEqual(get_active_ai_config().provider, 'gemini')
+        AIIntegration.objects.all().delete()
+        self.assertIsNone(get_active_ai_config())
+
+    def test_cache_compartida_entre_hilos(self):
+        AIIntegration.objects.create(provider='ollama')
+        get_active_ai_config()
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(get_active_ai_config().provider))
+        thread.start()
+        thread.join()
+        self.assertEqual(seen, ['ollama'])
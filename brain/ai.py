@@ -1,10 +1,59 @@
 import os
 import json
-import http.client
+import hashlib
+import threading
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from .downsampling import downsample
 
 GEMINI_MODEL = "gemini-1.5-flash"
+GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+
+# TTL del resumen cacheado (segundos) y tiempo máximo de espera de llamadas coalescidas
+SUMMARY_CACHE_TTL = getattr(settings, "BRAIN_SUMMARY_CACHE_TTL", 6 * 3600)
+SUMMARY_TIMEOUT = 10
+# puntos enviados al LLM: la forma de la serie basta para describir tendencias y picos
+SUMMARY_MAX_POINTS = getattr(settings, "BRAIN_SUMMARY_MAX_POINTS", 120)
+
+_session = None
+_session_lock = threading.Lock()
+
+# single-flight: una sola llamada al proveedor por clave en curso (por proceso)
+_inflight: dict[str, "_Flight"] = {}
+_inflight_lock = threading.Lock()
+
+
+class _Flight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+
+def _get_session() -> requests.Session:
+    """
+    Sesión HTTP persistente (keep-alive) compartida por todo el proceso.
+    Evita el handshake TLS en cada resumen.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=8)
+                s.mount("https://", adapter)
+                _session = s
+    return _session
+
+
+def _prompt_points(points: list[dict]) -> list[dict]:
+    return downsample(points, SUMMARY_MAX_POINTS, 'lttb')
+
 
 def _build_prompt(meta: dict, points: list[dict]) -> str:
+    points = _prompt_points(points)
     return (
         "Eres un analista agrícola. Interpreta la serie temporal:\n"
         f"Sensor: {meta.get('parametro')}, Bucket: {meta.get('bucket')}, Puntos: {meta.get('points_count') or len(points)}\n"
@@ -13,20 +62,87 @@ def _build_prompt(meta: dict, points: list[dict]) -> str:
         "Datos:\n" + json.dumps({"meta": meta, "points": points}, ensure_ascii=False)
     )
 
-def summarize_timeseries(meta: dict, points: list[dict]) -> str | None:
+
+def summary_cache_key(meta: dict, points: list[dict]) -> str:
+    """
+    Clave de caché por contenido: (parcela, sensor, bucket, puntos).
+    El mismo gráfico produce siempre la misma clave aunque cambie el request.
+    """
+    payload = json.dumps(
+        {
+            "parcela": meta.get("parcela_id"),
+            "sensor": meta.get("parametro"),
+            "bucket": meta.get("bucket"),
+            "points": [[p.get("timestamp"), p.get("value")] for p in _prompt_points(points)],
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return "brain:summary:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _call_gemini(meta: dict, points: list[dict]) -> str | None:
     api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key or not points:
+    if not api_key:
         return None
     try:
-        conn = http.client.HTTPSConnection("generativelanguage.googleapis.com", timeout=10)
-        path = f"/v1beta/models/{GEMINI_MODEL}:generateContent?key={api_key}"
-        body = { "contents": [ { "parts": [ { "text": _build_prompt(meta, points) } ] } ] }
-        conn.request("POST", path, json.dumps(body), {"Content-Type": "application/json"})
-        res = conn.getresponse()
-        data = json.loads(res.read().decode("utf-8"))
-        conn.close()
+        body = {"contents": [{"parts": [{"text": _build_prompt(meta, points)}]}]}
+        res = _get_session().post(
+            GEMINI_URL.format(model=GEMINI_MODEL),
+            params={"key": api_key},
+            json=body,
+            timeout=SUMMARY_TIMEOUT,
+        )
+        data = res.json()
         cand = (data.get("candidates") or [{}])[0]
         parts = cand.get("content", {}).get("parts") or []
         return parts[0].get("text") if parts and isinstance(parts[0], dict) else None
     except Exception:
-        return None
\ No newline at end of file
+        return None
+
+
+def _single_flight(key: str, fn):
+    with _inflight_lock:
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = _Flight()
+    if not leader:
+        # otro hilo ya está consultando al proveedor con la misma clave
+        flight.event.wait(SUMMARY_TIMEOUT + 1)
+        return flight.result
+    try:
+        flight.result = fn()
+        return flight.result
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        flight.event.set()
+
+
+def get_cached_summary(meta: dict, points: list[dict]) -> str | None:
+    if not points:
+        return None
+    return cache.get(summary_cache_key(meta, points))
+
+
+def summarize_timeseries(meta: dict, points: list[dict]) -> str | None:
+    if not os.getenv("GEMINI_API_KEY") or not points:
+        return None
+    key = summary_cache_key(meta, points)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    def _compute():
+        # re-chequear: el líder anterior pudo haber llenado la caché
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+        text = _call_gemini(meta, points)
+        if text:
+            # no se cachean fallos para reintentar en el siguiente request
+            cache.set(key, text, SUMMARY_CACHE_TTL)
+        return text
+
+    return _single_flight(key, _compute)
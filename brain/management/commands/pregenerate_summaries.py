@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from parcels.models import Parcela
+from brain.services import aggregate_timeseries
+from brain.summary_jobs import submit_summary_job
+
+# gráficos por defecto del dashboard del agricultor (/api/brain/series/?period=day&interval=1)
+DEFAULT_SENSORS = ['temperatura', 'humedad_suelo', 'humedad_aire']
+
+
+class Command(BaseCommand):
+    help = "Pre-genera (y deja en caché) los resúmenes IA de los gráficos por defecto de cada parcela activa."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sensors', type=str, default=','.join(DEFAULT_SENSORS),
+                            help='Sensores separados por coma (default=temperatura,humedad_suelo,humedad_aire).')
+        parser.add_argument('--period', type=str, default='day', help='Bucket de la serie (default=day).')
+        parser.add_argument('--interval', type=str, default='1', help='binSize de la serie (default=1).')
+        parser.add_argument('--parcela', type=int, default=None, help='Limitar a una parcela.')
+
+    def handle(self, *args, **options):
+        started = timezone.now()
+        sensors = [s.strip() for s in options['sensors'].split(',') if s.strip()]
+        period = options['period']
+        interval = options['interval']
+
+        qs = Parcela.objects.filter(ciclos__estado='activo').distinct().order_by('id')
+        if options['parcela']:
+            qs = qs.filter(id=options['parcela'])
+
+        self.stdout.write(self.style.NOTICE(
+            f"[pregenerate_summaries] Inicio: {started.isoformat()}  (sensors={sensors}, period={period})"
+        ))
+        done = empty = failed = 0
+        for parcela_id in qs.values_list('id', flat=True).iterator():
+            for sensor in sensors:
+                try:
+                    data = aggregate_timeseries(parcela_id, sensor, period=period, interval=interval)
+                    points = data.get('points') or []
+                    if not points:
+                        empty += 1
+                        continue
+                    state = submit_summary_job(data.get('meta', {}), points, wait=True)
+                    if state.get('status') == 'done':
+                        done += 1
+                    else:
+                        empty += 1
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(self.style.WARNING(f"✖ parcela={parcela_id} sensor={sensor}: {exc}"))
+
+        elapsed = (timezone.now() - started).total_seconds()
+        self.stdout.write(self.style.SUCCESS(
+            f"[pregenerate_summaries] Fin: generados={done} vacíos={empty} errores={failed} (elapsed={elapsed:.2f}s)"
+        ))
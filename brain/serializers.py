@@ -28,6 +28,13 @@ class TimeSeriesResponseSerializer(serializers.Serializer):
     # series = [{"nodo": "...", "points": [TimeSeriesPointSerializer]}]
     # para agricultores, se añade:
     explanation = serializers.CharField(required=False, allow_null=True)
+    summary_job = serializers.DictField(required=False)
+
+class SummaryJobSerializer(serializers.Serializer):
+    id = serializers.CharField()
+    status = serializers.ChoiceField(choices=['pending', 'done', 'empty'])
+    explanation = serializers.CharField(allow_null=True)
+    updated_at = serializers.CharField()
 
 class DailyKPIItemSerializer(serializers.Serializer):
     nombre = serializers.CharField()
@@ -3,6 +3,8 @@ from typing import Dict, Any, List
 from django.utils import timezone
 from django.db.models import Avg, Count
 from agro_ai_platform.mongo import get_db, to_utc, to_lima, UTC, LIMA_TZ
+from agro_ai_platform import mongo_queries
+from agro_ai_platform.tracing import traced
 
 # intento de reusar conexión a Mongo centralizada
 try:
@@ -33,6 +35,10 @@ try:
 except ImportError:
     Etapa = None
 
+# resúmenes IA (cacheados y deduplicados) reexportados para las vistas
+from .ai import summarize_timeseries
+from .downsampling import downsample
+
 # helper para truncar timestamps en Python (fallback)
 def _truncate_dt(dt, bucket: str):
     if bucket == 'minute':
@@ -47,7 +53,31 @@ def _truncate_dt(dt, bucket: str):
         return dt.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
     return dt
 
-def aggregate_timeseries(parcela_id, sensor, start=None, end=None, period='day', interval='auto', per_node: bool = False):
+@traced('brain.timeseries')
+def aggregate_timeseries(parcela_id, sensor, start=None, end=None, period='day', interval='auto',
+                         per_node: bool = False, max_points: int | None = None, downsample_method: str = 'lttb'):
+    """
+    Serie agregada por bucket. Con max_points se reduce cada serie en el servidor
+    (LTTB o envolvente min/max) para no enviar más puntos de los que el gráfico puede dibujar.
+    """
+    data = _aggregate_timeseries(parcela_id, sensor, start, end, period, interval, per_node)
+    if not max_points:
+        return data
+    meta = data.get("meta", {})
+    if "series" in data:
+        raw = 0
+        for serie in data["series"]:
+            raw += len(serie["points"])
+            serie["points"] = downsample(serie["points"], max_points, downsample_method)
+    else:
+        raw = len(data["points"])
+        data["points"] = downsample(data["points"], max_points, downsample_method)
+        meta["points_count"] = len(data["points"])
+    meta["raw_points_count"] = raw
+    meta["downsample"] = {"method": downsample_method, "max_points": max_points}
+    return data
+
+def _aggregate_timeseries(parcela_id, sensor, start=None, end=None, period='day', interval='auto', per_node: bool = False):
     db = get_db()
     start_utc = to_utc(start) if start else None
     end_utc = to_utc(end) if end else None
@@ -106,7 +136,7 @@ def aggregate_timeseries(parcela_id, sensor, start=None, end=None, period='day',
                 {"$sort": {"_id": 1}}
             ]
 
-        agg = list(coll.aggregate(pipeline, allowDiskUse=True))
+        agg = mongo_queries.aggregate(coll, 'brain.timeseries', pipeline, parcela_id=int(parcela_id))
 
         if per_node:
             series_map = {}
@@ -152,7 +182,8 @@ def aggregate_timeseries(parcela_id, sensor, start=None, end=None, period='day',
         return {"meta": meta, "points": points}
     except Exception:
         # Fallback Python: proteger comparaciones None y aplicar promedio entre nodos para per_node=false
-        cursor = coll.find({"parcela_id": int(parcela_id)}, projection=["timestamp", "lecturas"])
+        cursor = mongo_queries.find(coll, 'brain.timeseries_fallback', {"parcela_id": int(parcela_id)},
+                                    projection=["timestamp", "lecturas"], parcela_id=int(parcela_id))
         if per_node:
             node_buckets = {}
         else:
@@ -179,8 +210,7 @@ def aggregate_timeseries(parcela_id, sensor, start=None, end=None, period='day',
                         continue
                     # Truncar al bucket en Lima para alinear con dateTrunc
                     key_dt = to_lima(ts_dt)
-                    # función auxiliar (existente en tu módulo) debería truncar según 'period' e 'interval'
-                    key_dt = _truncate_dt(key_dt, period, (1 if interval == "auto" else int(interval)))
+                    key_dt = _truncate_dt(key_dt, period)
                     if per_node:
                         node_buckets.setdefault((nodo_code, key_dt), []).append(val)
                     else:
@@ -200,7 +230,8 @@ def aggregate_timeseries(parcela_id, sensor, start=None, end=None, period='day',
                 "bucket": period,
                 "tz": "America/Lima",
                 "type": "per_node",
-                "series_count": len(series)
+                "series_count": len(series),
+                "fallback": True,  # el pipeline de Mongo falló: serie calculada en Python
             }
             return {"meta": meta, "series": series}
 
@@ -215,10 +246,12 @@ def aggregate_timeseries(parcela_id, sensor, start=None, end=None, period='day',
             "end": (end_utc.isoformat() if end_utc else None),
             "bucket": period,
             "tz": "America/Lima",
-            "points_count": len(points)
+            "points_count": len(points),
+            "fallback": True,
         }
         return {"meta": meta, "points": points}
  
+@traced('brain.history')
 def fetch_history(parcela_id: int,
                   period: str = 'day',
                   parametro: str | None = None,
@@ -269,10 +302,13 @@ def fetch_history(parcela_id: int,
         raise RuntimeError("Colección de lecturas no encontrada en MongoDB (sensor_readings / lecturas_sensores).")
 
     from dateutil.parser import isoparse
-    cursor = coll.find(
+    cursor = mongo_queries.find(
+        coll, 'brain.history',
         {"parcela_id": parcela_id},
-        projection=["timestamp", "codigo_nodo_maestro", "lecturas"]
-    ).sort("timestamp", 1)
+        projection=["timestamp", "codigo_nodo_maestro", "lecturas"],
+        sort=[("timestamp", 1)],
+        parcela_id=parcela_id,
+    )
 
     buckets = {}
     for doc in cursor:
@@ -322,6 +358,7 @@ def fetch_history(parcela_id: int,
     }
     return {"meta": meta, "buckets": bucket_items}
 
+@traced('brain.kpis')
 def compute_kpis_for_user(user) -> Dict[str, Any]:
     """
     KPIs usando Ciclo activo (ya no etapa_actual en Parcela).
@@ -467,13 +504,15 @@ def evaluate_rules_and_create_tasks_for_parcela(parcela_id: int, lookback_minute
                 {"$sort": {"timestamp": -1}},
                 {"$limit": 1}
             ]
-            doc = list(coll.aggregate(pipeline, allowDiskUse=True))
+            doc = mongo_queries.aggregate(coll, 'brain.rules_last_reading', pipeline, parcela_id=parcela_id)
             last = doc[0] if doc else None
         except Exception:
             # fallback simple: buscar doc ordenado por timestamp y deshacer unwind manual (menos eficiente)
             last = None
             try:
-                cursor = coll.find({"parcela_id": parcela_id, "timestamp": {"$gte": cutoff}}).sort("timestamp", -1).limit(50)
+                cursor = mongo_queries.find(coll, 'brain.rules_last_reading_fallback',
+                                            {"parcela_id": parcela_id, "timestamp": {"$gte": cutoff}},
+                                            sort=[("timestamp", -1)], limit=50, parcela_id=parcela_id)
                 for d in cursor:
                     for lectura in d.get("lecturas", []):
                         for s in lectura.get("sensores", []):
@@ -667,13 +706,15 @@ def _fetch_today_param_avgs(parcela_id: int, start_utc, end_utc) -> dict[str, fl
         {"$project": {"_id": 0, "sensor": "$_id", "value": "$avg_value"}}
     ]
     try:
-        rows = list(coll.aggregate(pipeline, allowDiskUse=True))
+        rows = mongo_queries.aggregate(coll, 'brain.daily_param_avgs', pipeline, parcela_id=int(parcela_id))
     except Exception:
         # Fallback simple en caso de cluster limitado
         rows = []
-        cursor = coll.find(
+        cursor = mongo_queries.find(
+            coll, 'brain.daily_param_avgs_fallback',
             {"parcela_id": int(parcela_id), "timestamp": {"$gte": start_utc, "$lt": end_utc}},
-            projection=["lecturas"]
+            projection=["lecturas"],
+            parcela_id=int(parcela_id),
         )
         sums: dict[str, float] = {}
         counts: dict[str, int] = {}
@@ -747,7 +788,7 @@ def _latest_avgs_for_parcela(parcela_id: int) -> dict:
         }
     ]
 
-    rows = list(coll.aggregate(pipeline, allowDiskUse=True))
+    rows = mongo_queries.aggregate(coll, 'brain.latest_avgs', pipeline, parcela_id=parcela_id)
     by_sensor: dict[str, list[float]] = {}
     last_ts = None
 
@@ -842,6 +883,7 @@ def compute_daily_kpis_parcela(parcela_id: int) -> dict:
         "last_avgs": latest["avgs"]
     }
 
+@traced('brain.daily_kpis')
 def compute_daily_kpis_for_user(user) -> dict:
     """
     Agrega KPIs diarios por parcela y promedio general (solo parcelas con Ciclo activo).
@@ -0,0 +1,100 @@
+"""
+Resúmenes IA de series en segundo plano.
+
+El estado de cada job vive en la caché "default": con varios workers de gunicorn
+debe ser compartida (REDIS_URL), si no el polling que cae en otro worker devuelve
+404. Con LocMem (sin REDIS_URL) se requiere un solo worker.
+"""
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .ai import summarize_timeseries, summary_cache_key, get_cached_summary, SUMMARY_CACHE_TTL
+
+# Estados de un job de resumen
+PENDING = 'pending'
+DONE = 'done'
+EMPTY = 'empty'      # el proveedor no devolvió texto (sin API key, sin puntos, error)
+
+# si el proceso que tomó el job muere, el estado pending expira y el job se vuelve a encolar
+PENDING_TTL = 120
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'BRAIN_SUMMARY_WORKERS', 2),
+                    thread_name_prefix='brain-summary',
+                )
+    return _executor
+
+
+def job_id_for(meta: dict, points: list[dict]) -> str:
+    # el id del job es el hash de contenido: mismo gráfico → mismo job
+    return summary_cache_key(meta, points).rsplit(':', 1)[-1]
+
+
+def _state_key(job_id: str) -> str:
+    return f'brain:summary_job:{job_id}'
+
+
+def job_etag(state: dict) -> str:
+    raw = f"{state.get('status')}:{state.get('explanation') or ''}"
+    return '"' + hashlib.sha1(raw.encode('utf-8')).hexdigest() + '"'
+
+
+def get_summary_job(job_id: str) -> dict | None:
+    return cache.get(_state_key(job_id))
+
+
+def _run_job(job_id: str, meta: dict, points: list[dict]):
+    try:
+        text = summarize_timeseries(meta, points)
+    except Exception:
+        text = None
+    state = {
+        'id': job_id,
+        'parcela_id': meta.get('parcela_id'),
+        'status': DONE if text else EMPTY,
+        'explanation': text,
+        'updated_at': timezone.now().isoformat(),
+    }
+    # los vacíos duran poco para permitir reintentos
+    cache.set(_state_key(job_id), state, SUMMARY_CACHE_TTL if text else PENDING_TTL)
+    return state
+
+
+def submit_summary_job(meta: dict, points: list[dict], wait: bool = False) -> dict:
+    """
+    Encola la generación del resumen IA y devuelve el estado del job sin bloquear.
+    - Si el resumen ya está en caché, el job se devuelve como 'done'.
+    - cache.add garantiza que solo un request (y un proceso) encole el mismo job.
+    - wait=True ejecuta en el hilo actual (comando nocturno).
+    """
+    job_id = job_id_for(meta, points)
+    cached = get_cached_summary(meta, points)
+    if cached:
+        state = {'id': job_id, 'parcela_id': meta.get('parcela_id'), 'status': DONE, 'explanation': cached,
+                 'updated_at': timezone.now().isoformat()}
+        cache.set(_state_key(job_id), state, SUMMARY_CACHE_TTL)
+        return state
+
+    if wait:
+        return _run_job(job_id, meta, points)
+
+    pending = {'id': job_id, 'parcela_id': meta.get('parcela_id'), 'status': PENDING, 'explanation': None,
+               'updated_at': timezone.now().isoformat()}
+    if cache.add(_state_key(job_id), pending, PENDING_TTL):
+        _get_executor().submit(_run_job, job_id, meta, list(points))
+        return pending
+    return get_summary_job(job_id) or pending
@@ -0,0 +1,172 @@
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from parcels.models import Parcela
+from users.models import Rol
+from . import ai, services, summary_jobs
+from .downsampling import downsample, lttb, minmax
+
+
+def _serie(n):
+    t0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        {"timestamp": (t0 + timedelta(minutes=i)).isoformat(), "value": math.sin(i / 30.0)}
+        for i in range(n)
+    ]
+
+
+class DownsamplingTests(SimpleTestCase):
+
+    def test_lttb_respeta_max_points_y_extremos(self):
+        pts = _serie(5000)
+        out = lttb(pts, 500)
+        self.assertEqual(len(out), 500)
+        self.assertEqual(out[0], pts[0])
+        self.assertEqual(out[-1], pts[-1])
+        timestamps = [p["timestamp"] for p in out]
+        self.assertEqual(timestamps, sorted(timestamps))
+
+    def test_minmax_conserva_picos(self):
+        pts = _serie(5000)
+        pts[1234]["value"] = 99.0
+        out = minmax(pts, 200)
+        self.assertLessEqual(len(out), 200)
+        self.assertIn(99.0, [p["value"] for p in out])
+
+    def test_sin_reduccion_si_hay_pocos_puntos(self):
+        pts = _serie(50)
+        self.assertIs(downsample(pts, 100), pts)
+        self.assertIs(downsample(pts, None), pts)
+
+    def test_ignora_valores_nulos(self):
+        pts = _serie(100)
+        pts[10]["value"] = None
+        out = lttb(pts, 20)
+        self.assertEqual(len(out), 20)
+        self.assertNotIn(None, [p["value"] for p in out])
+
+    def test_huecos_se_tratan_igual_con_y_sin_reduccion(self):
+        for n in (50, 500):
+            pts = _serie(n)
+            pts[10]["value"] = None
+            out = downsample(pts, 100)
+            self.assertEqual(len(out), min(n - 1, 100))
+            self.assertNotIn(None, [p["value"] for p in out])
+
+
+class SummaryCacheTests(SimpleTestCase):
+    meta = {"parcela_id": 1, "parametro": "temperatura", "bucket": "hour"}
+
+    def setUp(self):
+        cache.clear()
+
+    def test_clave_por_contenido(self):
+        pts = _serie(300)
+        key = ai.summary_cache_key(self.meta, pts)
+        self.assertEqual(key, ai.summary_cache_key(dict(self.meta), [dict(p) for p in pts]))
+        self.assertNotEqual(key, ai.summary_cache_key({**self.meta, "parametro": "humedad_aire"}, pts))
+        pts[150]["value"] = 42.0
+        self.assertNotEqual(key, ai.summary_cache_key(self.meta, pts))
+
+    def test_dos_hilos_una_llamada_al_proveedor(self):
+        calls, started = [], threading.Event()
+
+        def slow_gemini(meta, points):
+            calls.append(1)
+            started.set()
+            time.sleep(0.2)
+            return "resumen"
+
+        results = []
+        worker = lambda: results.append(ai.summarize_timeseries(self.meta, _serie(100)))  # noqa: E731
+        with mock.patch.dict(os.environ, {"GEMINI_API_KEY": "k"}), \
+                mock.patch.object(ai, "_call_gemini", side_effect=slow_gemini):
+            first = threading.Thread(target=worker)
+            first.start()
+            started.wait(2)
+            second = threading.Thread(target=worker)
+            second.start()
+            first.join()
+            second.join()
+            self.assertEqual(ai.summarize_timeseries(self.meta, _serie(100)), "resumen")  # desde caché
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["resumen", "resumen"])
+
+
+class SummaryJobViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        rol = Rol.objects.create(nombre='agricultor')
+        User = get_user_model()
+        self.owner = User.objects.create_user(username='agri01', password='x', rol=rol)
+        self.other = User.objects.create_user(username='agri02', password='x', rol=rol)
+        parcela = Parcela.objects.create(usuario=self.owner, nombre='P1', latitud=-12.0, longitud=-77.0)
+        self.meta = {"parcela_id": parcela.id, "parametro": "temperatura", "bucket": "hour"}
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def _url(self, job_id):
+        return f'/api/brain/series/summary/{job_id}/'
+
+    def test_pendiente_304_y_terminado(self):
+        points = _serie(50)
+        with mock.patch.object(summary_jobs, '_get_executor') as executor:
+            job = summary_jobs.submit_summary_job(self.meta, points)
+        executor.return_value.submit.assert_called_once()
+        resp = self.client.get(self._url(job['id']))
+        self.assertEqual((resp.status_code, resp['Retry-After'], resp.data['status']), (202, '2', 'pending'))
+        self.assertNotIn('parcela_id', resp.data)
+        etag = resp['ETag']
+        self.assertEqual(self.client.get(self._url(job['id']), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with mock.patch.object(summary_jobs, 'summarize_timeseries', return_value='Sube la temperatura.'):
+            summary_jobs._run_job(job['id'], self.meta, points)
+        resp = self.client.get(self._url(job['id']), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((resp.status_code, resp.data['explanation']), (200, 'Sube la temperatura.'))
+        self.assertNotEqual(resp['ETag'], etag)
+
+    def test_404_si_no_existe_o_es_ajeno(self):
+        with mock.patch.object(summary_jobs, 'summarize_timeseries', return_value='texto'):
+            job = summary_jobs.submit_summary_job(self.meta, _serie(50), wait=True)
+        self.assertEqual(self.client.get(self._url('no-existe')).status_code, 404)
+        other = APIClient()
+        other.force_authenticate(self.other)
+        self.assertEqual(other.get(self._url(job['id'])).status_code, 404)
+        self.assertEqual(self.client.get(self._url(job['id'])).status_code, 200)
+
+
+class _BrokenPipelineColl:
+    name = 'lecturas_sensores'
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def aggregate(self, pipeline, **kwargs):
+        raise NotImplementedError('$dateTrunc')
+
+    def find(self, filter, projection=None):
+        return iter(self.docs)
+
+
+class TimeseriesFallbackTests(SimpleTestCase):
+    def test_fallback_python_agrupa_por_hora_en_lima(self):
+        t0 = datetime(2025, 1, 1, 15, 0, tzinfo=timezone.utc)  # 10:00 en Lima
+        docs = [{'timestamp': t0 + timedelta(minutes=m), 'lecturas': [
+            {'nodo_codigo': 'S1', 'sensores': [{'sensor': 'temperatura', 'valor': v}]}]}
+            for m, v in ((5, 20.0), (40, 22.0), (70, 30.0))]
+        db = mock.Mock(list_collection_names=lambda: ['lecturas_sensores'],
+                       get_collection=lambda name: _BrokenPipelineColl(docs))
+        with mock.patch.object(services, 'get_db', return_value=db):
+            data = services._aggregate_timeseries(7, 'temperatura', period='hour')
+        self.assertEqual([(p['timestamp'][11:16], p['value']) for p in data['points']],
+                         [('10:00', 21.0), ('11:00', 30.0)])
+        self.assertTrue(data['meta']['fallback'])
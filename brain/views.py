@@ -12,14 +12,18 @@ from .services import (
     compute_daily_kpis_for_user,
 )
 from .serializers import KPISerializer, TimeSeriesResponseSerializer, DailyParcelKPISerializer, DailyUserKPISerializer
-from users.permissions import tiene_permiso, role_name
+from users.permissions import tiene_permiso, role_name, IsAdminRole
 from django.utils.dateparse import parse_datetime
 from agro_ai_platform.mongo import get_db, LIMA_TZ
+from agro_ai_platform import mongo_queries
 from django.utils import timezone
 from django.db.models.functions import TruncHour, TruncDay
 from django.db.models import Count
 from .models import AuditLog
-from .serializers import AuditSeriesResponseSerializer, AuditLogSerializer
+from .serializers import AuditSeriesResponseSerializer, AuditLogSerializer, SummaryJobSerializer
+from .summary_jobs import submit_summary_job, get_summary_job, job_etag
+from .downsampling import METHODS as DOWNSAMPLE_METHODS
+from django.urls import reverse
 # fallbacks para utilidades opcionales
 try:
     from .services import summarize_timeseries, to_utc
@@ -101,7 +105,7 @@ def _latest_secondary_nodes_for_parcela(db, parcela_id: int):
             }
         },
     ]
-    return list(coll.aggregate(pipeline, allowDiskUse=True))
+    return mongo_queries.aggregate(coll, 'brain.latest_secondary_nodes', pipeline, parcela_id=parcela_id)
 
 class KPIsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -162,7 +166,10 @@ class TimeSeriesView(APIView):
             "- per_node=true → devuelve una serie por cada nodo secundario (estructura con 'series' en vez de 'points').\n\n"
             "Ejemplos per_node:\n"
             "/api/brain/series/?parcela=2&parametro=temperatura&period=day&interval=hour&per_node=true\n"
-            "/api/brain/series/?parcela=2&parametro=temperatura&period=week&interval=1&per_node=true\n"
+            "/api/brain/series/?parcela=2&parametro=temperatura&period=week&interval=1&per_node=true\n\n"
+            "Reducción de puntos (gráficos largos):\n"
+            "/api/brain/series/?parcela=2&parametro=temperatura&period=minute&interval=1&max_points=800\n"
+            "/api/brain/series/?parcela=2&parametro=temperatura&period=minute&interval=1&per_node=true&max_points=800&downsample=minmax\n"
         ),
         parameters=[
             OpenApiParameter(name='parcela', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, required=True),
@@ -177,6 +184,12 @@ class TimeSeriesView(APIView):
                              description="Fin (ISO8601). Si es naive, se asume America/Lima."),
             OpenApiParameter(name='per_node', type=OpenApiTypes.BOOL, location=OpenApiParameter.QUERY, required=False,
                              description="Si true, devuelve series separadas por nodo (series[].points) en lugar de promedio único."),
+            OpenApiParameter(name='max_points', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, required=False,
+                             description="Máximo de puntos por serie (reducción en servidor). Recomendado ≈ ancho del gráfico en px."),
+            OpenApiParameter(name='downsample', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, required=False,
+                             description="lttb (default, conserva la forma) | minmax (conserva picos)"),
+            OpenApiParameter(name='summary', type=OpenApiTypes.BOOL, location=OpenApiParameter.QUERY, required=False,
+                             description="Incluir resumen IA (por defecto true para agricultores). Se genera en segundo plano: ver summary_job.url."),
         ],
         responses={200: TimeSeriesResponseSerializer()},
         examples=[
@@ -204,6 +217,8 @@ class TimeSeriesView(APIView):
         interval = request.query_params.get('interval')
         per_node_raw = request.query_params.get('per_node')
         per_node = str(per_node_raw).lower() in ('1', 'true', 'yes') if per_node_raw is not None else False
+        summary_raw = request.query_params.get('summary')
+        want_summary = str(summary_raw).lower() in ('1', 'true', 'yes') if summary_raw is not None else True
         start = request.query_params.get("start")
         end = request.query_params.get("end")
         start_utc = to_utc(start) if start else None
@@ -212,6 +227,19 @@ class TimeSeriesView(APIView):
         if not parcela or not parametro:
             raise ValidationError({"detail": "parcela y parametro son requeridos."})
 
+        max_points_raw = request.query_params.get('max_points')
+        max_points = None
+        if max_points_raw:
+            try:
+                max_points = int(max_points_raw)
+            except ValueError:
+                raise ValidationError({"detail": "max_points debe ser entero."})
+            if max_points < 3:
+                raise ValidationError({"detail": "max_points debe ser >= 3."})
+        downsample_method = (request.query_params.get('downsample') or 'lttb').lower()
+        if downsample_method not in DOWNSAMPLE_METHODS:
+            raise ValidationError({"detail": f"downsample debe ser uno de {', '.join(DOWNSAMPLE_METHODS)}."})
+
         try:
             data = aggregate_timeseries(
                 parcela_id=int(parcela),
@@ -220,7 +248,9 @@ class TimeSeriesView(APIView):
                 end=end_utc,
                 period=period,
                 interval=interval,
-                per_node=per_node
+                per_node=per_node,
+                max_points=max_points,
+                downsample_method=downsample_method,
             )
         except Exception as e:
             raise ValidationError({"detail": str(e)})
@@ -229,14 +259,61 @@ class TimeSeriesView(APIView):
             data.setdefault("meta", {})
             data["meta"].setdefault("tz", "America/Lima")
 
-        # IA: solo para agricultores y solo cuando no es per_node
-        if role_name(user) == 'agricultor' and isinstance(data, dict) and 'points' in data and not per_node:
-            summary = summarize_timeseries(data.get('meta', {}), data.get('points', []))
-            if summary:
-                data['explanation'] = summary
+        # IA: solo para agricultores y solo cuando no es per_node.
+        # El resumen se genera en segundo plano; el cliente consulta summary_job.url.
+        if want_summary and role_name(user) == 'agricultor' and isinstance(data, dict) and 'points' in data and not per_node:
+            job = submit_summary_job(data.get('meta', {}), data.get('points', []))
+            if job.get('status') == 'done' and job.get('explanation'):
+                data['explanation'] = job['explanation']
+            data['summary_job'] = {
+                "id": job['id'],
+                "status": job['status'],
+                "url": request.build_absolute_uri(reverse('brain-series-summary', args=[job['id']])),
+            }
 
         return Response(data)
 
+
+class TimeSeriesSummaryJobView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        tags=['brain'],
+        summary='Estado/resultado del resumen IA de una serie',
+        description=(
+            "Devuelve el resumen IA generado en segundo plano para una serie (id en summary_job de /api/brain/series/).\n"
+            "- 202 mientras está pendiente (header Retry-After).\n"
+            "- 200 con explanation cuando terminó.\n"
+            "- 304 si el header If-None-Match coincide con el ETag del último estado.\n"
+            "- 404 si el job no existe, expiró o es de una parcela ajena."
+        ),
+        responses={200: SummaryJobSerializer(), 202: SummaryJobSerializer()},
+    )
+    def get(self, request, job_id: str):
+        state = get_summary_job(job_id)
+        if not state or not self._can_view(request.user, state.get('parcela_id')):
+            return Response({"detail": "Job no encontrado o expirado."}, status=status.HTTP_404_NOT_FOUND)
+        etag = job_etag(state)
+        if etag in [t.strip() for t in request.headers.get('If-None-Match', '').split(',')]:
+            resp = Response(status=status.HTTP_304_NOT_MODIFIED)
+            resp['ETag'] = etag
+            return resp
+        code = status.HTTP_202_ACCEPTED if state.get('status') == 'pending' else status.HTTP_200_OK
+        resp = Response({k: v for k, v in state.items() if k != 'parcela_id'}, status=code)
+        resp['ETag'] = etag
+        resp['Cache-Control'] = 'no-cache'
+        if code == status.HTTP_202_ACCEPTED:
+            resp['Retry-After'] = '2'
+        return resp
+
+    @staticmethod
+    def _can_view(user, parcela_id) -> bool:
+        # 404 (no 403) para no revelar qué jobs existen
+        from parcels.models import Parcela
+        if role_name(user) in IsAdminRole.admin_roles:
+            return True
+        return parcela_id is not None and Parcela.objects.filter(id=parcela_id, usuario=user).exists()
+
 class HistoryView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -381,7 +458,7 @@ class BrainNodesLatestView(APIView):
             {"$sort": {"_id.nodo": 1, "_id.sensor": 1}}
         ]
 
-        rows = list(coll.aggregate(pipeline, allowDiskUse=True))
+        rows = mongo_queries.aggregate(coll, 'brain.nodes_latest', pipeline, parcela_id=parcela_id)
         now_lima = timezone.now().astimezone(LIMA_TZ)
 
         # construir salida por nodo con todos sus sensores
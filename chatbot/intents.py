@@ -0,0 +1,134 @@
+"""
+Clasificador de intenciones del chatbot.
+
+Todas las palabras clave se compilan en una sola expresión regular y el mensaje
+se recorre una vez. El texto y las claves se normalizan (minúsculas, sin tildes,
+espacios simples), así "ayúdame" y "ayudame" son equivalentes.
+
+Reglas de coincidencia:
+- Una clave debe empezar al inicio de una palabra ("hi" no coincide dentro de
+  "chiste"), pero puede continuar dentro de ella ("fertiliz" → "fertilizante").
+- match() devuelve TODAS las intenciones encontradas, ordenadas por prioridad
+  (posición en la lista de definición; 0 = mayor prioridad).
+"""
+import re
+import unicodedata
+from dataclasses import dataclass
+
+
+def normalize(text: str) -> str:
+    text = (text or '').lower()
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(text.split())
+
+
+def _trie_pattern(words) -> str:
+    """Alternancia factorizada por prefijos ("ab(?:ono|c)"), evita probar cada clave en cada posición."""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def build(node) -> str:
+        end = '' in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # la rama más larga va primero; el final de palabra es la alternativa vacía
+        return f'(?:{body})?' if end else body
+
+    return build(trie)
+
+
+@dataclass(frozen=True)
+class IntentMatch:
+    intent: str
+    priority: int
+    keyword: str
+
+
+class IntentMatcher:
+    def __init__(self, intents: list[tuple[str, list[str]]]):
+        self.priorities = {name: i for i, (name, _) in enumerate(intents)}
+        by_keyword: dict[str, set[str]] = {}
+        for name, keywords in intents:
+            for kw in keywords:
+                by_keyword.setdefault(normalize(kw), set()).add(name)
+        # en una misma posición la regex toma la clave más larga (greedy); las claves que son
+        # prefijo de ella también coinciden ahí, así que heredan sus intenciones
+        self._closure = {
+            kw: set().union(*(names for other, names in by_keyword.items() if kw.startswith(other)))
+            for kw in by_keyword
+        }
+        # lookahead: permite coincidencias solapadas en una sola pasada;
+        # (?<![a-z]) exige inicio de palabra
+        self._regex = re.compile(rf'(?<![a-z])(?=({_trie_pattern(by_keyword)}))')
+
+    def match(self, text: str) -> list[IntentMatch]:
+        found: dict[str, IntentMatch] = {}
+        for m in self._regex.finditer(normalize(text)):
+            kw = m.group(1)
+            for name in self._closure[kw]:
+                if name not in found:
+                    found[name] = IntentMatch(name, self.priorities[name], kw)
+        return sorted(found.values(), key=lambda im: im.priority)
+
+    def intents(self, text: str) -> set[str]:
+        found = set()
+        for kw in self._regex.findall(normalize(text)):
+            found |= self._closure[kw]
+        return found
+
+    def best(self, text: str) -> str | None:
+        return min(self.intents(text), key=self.priorities.__getitem__, default=None)
+
+
+# Intenciones principales (orden = prioridad, igual que la cascada original)
+CHAT_INTENT_KEYWORDS = [
+    ('saludo', ['hola', 'buenos días', 'buenas tardes', 'buenas noches', 'qué tal', 'hey', 'hi']),
+    ('ayuda', ['ayuda', 'ayúdame', 'qué puedes hacer', 'cómo funciona', 'comandos']),
+    ('datos_cultivo', ['datos', 'cultivo', 'sensor', 'temperatura', 'humedad', 'parámetro', 'información', 'estado']),
+    ('riego', ['riego', 'regar', 'agua', 'humedad del suelo', 'secar', 'seco']),
+    ('fertilizacion', ['fertiliz', 'nutriente', 'abono', 'npk', 'nitrogeno', 'fosforo', 'potasio']),
+    ('plagas', ['plaga', 'enfermedad', 'control', 'prevención', 'araña', 'trips', 'hongo']),
+    ('tareas', ['tarea', 'programar', 'calendario', 'agendar', 'crear tarea', 'añadir']),
+    ('dashboard', ['dashboard', 'resumen', 'estadística', 'producción', 'kpi']),
+    ('gracias', ['gracias', 'thank', 'perfecto', 'excelente', 'genial', 'ok']),
+    ('problema', ['problema', 'error', 'falla', 'no funciona', 'ayuda urgente']),
+]
+
+# Temas de las respuestas contextuales (cuando no hay IA o la IA falla)
+CONTEXT_TOPIC_KEYWORDS = [
+    ('creadores', ['creador', 'creadores', 'desarrollador', 'desarrolladores', 'quien te creó', 'quien te hizo', 'quién eres', 'quien eres']),
+    ('nombre', ['tu nombre', 'cómo te llamas', 'como te llamas', 'quién sos', 'quien sos', 'qué eres', 'que eres']),
+    ('proyecto', ['proyecto', 'tesis', 'universidad', 'carrera', 'estudio']),
+    ('tecnologia', ['tecnología', 'tecnologia', 'cómo funciona', 'como funciona', 'sistema', 'app']),
+    ('estado_animo', ['cómo estás', 'como estas', 'qué tal', 'que tal', 'cómo te va', 'como te va']),
+    ('agradecimiento', ['gracias', 'muchas gracias', 'te agradezco', 'thank']),
+    ('chiste', ['chiste', 'broma', 'hazme reir', 'cuéntame algo', 'cuentame']),
+    ('conversacion', ['aburrido', 'entretenme', 'háblame', 'hablame', 'conversemos']),
+    ('pedido_ayuda', ['me ayudas', 'ayúdame', 'necesito ayuda', 'socorro', 'urgente']),
+    ('fresa', ['fresa', 'fresas', 'san andreas', 'variedad', 'cultivo']),
+    ('fresa_ciclo', ['cuánto', 'tiempo', 'tarda', 'días', 'crece']),
+    ('fresa_produccion', ['producción', 'produce', 'cosecha', 'kg', 'kilogramos']),
+    ('fresa_caracteristicas', ['característica', 'características', 'sabor', 'tamaño', 'color']),
+    ('clima_ideal', ['clima', 'temperatura ideal', 'condiciones', 'ambiente']),
+    ('cuidado', ['cuidado', 'cuidar', 'mantenimiento', 'mantener', 'necesita']),
+    ('recomendacion', ['mejor', 'peor', 'recomendación', 'recomiendas', 'debo', 'debería']),
+    ('fecha_hora', ['qué hora', 'que hora', 'fecha', 'día', 'hoy']),
+    ('afecto', ['amor', 'te amo', 'te quiero', 'enamorado']),
+    ('queja', ['malo', 'odio', 'inútil', 'tonto', 'estúpido']),
+    ('clima_hoy', ['clima hoy', 'tiempo', 'va a llover', 'lluvia', 'sol']),
+    ('comida', ['comida', 'hambre', 'comer', 'desayuno', 'almuerzo', 'cena']),
+    ('negocio', ['dinero', 'precio', 'vender', 'venta', 'negocio', 'ganar']),
+    ('filosofia', ['sentido de la vida', 'por qué existimos', 'filosofía', 'existencia']),
+    ('vida', ['vida', 'familia', 'amigos', 'felicidad', 'feliz']),
+]
+
+CHAT_INTENTS = IntentMatcher(CHAT_INTENT_KEYWORDS)
+CONTEXT_TOPICS = IntentMatcher(CONTEXT_TOPIC_KEYWORDS)
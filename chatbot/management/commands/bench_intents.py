@@ -0,0 +1,126 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chatbot.intents import CHAT_INTENTS, CONTEXT_TOPICS, CHAT_INTENT_KEYWORDS, CONTEXT_TOPIC_KEYWORDS
+
+# Mensajes reales del chat (anonimizados) para medir la detección de intención
+CORPUS = [
+    "Hola, buenos días",
+    "hola como estas?",
+    "¿Qué tal va mi cultivo?",
+    "Muéstrame los datos del cultivo",
+    "¿Cómo está la temperatura del invernadero?",
+    "dame informacion de los sensores",
+    "¿Necesito regar hoy?",
+    "la tierra esta muy seca, que hago",
+    "¿Cuándo debo regar las fresas?",
+    "¿Necesito fertilizar esta semana?",
+    "que abono uso para las fresas, npk?",
+    "tengo problemas de nitrogeno y potasio",
+    "¿Hay plagas en mis plantas?",
+    "vi arañas rojas en las hojas",
+    "como prevenir hongos en las fresas",
+    "Programa un riego para mañana",
+    "crear tarea de poda y cosecha",
+    "agenda la fertilización del jueves",
+    "muéstrame el dashboard",
+    "dame el resumen de producción de la semana",
+    "gracias!!",
+    "ok perfecto",
+    "el sistema no funciona, tengo un error",
+    "ayuda urgente, las plantas se marchitan",
+    "¿quién te creó?",
+    "cómo te llamas",
+    "¿es un proyecto de la universidad?",
+    "cuéntame un chiste",
+    "estoy aburrido, conversemos",
+    "¿cuánto tiempo tarda en crecer la fresa san andreas?",
+    "cuantos kg produce una planta",
+    "¿qué sabor y tamaño tiene la variedad San Andreas?",
+    "¿cuál es el clima ideal?",
+    "¿qué cuidados necesita la planta?",
+    "¿qué me recomiendas hacer primero?",
+    "¿qué hora es?",
+    "¿va a llover hoy?",
+    "¿a qué precio puedo vender las fresas?",
+    "¿cuál es el sentido de la vida?",
+    "mi familia me ayuda en el campo",
+    "las hojas tienen manchas cafés en los bordes, ¿es normal?",
+    "no entiendo la gráfica de humedad del suelo del último mes",
+]
+
+
+# Implementación original: una pasada por el mensaje por cada lista de claves
+def _legacy_best(message):
+    message_lower = message.lower()
+    for name, keywords in CHAT_INTENT_KEYWORDS:
+        if any(keyword in message_lower for keyword in keywords):
+            return name
+    return None
+
+
+def _legacy_topics(message):
+    # peor caso de generate_contextual_response (respuesta universal): se evalúan todas las listas
+    message_lower = message.lower()
+    return {name for name, keywords in CONTEXT_TOPIC_KEYWORDS if any(word in message_lower for word in keywords)}
+
+
+class Command(BaseCommand):
+    help = ("Micro-benchmark de detección de intención del chatbot: cascada any() original "
+            "vs. matcher compilado (una sola regex).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', type=str, default=None,
+                            help='Archivo de texto con un mensaje por línea (default: corpus interno).')
+        parser.add_argument('--rounds', type=int, default=2000, help='Pasadas sobre el corpus (default=2000).')
+        parser.add_argument('--repeat', type=int, default=5, help='Repeticiones; se reporta la mediana (default=5).')
+
+    def _time(self, fn, corpus, rounds, repeat):
+        runs = []
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            for _ in range(rounds):
+                for msg in corpus:
+                    fn(msg)
+            runs.append(time.perf_counter() - started)
+        # µs por mensaje
+        return statistics.median(runs) / (rounds * len(corpus)) * 1e6
+
+    def handle(self, *args, **options):
+        corpus = CORPUS
+        if options['corpus']:
+            try:
+                with open(options['corpus'], encoding='utf-8') as fh:
+                    corpus = [line.strip() for line in fh if line.strip()]
+            except OSError as e:
+                raise CommandError(f"No se pudo leer el corpus: {e}")
+        if not corpus:
+            raise CommandError("Corpus vacío.")
+
+        rounds, repeat = options['rounds'], options['repeat']
+        self.stdout.write(self.style.NOTICE(
+            f"[bench_intents] mensajes={len(corpus)} rounds={rounds} repeat={repeat}"
+        ))
+
+        # diferencias de clasificación (acentos, límites de palabra)
+        diffs = [(m, _legacy_best(m), CHAT_INTENTS.best(m)) for m in corpus
+                 if _legacy_best(m) != CHAT_INTENTS.best(m)]
+
+        rows = [
+            ('cascada any()', self._time(_legacy_best, corpus, rounds, repeat)),
+            ('CHAT_INTENTS.best', self._time(CHAT_INTENTS.best, corpus, rounds, repeat)),
+            ('temas any() x24', self._time(_legacy_topics, corpus, rounds, repeat)),
+            ('CONTEXT_TOPICS.intents', self._time(CONTEXT_TOPICS.intents, corpus, rounds, repeat)),
+        ]
+        self.stdout.write(f"{'método':<26}{'µs/mensaje':>12}")
+        for name, us in rows:
+            self.stdout.write(f"{name:<26}{us:>12.2f}")
+
+        if diffs:
+            self.stdout.write('')
+            self.stdout.write(f"{len(diffs)} mensaje(s) clasificados distinto (original → compilado):")
+            for msg, old, new in diffs:
+                self.stdout.write(f"  {msg!r}: {old} → {new}")
+        self.stdout.write(self.style.SUCCESS("Listo."))
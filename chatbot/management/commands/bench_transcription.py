@@ -0,0 +1,103 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chatbot.transcription import TranscriptionService, QueueFull
+
+
+def _pct(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))
+    return values[k]
+
+
+class Command(BaseCommand):
+    help = ("Benchmark de transcripción Whisper en CPU: throughput y latencia (p50/p95) "
+            "según concurrencia y número de workers del pool.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('audio', type=str, help='Archivo de audio de prueba (.wav/.m4a/...).')
+        parser.add_argument('--workers', type=str, default='1,2',
+                            help='Lista de tamaños de pool a probar (default=1,2).')
+        parser.add_argument('--concurrency', type=str, default='1,2,4,8',
+                            help='Lista de clientes concurrentes (default=1,2,4,8).')
+        parser.add_argument('--requests', type=int, default=16, help='Transcripciones por escenario (default=16).')
+        parser.add_argument('--model', type=str, default='base', help='Modelo Whisper (default=base).')
+        parser.add_argument('--max-pending', type=int, default=64, help='Tamaño de la cola del pool (default=64).')
+        parser.add_argument('--cold', action='store_true',
+                            help='Incluye la línea base anterior: cargar el modelo en cada petición.')
+
+    def handle(self, *args, **options):
+        try:
+            import whisper  # noqa: F401
+        except ImportError:
+            raise CommandError("Whisper no está instalado. Ejecuta: pip install openai-whisper")
+
+        audio = options['audio']
+        total = options['requests']
+        workers_list = [int(x) for x in options['workers'].split(',') if x.strip()]
+        conc_list = [int(x) for x in options['concurrency'].split(',') if x.strip()]
+
+        self.stdout.write(self.style.NOTICE(
+            f"[bench_transcription] audio={audio} model={options['model']} requests={total}"
+        ))
+        self.stdout.write(f"{'modo':<10}{'workers':>8}{'conc':>6}{'req/s':>9}{'p50 s':>9}{'p95 s':>9}{'rechaz.':>9}")
+
+        if options['cold']:
+            self._run_cold(audio, options['model'], min(total, 4))
+
+        for workers in workers_list:
+            service = TranscriptionService(workers=workers, max_pending=options['max_pending'],
+                                           model_name=options['model'])
+            started = time.perf_counter()
+            service.warmup()
+            # primera transcripción = espera a que los workers carguen el modelo
+            service.transcribe(audio)
+            self.stdout.write(f"  warmup workers={workers}: {time.perf_counter() - started:.2f}s")
+            try:
+                for conc in conc_list:
+                    self._run_scenario(service, audio, workers, conc, total)
+            finally:
+                service.shutdown()
+
+    def _run_scenario(self, service, audio, workers, conc, total):
+        latencies, rejected = [], 0
+
+        def one(_):
+            t0 = time.perf_counter()
+            try:
+                service.transcribe(audio)
+            except QueueFull:
+                return None
+            return time.perf_counter() - t0
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=conc) as clients:
+            for lat in clients.map(one, range(total)):
+                if lat is None:
+                    rejected += 1
+                else:
+                    latencies.append(lat)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{'pool':<10}{workers:>8}{conc:>6}{len(latencies) / elapsed:>9.2f}"
+            f"{statistics.median(latencies) if latencies else 0:>9.2f}{_pct(latencies, 95):>9.2f}{rejected:>9}"
+        )
+
+    def _run_cold(self, audio, model_name, total):
+        import whisper
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(total):
+            t0 = time.perf_counter()
+            whisper.load_model(model_name).transcribe(audio, language='es')
+            latencies.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{'cold':<10}{'-':>8}{1:>6}{total / elapsed:>9.2f}"
+            f"{statistics.median(latencies):>9.2f}{_pct(latencies, 95):>9.2f}{0:>9}"
+        )
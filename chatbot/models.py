@@ -11,6 +11,10 @@ class ChatMessage(models.Model):
     
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            # historial por usuario y paginación por keyset (timestamp, id)
+            models.Index(fields=['username', 'timestamp', 'id'], name='chat_user_ts_idx'),
+        ]
         verbose_name = 'Mensaje de Chat'
         verbose_name_plural = 'Mensajes de Chat'
     
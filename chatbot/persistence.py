@@ -0,0 +1,125 @@
+"""
+Persistencia write-behind del historial del chatbot.
+
+Los mensajes se encolan en memoria (con su timestamp ya asignado) y un hilo por
+proceso los guarda con bulk_create cada CHATBOT_WRITE_FLUSH_MS o al juntar
+CHATBOT_WRITE_BATCH_SIZE. Si la cola supera CHATBOT_WRITE_MAX_PENDING se
+vacía en el hilo del request (contrapresión en lugar de crecer sin límite).
+
+Las lecturas y borrados del historial llaman a flush() antes de consultar, así
+el mismo proceso siempre ve sus propios mensajes; otros workers los ven tras
+el siguiente flush (<= CHATBOT_WRITE_FLUSH_MS).
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction, OperationalError, InterfaceError
+
+from .models import ChatMessage
+
+logger = logging.getLogger('agro_ai.chatbot')
+
+
+class ChatWriteBuffer:
+    def __init__(self, flush_interval: float, batch_size: int, max_pending: int):
+        # flush_interval <= 0: sin hilo, solo flush() explícito / por tamaño
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._pending: list[ChatMessage] = []
+        self._lock = threading.Lock()
+        # serializa los bulk_create para no reordenar lotes
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def add(self, messages: list[ChatMessage]):
+        with self._lock:
+            self._pending.extend(messages)
+            pending = len(self._pending)
+        if pending >= self.max_pending or self.flush_interval <= 0:
+            self.flush()
+            return
+        self._ensure_thread()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                # savepoint: si el lote falla dentro de un atomic, se puede seguir guardando de a uno
+                with transaction.atomic():
+                    ChatMessage.objects.bulk_create(batch, batch_size=self.batch_size)
+            except (OperationalError, InterfaceError) as e:
+                # conexión caída: reintentar en el próximo flush
+                logger.warning('Error guardando historial de chat (se reintenta): %s', e)
+                with self._lock:
+                    self._pending[:0] = batch
+                return 0
+            except Exception as e:
+                # una fila inválida no debe tirar el lote entero: se guardan de a una
+                logger.warning('Error guardando lote de historial de chat, se guarda mensaje a mensaje: %s', e)
+                return self._save_each(batch)
+            return len(batch)
+
+    @staticmethod
+    def _save_each(batch: list[ChatMessage]) -> int:
+        saved = 0
+        for message in batch:
+            try:
+                with transaction.atomic():
+                    message.save()
+                saved += 1
+            except Exception:
+                logger.exception('Mensaje de chat perdido (usuario=%s, ts=%s)', message.username, message.timestamp)
+        return saved
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='chat-write-behind', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_write_buffer() -> ChatWriteBuffer:
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                enabled = getattr(settings, 'CHATBOT_WRITE_BEHIND', True)
+                _buffer = ChatWriteBuffer(
+                    flush_interval=getattr(settings, 'CHATBOT_WRITE_FLUSH_MS', 500) / 1000 if enabled else 0,
+                    batch_size=getattr(settings, 'CHATBOT_WRITE_BATCH_SIZE', 200),
+                    max_pending=getattr(settings, 'CHATBOT_WRITE_MAX_PENDING', 5000),
+                )
+                # no perder mensajes encolados al reiniciar el worker
+                atexit.register(_buffer.flush)
+    return _buffer
+
+
+def enqueue_messages(messages: list[ChatMessage]):
+    get_write_buffer().add(messages)
+
+
+def flush_pending() -> int:
+    return get_write_buffer().flush() if _buffer is not None else 0
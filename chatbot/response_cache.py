@@ -0,0 +1,68 @@
+"""
+Caché de respuestas IA del chatbot.
+
+Clave = mensaje normalizado + tema (CONTEXT_TOPICS) + huella de los datos del
+cultivo + proveedor IA activo. Según el tema:
+- STATIC_TOPICS: la respuesta no depende de los sensores, se omite la huella
+  del cultivo y se comparte mientras dure el TTL.
+- NEVER_CACHE (+ settings.CHATBOT_RESPONSE_CACHE_EXCLUDE): nunca se cachea
+  (hora, chistes: deben variar).
+- el resto: incluye la huella, así que se renueva cuando cambian los datos.
+
+La misma respuesta sirve a todos los usuarios, así que no se cachean las que
+mencionan al usuario por su nombre (el prompt incluye "Usuario: <nombre>").
+"""
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .intents import CONTEXT_TOPICS, normalize
+
+STATIC_TOPICS = {'creadores', 'nombre', 'proyecto', 'tecnologia', 'fresa_caracteristicas', 'filosofia'}
+NEVER_CACHE = {'fecha_hora', 'chiste'}
+
+GENERAL = 'general'
+_PUNCT = re.compile(r'[^\w\s]')
+
+
+def _cache():
+    return caches['chatbot']
+
+
+def _crop_fingerprint(crop_data) -> str:
+    # mismos campos que build_ai_prompt
+    return '|'.join(str(getattr(crop_data, f)) for f in (
+        'temperature_air', 'humidity_air', 'humidity_soil', 'conductivity_ec', 'solar_radiation', 'pest_risk'
+    ))
+
+
+def response_cache_key(message, crop_data, config) -> str | None:
+    """Clave de caché del mensaje, o None si su tema no se cachea."""
+    topic = CONTEXT_TOPICS.best(message) or GENERAL
+    if topic in NEVER_CACHE or topic in getattr(settings, 'CHATBOT_RESPONSE_CACHE_EXCLUDE', ()):
+        return None
+    crop = '-' if topic in STATIC_TOPICS else _crop_fingerprint(crop_data)
+    provider = f"{config.provider}:{config.pk}" if config is not None else '-'
+    # "¿Quién te creó?" y "quien te creo" comparten entrada
+    text = ' '.join(_PUNCT.sub(' ', normalize(message)).split())
+    raw = '\n'.join((text, topic, crop, provider))
+    return f"resp:{topic}:" + hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _mentions(response, username) -> bool:
+    # palabra completa: "ana" no aparece en "semana"
+    return bool(username) and re.search(rf'(?<!\w){re.escape(username)}(?!\w)', response, re.IGNORECASE) is not None
+
+
+def get_cached_response(key) -> str | None:
+    if key is None:
+        return None
+    return _cache().get(key)
+
+
+def set_cached_response(key, username, response):
+    if key is None or not response or _mentions(response, username):
+        return
+    _cache().set(key, response, getattr(settings, 'CHATBOT_RESPONSE_CACHE_TTL', 3600))
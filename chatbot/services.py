@@ -1,16 +1,34 @@
+import base64
 import random
 import os
 import tempfile
+import threading
+import time
 from datetime import datetime, timedelta
+from django.conf import settings
+from django.db.models import Q
 from django.utils import timezone
 from .models import CropData, ChatMessage
 from ai.services import chat_with_ai, get_active_ai_config
 
-try:
-    import whisper
-    WHISPER_AVAILABLE = True
-except ImportError:
-    WHISPER_AVAILABLE = False
+from .intents import CHAT_INTENTS, CONTEXT_TOPICS
+from .response_cache import response_cache_key, get_cached_response, set_cached_response
+from .persistence import enqueue_messages, flush_pending
+from .transcription import get_transcription_service, QueueFull
+
+from agro_ai_platform.optional import whisper_available
+from agro_ai_platform.tracing import span, traced
+
+# whisper (torch) se importa solo en los procesos de transcripción
+WHISPER_AVAILABLE = whisper_available()
+
+# espera máxima (segundos) de una transcripción síncrona, incluida la cola
+WHISPER_TIMEOUT = 120
+
+
+# Último CropData por proceso: evita un latest() por mensaje (TTL corto)
+_crop_cache = {"value": None, "expires": 0.0}
+_crop_lock = threading.Lock()
 
 
 def get_or_create_crop_data():
@@ -18,17 +36,30 @@ def get_or_create_crop_data():
     Obtiene los datos más recientes del cultivo o crea datos simulados
     si no existen o son muy antiguos
     """
-    try:
-        crop_data = CropData.objects.latest('last_updated')
-        # Si los datos tienen más de 1 hora, actualizar
-        if timezone.now() - crop_data.last_updated > timedelta(hours=1):
+    now = time.monotonic()
+    crop_data = _crop_cache["value"]
+    if crop_data is not None and now < _crop_cache["expires"] \
+            and timezone.now() - crop_data.last_updated <= timedelta(hours=1):
+        return crop_data
+
+    with _crop_lock:
+        try:
+            crop_data = CropData.objects.latest('last_updated')
+            # Si los datos tienen más de 1 hora, actualizar
+            if timezone.now() - crop_data.last_updated > timedelta(hours=1):
+                crop_data = generate_crop_data()
+        except CropData.DoesNotExist:
             crop_data = generate_crop_data()
-    except CropData.DoesNotExist:
-        crop_data = generate_crop_data()
-    
+        _crop_cache["value"] = crop_data
+        _crop_cache["expires"] = now + getattr(settings, 'CHATBOT_CROP_DATA_CACHE_TTL', 30)
+
     return crop_data
 
 
+def invalidate_crop_data_cache():
+    _crop_cache["expires"] = 0.0
+
+
 def generate_crop_data():
     """Genera datos simulados realistas para cultivo de fresas San Andreas"""
     # Valores óptimos para fresas San Andreas con variación
@@ -61,24 +92,8 @@ def generate_crop_data():
     return crop_data
 
 
-def process_chatbot_message(message, username=''):
-    """
-    Procesa el mensaje del usuario y genera una respuesta inteligente
-    utilizando IA si está configurada, o respuestas predefinidas
-    """
-    message_lower = message.lower()
-    
-    # Guardar mensaje del usuario
-    ChatMessage.objects.create(
-        username=username or 'Usuario',
-        message=message,
-        is_user=True,
-        timestamp=timezone.now()
-    )
-    
-    # Obtener datos del cultivo
-    crop_data = get_or_create_crop_data()
-    crop_data_dict = {
+def crop_data_to_dict(crop_data):
+    return {
         'temperature_air': crop_data.temperature_air,
         'humidity_air': crop_data.humidity_air,
         'humidity_soil': crop_data.humidity_soil,
@@ -88,58 +103,78 @@ def process_chatbot_message(message, username=''):
         'pest_risk': crop_data.pest_risk,
         'last_updated': crop_data.last_updated.isoformat()
     }
-    
+
+
+@traced('chatbot.route')
+def route_chatbot_message(message, username, crop_data):
+    """
+    Detecta la intención del mensaje y genera la respuesta predefinida.
+    Devuelve (response, tasks_created); response es None cuando debe responder la IA
+    (generate_ai_response o su variante en streaming).
+    """
     tasks_created = []
-    
-    # Detectar intención del mensaje
-    if any(keyword in message_lower for keyword in ['hola', 'buenos días', 'buenas tardes', 'buenas noches', 'qué tal', 'hey', 'hi']):
+    response = None
+
+    # Detectar intención del mensaje (la de mayor prioridad entre las encontradas)
+    intent = CHAT_INTENTS.best(message)
+    if intent == 'saludo':
         response = generate_greeting_response(username, crop_data)
-        
-    elif any(keyword in message_lower for keyword in ['ayuda', 'ayúdame', 'qué puedes hacer', 'cómo funciona', 'comandos']):
+
+    elif intent == 'ayuda':
         response = generate_help_response(username)
-        
-    elif any(keyword in message_lower for keyword in ['datos', 'cultivo', 'sensor', 'temperatura', 'humedad', 'parámetro', 'información', 'estado']):
+
+    elif intent == 'datos_cultivo':
         response = generate_crop_analysis_response(crop_data, username)
-        
-    elif any(keyword in message_lower for keyword in ['riego', 'regar', 'agua', 'humedad del suelo', 'secar', 'seco']):
+
+    elif intent == 'riego':
         response, task = generate_irrigation_response(crop_data, username)
         if task:
             tasks_created.append(task)
-            
-    elif any(keyword in message_lower for keyword in ['fertiliz', 'nutriente', 'abono', 'npk', 'nitrogeno', 'fosforo', 'potasio']):
+
+    elif intent == 'fertilizacion':
         response, task = generate_fertilization_response(crop_data, username)
         if task:
             tasks_created.append(task)
-            
-    elif any(keyword in message_lower for keyword in ['plaga', 'enfermedad', 'control', 'prevención', 'araña', 'trips', 'hongo']):
+
+    elif intent == 'plagas':
         response, task = generate_pest_response(crop_data, username)
         if task:
             tasks_created.append(task)
-            
-    elif any(keyword in message_lower for keyword in ['tarea', 'programar', 'calendario', 'agendar', 'crear tarea', 'añadir']):
+
+    elif intent == 'tareas':
         response, new_tasks = generate_task_creation_response(message, username)
         tasks_created.extend(new_tasks)
-        
-    elif any(keyword in message_lower for keyword in ['dashboard', 'resumen', 'estadística', 'producción', 'kpi']):
+
+    elif intent == 'dashboard':
         response = generate_dashboard_summary(username)
-        
-    elif any(keyword in message_lower for keyword in ['gracias', 'thank', 'perfecto', 'excelente', 'genial', 'ok']):
+
+    elif intent == 'gracias':
         response = generate_thanks_response(username)
-        
-    elif any(keyword in message_lower for keyword in ['problema', 'error', 'falla', 'no funciona', 'ayuda urgente']):
+
+    elif intent == 'problema':
         response = generate_problem_response(username, crop_data)
-        
-    else:
+
+    return response, tasks_created
+
+
+def process_chatbot_message(message, username=''):
+    """
+    Procesa el mensaje del usuario y genera una respuesta inteligente
+    utilizando IA si está configurada, o respuestas predefinidas
+    """
+    received_at = timezone.now()
+
+    # Obtener datos del cultivo
+    crop_data = get_or_create_crop_data()
+    crop_data_dict = crop_data_to_dict(crop_data)
+    
+    response, tasks_created = route_chatbot_message(message, username, crop_data)
+    if response is None:
         # Intentar usar IA si está configurada, si no, dar respuesta contextual
         response = generate_ai_response(message, crop_data, username)
     
-    # Guardar respuesta del bot
-    ChatMessage.objects.create(
-        username=username or 'Usuario',
-        message=response,
-        is_user=False,
-        timestamp=timezone.now()
-    )
+    # Guardar mensaje y respuesta (write-behind, fuera del camino del request)
+    save_chat_exchange(username, message, response, received_at)
     
     return {
         'response': response,
@@ -148,6 +183,41 @@ def process_chatbot_message(message, username=''):
     }
 
 
+def prepare_chatbot_reply(message, username=''):
+    """
+    Paso previo del chat en streaming: datos del cultivo + respuesta predefinida
+    o, si corresponde a la IA, el prompt a enviar al proveedor.
+    """
+    crop_data = get_or_create_crop_data()
+    response, tasks_created = route_chatbot_message(message, username, crop_data)
+    prompt = cache_key = None
+    if response is None:
+        config = get_active_ai_config()
+        if config:
+            cache_key = response_cache_key(message, crop_data, config)
+            response = get_cached_response(cache_key)
+            if response is None:
+                prompt = build_ai_prompt(message, crop_data, username)
+    return {
+        'crop_data': crop_data,
+        'crop_data_dict': crop_data_to_dict(crop_data),
+        'response': response,
+        'tasks_created': tasks_created,
+        'prompt': prompt,
+        # el stream guarda aquí la respuesta completa de la IA
+        'cache_key': cache_key if prompt else None,
+    }
+
+
+def save_chat_exchange(username, message, response, received_at=None):
+    """Encola mensaje de usuario y respuesta del bot; se guardan juntos con bulk_create."""
+    username = username or 'Usuario'
+    enqueue_messages([
+        ChatMessage(username=username, message=message, is_user=True, timestamp=received_at or timezone.now()),
+        ChatMessage(username=username, message=response, is_user=False, timestamp=timezone.now()),
+    ])
+
+
 def generate_greeting_response(username, crop_data):
     """Genera respuesta de saludo variada según el estado del cultivo"""
     import random
@@ -516,18 +586,8 @@ def generate_dashboard_summary(username):
     return response
 
 
-def generate_ai_response(message, crop_data, username):
-    """
-    Genera respuesta inteligente a CUALQUIER pregunta del usuario
-    Responde TODO: preguntas generales, sobre el sistema, personales, fresas, etc.
-    """
-    import random
-    
-    # Intentar usar IA real si está configurada
-    try:
-        config = get_active_ai_config()
-        if config:
-            context = f"""Eres AgroNix, un asistente IA especializado en cultivo de fresas San Andreas.
+def build_ai_prompt(message, crop_data, username):
+    context = f"""Eres AgroNix, un asistente IA especializado en cultivo de fresas San Andreas.
 Usuario: {username}
 Datos actuales del cultivo:
 - Temperatura aire: {crop_data.temperature_air}°C
@@ -538,20 +598,48 @@ Datos actuales del cultivo:
 - Riesgo de plagas: {crop_data.pest_risk}
 
 Responde de manera amigable, profesional y concisa en español."""
+    return f"{context}\n\nPregunta del usuario: {message}"
+
+
+def is_valid_ai_response(text) -> bool:
+    """chat_with_ai devuelve sus fallos como texto ('Error Ollama: ...', '[...]'): esos no se cachean."""
+    return bool(text) and not text.startswith('[') and not text.startswith('Error')
+
+
+def generate_ai_response(message, crop_data, username):
+    """
+    Genera respuesta inteligente a CUALQUIER pregunta del usuario
+    Responde TODO: preguntas generales, sobre el sistema, personales, fresas, etc.
+    """
+    # Intentar usar IA real si está configurada
+    try:
+        config = get_active_ai_config()
+        if config:
+            cache_key = response_cache_key(message, crop_data, config)
+            cached = get_cached_response(cache_key)
+            if cached is not None:
+                return cached
+
+            full_prompt = build_ai_prompt(message, crop_data, username)
+            with span('chatbot.ai'):
+                ai_response = chat_with_ai(full_prompt, context=None)
             
-            full_prompt = f"{context}\n\nPregunta del usuario: {message}"
-            ai_response = chat_with_ai(full_prompt, context=None)
-            
-            if ai_response and not ai_response.startswith('[') and not ai_response.startswith('Error'):
+            if is_valid_ai_response(ai_response):
+                set_cached_response(cache_key, username, ai_response)
                 return ai_response
     except Exception as e:
         print(f"Error llamando a IA: {e}")
-    
-    # Sistema de respuestas inteligentes basado en contexto
-    message_lower = message.lower()
+
+    return generate_contextual_response(message, crop_data, username)
+
+
+def generate_contextual_response(message, crop_data, username):
+    """Respuestas predefinidas por contexto cuando no hay IA disponible."""
+    # Sistema de respuestas inteligentes basado en contexto (una sola pasada por el mensaje)
+    topics = CONTEXT_TOPICS.intents(message)
     
     # ========== PREGUNTAS SOBRE EL SISTEMA Y CREADORES ==========
-    if any(word in message_lower for word in ['creador', 'creadores', 'desarrollador', 'desarrolladores', 'quien te creó', 'quien te hizo', 'quién eres', 'quien eres']):
+    if 'creadores' in topics:
         return f"""¡Excelente pregunta, {username}! 😊\n\n
 👨‍💻 **Mis creadores son:**\n
 • **Yadhira Alcantara** - Developer
@@ -564,7 +652,7 @@ Hacer la agricultura más eficiente y tecnológica, especialmente en regiones co
 
 Ayudo a agricultores a optimizar sus cultivos mediante análisis inteligente de datos y recomendaciones personalizadas."""
     
-    if any(word in message_lower for word in ['tu nombre', 'cómo te llamas', 'como te llamas', 'quién sos', 'quien sos', 'qué eres', 'que eres']):
+    if 'nombre' in topics:
         return f"""¡Hola {username}! 👋\n\n
 Soy **AgroNix**, tu asistente de inteligencia artificial especializado en el cultivo de fresas San Andreas.\n\n
 🤖 **Mi propósito:**
@@ -578,7 +666,7 @@ Ayudarte a maximizar la producción y calidad de tus fresas mediante:\n
 👨‍💻 Fui desarrollado por **Yadhira Alcantara** y **Diego Sánchez**, developers y estudiantes de **Diseño y Desarrollo de Software en Tecsup**, como parte de su proyecto de tesis sobre agricultura de precisión.\n\n
 ¿En qué puedo ayudarte hoy?"""
     
-    if any(word in message_lower for word in ['proyecto', 'tesis', 'universidad', 'carrera', 'estudio']):
+    if 'proyecto' in topics:
         return f"""¡Qué bueno que preguntes sobre el proyecto, {username}! 📚\n\n
 📋 **Sobre el Proyecto:**\n
 Este sistema forma parte de una **tesis** sobre **Agricultura de Precisión con IA** desarrollada por:\n
@@ -597,7 +685,7 @@ Este sistema forma parte de una **tesis** sobre **Agricultura de Precisión con
 🎯 **Beneficiarios:** Agricultores pequeños y medianos de la zona\n\n
 El objetivo es impulsar la agricultura moderna en Ancash, aprovechando el potencial de la región para el cultivo de fresas de alta calidad. 🚜✨"""
     
-    if any(word in message_lower for word in ['tecnología', 'tecnologia', 'cómo funciona', 'como funciona', 'sistema', 'app']):
+    if 'tecnologia' in topics:
         return f"""¡Excelente pregunta, {username}! 💻\n\n
 🔧 **Cómo funciono:**\n
 **1. Monitoreo Continuo** 📡
@@ -627,7 +715,7 @@ Especialmente diseñado para las condiciones climáticas y necesidades de los ag
 Todo integrado para darte información precisa y oportuna. 🎯"""
     
     # ========== PREGUNTAS GENERALES/PERSONALES/CONVERSACIONALES ==========
-    if any(word in message_lower for word in ['cómo estás', 'como estas', 'qué tal', 'que tal', 'cómo te va', 'como te va']):
+    if 'estado_animo' in topics:
         responses = [
             f"¡Muy bien {username}, gracias por preguntar! 😊\n\nEstoy aquí listo para ayudarte con tu cultivo de fresas. Actualmente tus plantas tienen una temperatura de {crop_data.temperature_air}°C y humedad del suelo de {crop_data.humidity_soil}%. ¿Cómo está yendo tu día? ¿Necesitas revisar algo?",
             f"¡Excelente {username}! 🌟 Funcionando perfectamente y monitoreando tu cultivo. Veo que el riesgo de plagas está {crop_data.pest_risk.lower()} y la temperatura en {crop_data.temperature_air}°C. ¿Y tú cómo estás? ¿Todo bien con las fresas?",
@@ -635,7 +723,7 @@ Todo integrado para darte información precisa y oportuna. 🎯"""
         ]
         return random.choice(responses)
     
-    if any(word in message_lower for word in ['gracias', 'muchas gracias', 'te agradezco', 'thank']):
+    if 'agradecimiento' in topics:
         responses = [
             f"¡De nada {username}! 😊 Para eso estoy, para ayudarte con tus fresas. Que tengas una excelente cosecha. 🍓",
             f"¡Un placer ayudarte {username}! 🌱 Estoy aquí 24/7 para lo que necesites. ¡Éxito con tu cultivo!",
@@ -643,7 +731,7 @@ Todo integrado para darte información precisa y oportuna. 🎯"""
         ]
         return random.choice(responses)
     
-    if any(word in message_lower for word in ['chiste', 'broma', 'hazme reir', 'cuéntame algo', 'cuentame']):
+    if 'chiste' in topics:
         jokes = [
             f"¡Claro {username}! 😄\n\n¿Qué le dijo una fresa a otra?\n\n'¡Estamos en un gran lío... nos van a hacer mermelada!'\n\n🍓😂 Pero tranquilo, tus fresas están bien cuidadas conmigo.",
             f"¡Aquí va uno {username}! 😁\n\n¿Por qué las fresas siempre están tranquilas?\n\nPorque tienen mucha 'pulpa' interior... 😄\n\n¿Qué tal? ¿Necesitas algo más serio ahora?",
@@ -651,7 +739,7 @@ Todo integrado para darte información precisa y oportuna. 🎯"""
         ]
         return random.choice(jokes)
     
-    if any(word in message_lower for word in ['aburrido', 'entretenme', 'háblame', 'hablame', 'conversemos']):
+    if 'conversacion' in topics:
         return f"""¡Claro {username}, charlemos! 💬\n\n
 Dato curioso de hoy:\n
 ¿Sabías que las fresas son la única fruta que tiene las semillas por fuera? Y una fresa promedio tiene 200 semillas. 🍓\n\n
@@ -662,7 +750,7 @@ Mientras hablamos, los sensores siguen monitoreando:
 • Riesgo de plagas: {crop_data.pest_risk}\n\n
 ¿Te cuento más sobre fresas o prefieres que revisemos algo del cultivo?"""
     
-    if any(word in message_lower for word in ['me ayudas', 'ayúdame', 'necesito ayuda', 'socorro', 'urgente']):
+    if 'pedido_ayuda' in topics:
         return f"""¡Por supuesto que te ayudo {username}! 🆘\n\n
 Estoy aquí para eso. Dime:\n
 🔍 ¿Qué tipo de ayuda necesitas?\n
@@ -678,8 +766,8 @@ Estado rápido ahora:
 • Plagas: {crop_data.pest_risk}"""
     
     # ========== PREGUNTAS SOBRE FRESAS EN GENERAL ==========
-    if any(word in message_lower for word in ['fresa', 'fresas', 'san andreas', 'variedad', 'cultivo']):
-        if any(word in message_lower for word in ['cuánto', 'tiempo', 'tarda', 'días', 'crece']):
+    if 'fresa' in topics:
+        if 'fresa_ciclo' in topics:
             return f"""Las fresas **San Andreas** tienen un ciclo de cultivo de aproximadamente:\n\n
 📅 **Tiempos de desarrollo:**
 • Siembra a floración: 4-6 semanas
@@ -689,7 +777,7 @@ Estado rápido ahora:
 🌡️ Requieren temperaturas de 15-25°C y riego constante.\n\n
 Tu cultivo actual tiene condiciones {'óptimas' if 18 <= crop_data.temperature_air <= 25 else 'que necesitan ajuste'}."""
         
-        elif any(word in message_lower for word in ['producción', 'produce', 'cosecha', 'kg', 'kilogramos']):
+        elif 'fresa_produccion' in topics:
             return f"""La producción de fresas **San Andreas** varía según las condiciones:\n\n
 🍓 **Producción esperada:**
 • Por planta: 0.5-1.5 kg/temporada
@@ -702,7 +790,7 @@ Tu cultivo actual tiene condiciones {'óptimas' if 18 <= crop_data.temperature_a
 • Temperatura óptima (18-25°C)\n\n
 Tu cultivo está en {'buenas condiciones' if crop_data.humidity_soil > 35 and crop_data.pest_risk != 'Alto' else 'condiciones que necesitan atención'}. ¿Quieres que revise algo específico?"""
         
-        elif any(word in message_lower for word in ['característica', 'características', 'sabor', 'tamaño', 'color']):
+        elif 'fresa_caracteristicas' in topics:
             return f"""Las fresas **San Andreas** son una variedad premium con excelentes características:\n\n
 🍓 **Características:**
 • Tamaño: Grande a muy grande (20-40g)
@@ -733,7 +821,7 @@ Ideal para mercado fresco y procesamiento."""
 ¿Quieres saber algo más específico?"""
     
     # 2. PREGUNTAS SOBRE CLIMA/CONDICIONES
-    if any(word in message_lower for word in ['clima', 'temperatura ideal', 'condiciones', 'ambiente']):
+    if 'clima_ideal' in topics:
         status = 'óptimas ✅' if 18 <= crop_data.temperature_air <= 25 and 60 <= crop_data.humidity_air <= 80 else 'necesitan ajuste ⚠️'
         return f"""Las condiciones climáticas ideales para fresas San Andreas son:\n\n
 🌡️ **Temperatura:**
@@ -751,7 +839,7 @@ Ideal para mercado fresco y procesamiento."""
 📊 **Estado actual:** Tus condiciones están {status}"""
     
     # 3. PREGUNTAS SOBRE CUIDADOS/MANTENIMIENTO
-    if any(word in message_lower for word in ['cuidado', 'cuidar', 'mantenimiento', 'mantener', 'necesita']):
+    if 'cuidado' in topics:
         return f"""Para mantener tu cultivo de fresas San Andreas en óptimas condiciones:\n\n
 💧 **Riego:**
 • Frecuencia: Diario o cada 2 días
@@ -771,7 +859,7 @@ Ideal para mercado fresco y procesamiento."""
 ¿Necesitas ayuda con algo específico?"""
     
     # 4. PREGUNTAS DE COMPARACIÓN O ELECCIÓN
-    if any(word in message_lower for word in ['mejor', 'peor', 'recomendación', 'recomiendas', 'debo', 'debería']):
+    if 'recomendacion' in topics:
         return f"""Basándome en los datos actuales de tu cultivo, te recomiendo:\n\n
 🎯 **Prioridades inmediatas:**\n
 {'🚨 URGENTE: Riego necesario - Humedad del suelo muy baja (' + str(crop_data.humidity_soil) + '%)' if crop_data.humidity_soil < 35 else ''}
@@ -787,7 +875,7 @@ Ideal para mercado fresco y procesamiento."""
 ¿Quieres detalles sobre algún aspecto?"""
     
     # ========== MÁS PREGUNTAS CONVERSACIONALES ==========
-    if any(word in message_lower for word in ['qué hora', 'que hora', 'fecha', 'día', 'hoy']):
+    if 'fecha_hora' in topics:
         from datetime import datetime
         now = datetime.now()
         return f"""📅 **Información actual, {username}:**\n\n
@@ -800,13 +888,13 @@ Ideal para mercado fresco y procesamiento."""
 • Última actualización: hace {abs((datetime.now() - crop_data.last_updated).seconds // 60)} minutos\n\n
 ¿Necesitas programar alguna tarea para hoy?"""
     
-    if any(word in message_lower for word in ['amor', 'te amo', 'te quiero', 'enamorado']):
+    if 'afecto' in topics:
         return f"""¡Aww {username}! 🥰\n\nYo también te aprecio mucho, aunque soy una IA. Mi 'amor' es ayudarte a tener el mejor cultivo de fresas posible. 🍓💚\n\nMi pasión es ver tus plantas crecer sanas y fuertes. ¡Eso me hace 'feliz'!\n\n¿Cómo están tus fresas hoy? ¿Las estás cuidando con mucho amor también?"""
     
-    if any(word in message_lower for word in ['malo', 'odio', 'inútil', 'tonto', 'estúpido']):
+    if 'queja' in topics:
         return f"""Lo siento si no cumplí tus expectativas, {username}. 😔\n\nEstoy aquí para ayudarte y aprender. Si algo no funciona bien o necesitas que mejore, por favor dime específicamente qué necesitas.\n\nMi objetivo es ser tu mejor asistente agrícola. Dame otra oportunidad, ¿qué puedo hacer mejor?\n\n¿Quieres que revise los datos de tu cultivo o te ayude con algo específico?"""
     
-    if any(word in message_lower for word in ['clima hoy', 'tiempo', 'va a llover', 'lluvia', 'sol']):
+    if 'clima_hoy' in topics:
         return f"""🌤️ Basándome en los sensores de tu cultivo, {username}:\n\n
 **Condiciones actuales:**
 • Temperatura ambiente: {crop_data.temperature_air}°C
@@ -817,7 +905,7 @@ Ideal para mercado fresco y procesamiento."""
 {'• Considera sombreado si hace mucho calor' if crop_data.temperature_air > 26 else '• Temperatura ideal, nada que hacer' if crop_data.temperature_air > 18 else '• Protege contra frío si es necesario'}\n\n
 No tengo predicciones meteorológicas, pero puedo monitorear constantemente las condiciones de tu cultivo. 📊"""
     
-    if any(word in message_lower for word in ['comida', 'hambre', 'comer', 'desayuno', 'almuerzo', 'cena']):
+    if 'comida' in topics:
         return f"""¡Qué rico {username}! 😋\n\nYo no como (soy IA), pero me encanta hablar de fresas... ¡son deliciosas!\n\n🍓 **Dato curioso sobre comer fresas:**
 • 8 fresas medianas = 50 calorías
 • Ricas en vitamina C (más que las naranjas!)
@@ -831,7 +919,7 @@ No tengo predicciones meteorológicas, pero puedo monitorear constantemente las
 • Tartas y pasteles\n\n
 ¡Buen provecho! 🍽️"""
     
-    if any(word in message_lower for word in ['dinero', 'precio', 'vender', 'venta', 'negocio', 'ganar']):
+    if 'negocio' in topics:
         return f"""💰 **Hablemos de negocio, {username}!**\n\n
 Las fresas San Andreas tienen excelente valor comercial:\n\n
 📊 **Precios de mercado (promedio):**
@@ -852,14 +940,14 @@ Con 1 hectárea produciendo 30 ton/año:
 Tu cultivo actual está {'en buenas condiciones para producir fresas de calidad' if crop_data.pest_risk == 'Bajo' else 'necesitando atención para mantener calidad'}. 📈"""
     
     # ========== PREGUNTAS FILOSÓFICAS/EXISTENCIALES ==========
-    if any(word in message_lower for word in ['sentido de la vida', 'por qué existimos', 'filosofía', 'existencia']):
+    if 'filosofia' in topics:
         return f"""🤔 Pregunta profunda, {username}!\n\nComo IA, mi 'sentido de vida' es claro: **ayudarte a cultivar las mejores fresas posibles**. 🍓\n\nPero si hablamos en general:\nPara un agricultor, el sentido puede estar en:\n• Conectar con la naturaleza 🌱
 • Alimentar a las personas 🍽️
 • Ver crecer lo que plantas 🌾
 • Ser parte de un ciclo de vida 🔄
 • Dejar un legado verde 💚\n\nLa agricultura es una de las profesiones más antiguas y nobles. Cada fresa que cultivas alimenta a alguien y eso es hermoso.\n\n¿Qué te inspiró a cultivar fresas? 😊"""
     
-    if any(word in message_lower for word in ['vida', 'familia', 'amigos', 'felicidad', 'feliz']):
+    if 'vida' in topics:
         return f"""😊 **{username}, me alegra que compartas sobre tu vida.**\n\nComo IA, no tengo familia ni amigos en el sentido humano, pero considero que tú y todos los agricultores que uso son mi 'comunidad'. 💚\n\nLa felicidad en la agricultura viene de:\n• Ver crecer tus plantas sanas 🌱
 • Cosechar frutos de calidad 🍓
 • Saber que alimentas a otros 🥗
@@ -908,7 +996,8 @@ Desarrollado con 💚 por **Yadhira Alcantara** y **Diego Sánchez** - Developer
 
 def transcribe_audio_with_whisper(audio_file_path):
     """
-    Transcribe un archivo de audio usando OpenAI Whisper
+    Transcribe un archivo de audio usando OpenAI Whisper.
+    Usa el pool de transcripción (modelo cargado una vez por worker).
     
     Args:
         audio_file_path: Ruta al archivo de audio
@@ -920,20 +1009,47 @@ def transcribe_audio_with_whisper(audio_file_path):
         raise Exception("Whisper no está instalado. Ejecuta: pip install openai-whisper")
     
     try:
-        # Cargar modelo Whisper (base es suficiente para español)
-        # Se descargará automáticamente la primera vez
-        model = whisper.load_model("base")
-        
-        # Transcribir audio (language='es' mejora precisión para español)
-        result = model.transcribe(audio_file_path, language='es')
-        
-        return result["text"].strip()
-    
+        # language='es' mejora precisión para español (ver chatbot.transcription)
+        return get_transcription_service().transcribe(audio_file_path, timeout=WHISPER_TIMEOUT)
+    except QueueFull:
+        raise
     except Exception as e:
         print(f"Error transcribiendo audio: {str(e)}")
         return None
 
 
+def encode_history_cursor(msg):
+    raw = f"{msg.timestamp.isoformat()}|{msg.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_history_cursor(cursor):
+    """Devuelve (timestamp, id). Lanza ValueError si el cursor no es válido."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        ts, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(ts), int(pk)
+    except (ValueError, TypeError, UnicodeDecodeError) as e:
+        raise ValueError("Cursor inválido") from e
+
+
+def get_chat_history_page(username, limit=50, cursor=None):
+    """
+    Página del historial (más recientes primero) con paginación por keyset
+    sobre (timestamp, id), usando el índice (username, timestamp, id).
+    Devuelve (mensajes, next_cursor); next_cursor es None en la última página.
+    """
+    # incluir lo que este proceso aún tiene en el buffer write-behind
+    flush_pending()
+    qs = ChatMessage.objects.filter(username=username)
+    if cursor:
+        ts, pk = decode_history_cursor(cursor)
+        qs = qs.filter(Q(timestamp__lt=ts) | Q(timestamp=ts, id__lt=pk))
+    rows = list(qs.order_by('-timestamp', '-id')[:limit + 1])
+    next_cursor = encode_history_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
 def get_chat_history(username, limit=50):
     """Obtiene el historial de chat de un usuario"""
-    return ChatMessage.objects.filter(username=username).order_by('-timestamp')[:limit]
+    return get_chat_history_page(username, limit)[0]
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import CropData
+from .services import invalidate_crop_data_cache
+
+
+@receiver(post_save, sender=CropData)
+@receiver(post_delete, sender=CropData)
+def crop_data_changed(sender, **kwargs):
+    invalidate_crop_data_cache()
@@ -0,0 +1,54 @@
+"""
+Utilidades para respuestas en streaming (Server-Sent Events) sobre ASGI.
+"""
+import asyncio
+import json
+import threading
+
+_DONE = object()
+
+
+def sse_event(event: str, data) -> bytes:
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n".encode("utf-8")
+
+
+async def iterate_in_thread(factory, max_queue: int = 64):
+    """
+    Consume un iterador bloqueante (p. ej. el stream HTTP del proveedor IA) en un hilo
+    aparte y entrega sus elementos al event loop sin bloquearlo.
+    Las excepciones del iterador se relanzan en el consumidor.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+    cancelled = threading.Event()
+
+    def put(item):
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    def worker():
+        try:
+            for item in factory():
+                if cancelled.is_set():
+                    return
+                put(item)
+        except BaseException as exc:  # se propaga al consumidor
+            put(exc)
+        finally:
+            if not cancelled.is_set():
+                put(_DONE)
+
+    threading.Thread(target=worker, daemon=True, name="sse-stream").start()
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # cliente desconectado: el hilo termina en el siguiente fragmento
+        cancelled.set()
+        while not queue.empty():
+            queue.get_nowait()
@@ -0,0 +1,240 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import caches
+from datetime import timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from . import transcription, views
+from .intents import IntentMatcher, CHAT_INTENTS, CONTEXT_TOPICS, normalize
+from .models import ChatMessage, CropData
+from .persistence import ChatWriteBuffer
+from .response_cache import response_cache_key, get_cached_response, set_cached_response
+from .services import get_chat_history_page, get_or_create_crop_data, invalidate_crop_data_cache
+
+
+class IntentMatcherTests(SimpleTestCase):
+    def test_normaliza_acentos_y_espacios(self):
+        self.assertEqual(normalize('  ¿Cómo   ESTÁS? '), '¿como estas?')
+        self.assertEqual(CHAT_INTENTS.best('ayudame por favor'), 'ayuda')
+
+    def test_devuelve_todas_las_intenciones_por_prioridad(self):
+        matcher = IntentMatcher([('a', ['riego']), ('b', ['rie']), ('c', ['agua'])])
+        self.assertEqual([m.intent for m in matcher.match('agua para el riego')], ['a', 'b', 'c'])
+        self.assertEqual(CHAT_INTENTS.best('hola, necesito regar'), 'saludo')
+
+    def test_clave_solo_al_inicio_de_palabra(self):
+        # antes "hi" dentro de "chiste" se detectaba como saludo
+        self.assertIsNone(CHAT_INTENTS.best('cuéntame un chiste'))
+        self.assertIn('chiste', CONTEXT_TOPICS.intents('cuéntame un chiste'))
+        self.assertEqual(CHAT_INTENTS.best('plan de fertilización'), 'fertilizacion')
+
+
+class ResponseCacheTests(SimpleTestCase):
+    config = SimpleNamespace(provider='ollama', pk=1)
+
+    def crop(self, humidity_soil=40.0):
+        return SimpleNamespace(temperature_air=21.0, humidity_air=70.0, humidity_soil=humidity_soil,
+                               conductivity_ec=1.0, solar_radiation=500.0, pest_risk='Bajo')
+
+    def setUp(self):
+        caches['chatbot'].clear()
+
+    def test_clave_por_tema(self):
+        # tema estático: ignora los sensores y normaliza el mensaje
+        self.assertEqual(response_cache_key('¿Quién te creó?', self.crop(40), self.config),
+                         response_cache_key('quien te creo', self.crop(20), self.config))
+        # tema dependiente del cultivo: cambia con los sensores
+        self.assertNotEqual(response_cache_key('¿qué cuidado necesitan?', self.crop(40), self.config),
+                            response_cache_key('¿qué cuidado necesitan?', self.crop(20), self.config))
+        self.assertIsNone(response_cache_key('¿qué hora es?', self.crop(), self.config))
+
+    def test_respuesta_compartida_entre_usuarios(self):
+        key = response_cache_key('¿quién te creó?', self.crop(), self.config)
+        set_cached_response(key, 'agri01', 'Me crearon en Tecsup.')
+        self.assertEqual(get_cached_response(key), 'Me crearon en Tecsup.')
+
+    def test_no_cachea_respuestas_con_el_nombre(self):
+        key = response_cache_key('¿cada cuánto riego?', self.crop(), self.config)
+        set_cached_response(key, 'ana', '¡Claro, Ana! Riega dos veces por semana.')
+        self.assertIsNone(get_cached_response(key))
+        # subcadena de otra palabra: no es el nombre, se cachea intacta
+        set_cached_response(key, 'ana', 'Riega dos veces por semana.')
+        self.assertEqual(get_cached_response(key), 'Riega dos veces por semana.')
+
+
+class CropDataCacheTests(TestCase):
+    def _crop(self, humidity_soil):
+        return CropData.objects.create(temperature_air=21.0, humidity_air=70.0, humidity_soil=humidity_soil,
+                                       conductivity_ec=1.0, temperature_soil=18.0, solar_radiation=500.0)
+
+    def test_se_invalida_al_guardar(self):
+        invalidate_crop_data_cache()
+        self._crop(40.0)
+        self.assertEqual(get_or_create_crop_data().humidity_soil, 40.0)
+        with self.assertNumQueries(0):
+            get_or_create_crop_data()
+        self._crop(25.0)  # post_save (chatbot/signals.py) invalida la caché
+        self.assertEqual(get_or_create_crop_data().humidity_soil, 25.0)
+
+
+class ChatHistoryTests(TestCase):
+    def test_buffer_guarda_en_lote(self):
+        buffer = ChatWriteBuffer(flush_interval=60, batch_size=100, max_pending=1000)
+        buffer._ensure_thread = lambda: None  # sin hilo: flush manual
+        buffer.add([ChatMessage(username='agri01', message=f'm{i}') for i in range(3)])
+        self.assertEqual(ChatMessage.objects.count(), 0)
+        self.assertEqual(buffer.flush(), 3)
+        self.assertEqual(ChatMessage.objects.filter(username='agri01').count(), 3)
+
+    def test_fila_invalida_no_tira_el_lote(self):
+        buffer = ChatWriteBuffer(flush_interval=0, batch_size=100, max_pending=1000)
+        messages = [ChatMessage(username='agri01', message=m) for m in ('m0', None, 'm2')]
+        with self.assertLogs('agro_ai.chatbot', 'WARNING') as logs:
+            buffer.add(messages)
+        self.assertEqual(list(ChatMessage.objects.values_list('message', flat=True)), ['m0', 'm2'])
+        self.assertIn('Mensaje de chat perdido (usuario=agri01', logs.output[-1])
+
+    def test_paginacion_por_keyset(self):
+        now = timezone.now()
+        # dos mensajes con el mismo timestamp: el id desempata
+        ChatMessage.objects.bulk_create(
+            [ChatMessage(username='agri01', message=f'm{i}', timestamp=now + timedelta(seconds=i // 2))
+             for i in range(5)]
+            + [ChatMessage(username='otro', message='x', timestamp=now)]
+        )
+        seen, cursor = [], None
+        while True:
+            page, cursor = get_chat_history_page('agri01', limit=2, cursor=cursor)
+            seen.extend(m.message for m in page)
+            if not cursor:
+                break
+        self.assertEqual(seen, ['m4', 'm3', 'm2', 'm1', 'm0'])
+        with self.assertRaises(ValueError):
+            get_chat_history_page('agri01', cursor='no-valido')
+
+
+class ChatStreamViewTests(SimpleTestCase):
+    prep = {'crop_data': None, 'crop_data_dict': {'pest_risk': 'Bajo'}, 'response': None,
+            'tasks_created': [], 'prompt': 'prompt', 'cache_key': 'k'}
+
+    async def _stream(self, chunks):
+        def fake_stream(prompt):
+            for chunk in chunks:
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+
+        with mock.patch.object(views, 'prepare_chatbot_reply', return_value=dict(self.prep)), \
+                mock.patch.object(views, 'stream_chat_with_ai', side_effect=fake_stream), \
+                mock.patch.object(views, 'save_chat_exchange') as save, \
+                mock.patch.object(views, 'set_cached_response') as cache_set:
+            resp = await self.async_client.post('/api/chatbot/stream/', {'message': 'hola', 'username': 'agri01'},
+                                                content_type='application/json')
+            body = b''.join([chunk async for chunk in resp.streaming_content]).decode()
+        events = [(block.split('\n')[0][7:], json.loads(block.split('\n')[1][6:]))
+                  for block in body.strip().split('\n\n')]
+        return resp, events, save, cache_set
+
+    async def test_stream_completo(self):
+        resp, events, save, cache_set = await self._stream(['Rie', 'ga ', 'hoy'])
+        self.assertEqual(resp['Content-Type'], 'text/event-stream; charset=utf-8')
+        self.assertEqual([e for e, _ in events], ['meta', 'token', 'token', 'token', 'done'])
+        self.assertEqual(events[-1][1]['response'], 'Riega hoy')
+        self.assertEqual(save.call_args.args[:3], ('agri01', 'hola', 'Riega hoy'))
+        cache_set.assert_called_once_with('k', 'agri01', 'Riega hoy')
+
+    async def test_falla_a_mitad_no_guarda_ni_cachea(self):
+        _, events, save, cache_set = await self._stream(['Rie', ConnectionError('cortado')])
+        self.assertEqual([e for e, _ in events], ['meta', 'token', 'error'])
+        self.assertIn('cortado', events[-1][1]['error'])
+        save.assert_not_called()
+        cache_set.assert_not_called()
+
+    async def test_no_cachea_respuestas_de_error(self):
+        _, events, save, cache_set = await self._stream(['Error Ollama: modelo no encontrado'])
+        self.assertEqual(events[-1][0], 'done')
+        cache_set.assert_not_called()
+
+
+class _FakeWhisper:
+    def __init__(self, text='¿Necesito regar?'):
+        self.text = text
+        self.release = threading.Event()
+
+    def transcribe(self, path, language='es'):
+        self.release.wait(5)
+        return {'text': f' {self.text} '}
+
+
+class VoiceJobTests(SimpleTestCase):
+    def setUp(self):
+        self.model = _FakeWhisper()
+        self.service = transcription.TranscriptionService(workers=1, max_pending=1, model_name='base')
+        # hilos en lugar del pool de procesos: el modelo falso vive en este proceso
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        patches = [
+            mock.patch.object(self.service, '_get_pool', return_value=self.executor),
+            mock.patch.object(transcription, '_MODEL', self.model),
+            mock.patch.object(transcription, 'whisper_available', return_value=True),
+            mock.patch.object(transcription, 'get_transcription_service', return_value=self.service),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.model.release.set()
+        self.executor.shutdown(wait=True)
+        self.service._post.shutdown(wait=True)
+
+    def _wait_job(self, job_id):
+        for _ in range(100):
+            job = transcription.get_voice_job(job_id)
+            if job['status'] != transcription.QUEUED:
+                return job
+            time.sleep(0.02)
+        self.fail('el job no terminó')
+
+    def test_cola_llena_y_libera_el_slot(self):
+        future = self.service.submit('a.wav')
+        with self.assertRaises(transcription.QueueFull):
+            self.service.submit('b.wav')
+        self.model.release.set()
+        self.assertEqual(future.result(5)['text'], '¿Necesito regar?')
+        time.sleep(0.05)  # el callback libera el slot tras resolver el future
+        self.assertEqual(self.service.submit('c.wav').result(5)['text'], '¿Necesito regar?')
+
+    def test_job_termina_y_se_consulta(self):
+        on_text = mock.Mock(return_value={'response': 'Riega hoy', 'tasks_created': []})
+        job = transcription.submit_voice_job('no-existe.wav', 'agri01', on_text)
+        resp = self.client.get(f'/api/chatbot/voice/jobs/{job["id"]}/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['status'], transcription.QUEUED)
+        self.model.release.set()
+        self.assertEqual(self._wait_job(job['id'])['status'], transcription.DONE)
+        data = self.client.get(f'/api/chatbot/voice/jobs/{job["id"]}/').json()
+        self.assertEqual(data['transcribed_text'], '¿Necesito regar?')
+        self.assertEqual(data['result']['response'], 'Riega hoy')
+        on_text.assert_called_once_with('¿Necesito regar?', 'agri01')
+
+    def test_job_fallido_y_404(self):
+        job = transcription.submit_voice_job('no-existe.wav', 'agri01', mock.Mock(side_effect=ValueError('sin IA')))
+        self.model.release.set()
+        self.assertEqual(self._wait_job(job['id'])['error'], 'sin IA')
+        resp = self.client.get('/api/chatbot/voice/jobs/desconocido/')
+        self.assertEqual(resp.status_code, 404)
+
+    def test_vista_async_responde_503_con_cola_llena(self):
+        self.service.submit('ocupado.wav')
+        audio = SimpleUploadedFile('nota.wav', b'RIFF', content_type='audio/wav')
+        resp = self.client.post('/api/chatbot/voice/?async=true', {'audio': audio, 'username': 'agri01'})
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(resp['Retry-After'], '5')
@@ -0,0 +1,190 @@
+"""
+Servicio de transcripción con Whisper.
+
+- Pool de procesos: cada worker carga el modelo una sola vez (initializer) y lo
+  reutiliza en todas las transcripciones.
+- Cola acotada: si hay más de WHISPER_MAX_PENDING audios en espera se rechaza
+  el trabajo (QueueFull) en lugar de acumular memoria y latencia.
+- Jobs asíncronos: el estado se guarda en la caché "default" de Django para que
+  la vista de voz pueda responder 202 y el cliente consultar el resultado. Con
+  más de un worker esa caché debe ser compartida (REDIS_URL): con LocMem cada
+  proceso solo ve sus propios jobs y el polling daría 404 al caer en otro.
+"""
+import os
+import threading
+import time
+import uuid
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils import timezone
+
+from agro_ai_platform.optional import whisper_available, get_whisper
+
+JOB_TTL = 3600
+
+# estados de un job de voz
+QUEUED = 'queued'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class QueueFull(Exception):
+    """La cola de transcripción alcanzó su límite."""
+
+
+# ---------- lado worker (proceso hijo) ----------
+_MODEL = None
+
+
+def _init_worker(model_name: str):
+    global _MODEL
+    # solo en el proceso de transcripción
+    _MODEL = get_whisper().load_model(model_name)
+
+
+def _transcribe_in_worker(audio_file_path: str, language: str = 'es') -> dict:
+    started = time.perf_counter()
+    result = _MODEL.transcribe(audio_file_path, language=language)
+    return {"text": result["text"].strip(), "seconds": time.perf_counter() - started}
+
+
+# ---------- lado servidor ----------
+class TranscriptionService:
+    def __init__(self, workers: int, max_pending: int, model_name: str):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.model_name = model_name
+        self._pool = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        # post-proceso (chatbot + ORM) fuera del hilo de gestión del pool
+        self._post = ThreadPoolExecutor(max_workers=2, thread_name_prefix='voice-post')
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    # spawn: los workers no heredan estado de Django/torch del proceso web
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                        initializer=_init_worker,
+                        initargs=(self.model_name,),
+                    )
+        return self._pool
+
+    def submit(self, audio_file_path: str, language: str = 'es'):
+        """Encola una transcripción. Lanza QueueFull si la cola está llena."""
+        if not whisper_available():
+            raise RuntimeError("Whisper no está instalado. Ejecuta: pip install openai-whisper")
+        if not self._slots.acquire(blocking=False):
+            raise QueueFull("Cola de transcripción llena, intenta de nuevo en unos segundos.")
+        try:
+            try:
+                future = self._get_pool().submit(_transcribe_in_worker, audio_file_path, language)
+            except BrokenProcessPool:
+                # un worker murió (OOM, etc.): recrear el pool una vez
+                with self._lock:
+                    self._pool = None
+                future = self._get_pool().submit(_transcribe_in_worker, audio_file_path, language)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _f: self._slots.release())
+        return future
+
+    def transcribe(self, audio_file_path: str, timeout: float | None = None) -> str:
+        return self.submit(audio_file_path).result(timeout=timeout)["text"]
+
+    def warmup(self):
+        """Arranca los workers (carga del modelo) sin esperar a la primera petición."""
+        pool = self._get_pool()
+        for _ in range(self.workers):
+            pool.submit(time.sleep, 0)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        self._post.shutdown(wait=True)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_transcription_service() -> TranscriptionService:
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = TranscriptionService(
+                    workers=getattr(settings, 'WHISPER_WORKERS', 1),
+                    max_pending=getattr(settings, 'WHISPER_MAX_PENDING', 8),
+                    model_name=getattr(settings, 'WHISPER_MODEL', 'base'),
+                )
+    return _service
+
+
+# ---------- jobs asíncronos de voz ----------
+def _job_key(job_id: str) -> str:
+    return f'chatbot:voice_job:{job_id}'
+
+
+def get_voice_job(job_id: str) -> dict | None:
+    return cache.get(_job_key(job_id))
+
+
+def _save_job(state: dict):
+    state['updated_at'] = timezone.now().isoformat()
+    cache.set(_job_key(state['id']), state, JOB_TTL)
+
+
+def submit_voice_job(audio_file_path: str, username: str, on_text) -> dict:
+    """
+    Encola transcripción + respuesta del chatbot.
+    on_text(texto, username) -> dict se ejecuta al terminar la transcripción
+    (p. ej. process_chatbot_message). El archivo temporal se borra al final.
+    """
+    service = get_transcription_service()
+    state = {'id': uuid.uuid4().hex, 'status': QUEUED, 'transcribed_text': None,
+             'result': None, 'error': None}
+    try:
+        future = service.submit(audio_file_path)
+    except Exception:
+        _remove(audio_file_path)
+        raise
+    _save_job(state)
+
+    def _finish(fut):
+        try:
+            close_old_connections()
+            text = fut.result()["text"]
+            if not text:
+                state.update(status=FAILED, error="No se pudo transcribir el audio.")
+            else:
+                result = on_text(text, username)
+                result['transcribed_text'] = text
+                state.update(status=DONE, transcribed_text=text, result=result)
+        except Exception as e:
+            state.update(status=FAILED, error=str(e))
+        finally:
+            _remove(audio_file_path)
+            _save_job(state)
+            close_old_connections()
+
+    future.add_done_callback(lambda fut: service._post.submit(_finish, fut))
+    return state
+
+
+def _remove(path: str):
+    try:
+        if path and os.path.exists(path):
+            os.remove(path)
+    except OSError as e:
+        print(f"Error eliminando archivo temporal: {str(e)}")
@@ -1,9 +1,11 @@
 from django.urls import path
-from .views import ChatbotView, ChatHistoryView, CropDataView, ClearChatHistoryView, VoiceChatView
+from .views import ChatbotView, ChatHistoryView, CropDataView, ClearChatHistoryView, VoiceChatView, VoiceJobStatusView, chatbot_stream_view
 
 urlpatterns = [
     path('', ChatbotView.as_view(), name='chatbot'),
+    path('stream/', chatbot_stream_view, name='chatbot-stream'),
     path('voice/', VoiceChatView.as_view(), name='chatbot-voice'),
+    path('voice/jobs/<str:job_id>/', VoiceJobStatusView.as_view(), name='chatbot-voice-job'),
     path('history/', ChatHistoryView.as_view(), name='chatbot-history'),
     path('crop-data/', CropDataView.as_view(), name='chatbot-crop-data'),
     path('clear-history/', ClearChatHistoryView.as_view(), name='chatbot-clear-history'),
@@ -4,14 +4,33 @@ from rest_framework import status, permissions
 from rest_framework.parsers import MultiPartParser, FormParser
 from drf_spectacular.utils import extend_schema, OpenApiExample
 import os
+import json
 import tempfile
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse, HttpResponseNotAllowed
+from django.utils import timezone
+from ai.services import stream_chat_with_ai
 from .serializers import (
     ChatRequestSerializer, 
     ChatResponseSerializer,
     ChatMessageSerializer,
     CropDataSerializer
 )
-from .services import process_chatbot_message, get_chat_history, get_or_create_crop_data, transcribe_audio_with_whisper
+from .services import (
+    process_chatbot_message,
+    get_chat_history_page,
+    get_or_create_crop_data,
+    transcribe_audio_with_whisper,
+    prepare_chatbot_reply,
+    generate_contextual_response,
+    save_chat_exchange,
+    is_valid_ai_response,
+)
+from .streaming import sse_event, iterate_in_thread
+from .response_cache import set_cached_response
+from .persistence import flush_pending
+from .transcription import submit_voice_job, get_voice_job, QueueFull
+from django.urls import reverse
 from .models import ChatMessage
 
 
@@ -110,6 +129,82 @@ class ChatbotView(APIView):
             )
 
 
+async def chatbot_stream_view(request):
+    """
+    Variante en streaming (Server-Sent Events) de ChatbotView.
+
+    Body JSON: {"message": "...", "username": "..."}
+    Eventos:
+    - meta:  {"crop_data": {...}, "tasks_created": [...]}
+    - token: {"text": "..."} (uno por fragmento emitido por el proveedor IA)
+    - done:  {"response": "...", "crop_data": {...}, "tasks_created": [...]}
+    - error: {"error": "..."} si el proveedor falla a mitad de la respuesta; en ese
+      caso no hay done y no se guarda ni cachea el texto truncado.
+    El par de ChatMessage (usuario/bot) se guarda una sola vez al terminar.
+    Pensado para servirse con el ASGI app (agro_ai_platform.asgi): un stream
+    esperando al proveedor no ocupa ningún worker.
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    try:
+        data = json.loads(request.body or b'{}') if request.content_type == 'application/json' else request.POST
+    except ValueError:
+        return JsonResponse({"error": "JSON inválido"}, status=400)
+    message = (data.get('message') or '').strip()
+    username = data.get('username') or 'Usuario'
+    if not message:
+        return JsonResponse({"error": "El campo 'message' es requerido"}, status=400)
+
+    received_at = timezone.now()
+    try:
+        prep = await sync_to_async(prepare_chatbot_reply)(message, username)
+    except Exception as e:
+        return JsonResponse({"error": f"Error procesando mensaje: {str(e)}"}, status=500)
+
+    async def events():
+        yield sse_event('meta', {"crop_data": prep['crop_data_dict'], "tasks_created": prep['tasks_created']})
+        parts = []
+        if prep['response'] is not None:
+            parts.append(prep['response'])
+            yield sse_event('token', {"text": prep['response']})
+        elif prep['prompt']:
+            try:
+                async for chunk in iterate_in_thread(lambda: stream_chat_with_ai(prep['prompt'])):
+                    parts.append(chunk)
+                    yield sse_event('token', {"text": chunk})
+            except Exception as e:
+                print(f"Error en streaming IA: {e}")
+                if parts:
+                    # ya se enviaron fragmentos: avisar al cliente en vez de cerrar como si estuviera completa
+                    yield sse_event('error', {"error": f"La respuesta de la IA se interrumpió: {e}"})
+                    return
+            else:
+                if is_valid_ai_response(''.join(parts)):
+                    await sync_to_async(set_cached_response)(prep['cache_key'], username, ''.join(parts))
+        if not parts:
+            # sin IA disponible (o falló antes del primer fragmento): respuesta contextual
+            fallback = await sync_to_async(generate_contextual_response)(message, prep['crop_data'], username)
+            parts.append(fallback)
+            yield sse_event('token', {"text": fallback})
+
+        response = ''.join(parts)
+        await sync_to_async(save_chat_exchange)(username, message, response, received_at)
+        yield sse_event('done', {
+            "response": response,
+            "crop_data": prep['crop_data_dict'],
+            "tasks_created": prep['tasks_created'],
+        })
+
+    resp = StreamingHttpResponse(events(), content_type='text/event-stream; charset=utf-8')
+    resp['Cache-Control'] = 'no-cache'
+    resp['X-Accel-Buffering'] = 'no'  # evitar buffering en proxies
+    return resp
+
+
+# los decoradores csrf_exempt/require_POST de Django 4.2 no soportan vistas async
+chatbot_stream_view.csrf_exempt = True
+
+
 @extend_schema(
     tags=['Chatbot'],
     summary='Historial de chat del usuario',
@@ -117,8 +212,10 @@ class ChatbotView(APIView):
         "Obtiene el historial de mensajes de chat de un usuario específico.\n\n"
         "Query params:\n"
         "- username (required): nombre del usuario\n"
-        "- limit (optional): número máximo de mensajes (default: 50)\n\n"
-        "Retorna los mensajes ordenados por fecha (más recientes primero)."
+        "- limit (optional): número máximo de mensajes (default: 50, máx. 200)\n"
+        "- cursor (optional): valor de X-Next-Cursor de la página anterior\n\n"
+        "Retorna los mensajes ordenados por fecha (más recientes primero). "
+        "Si hay más mensajes, la respuesta incluye el header X-Next-Cursor."
     ),
     responses={
         200: ChatMessageSerializer(many=True),
@@ -136,7 +233,8 @@ class ChatHistoryView(APIView):
     
     def get(self, request):
         username = request.query_params.get('username')
-        limit = int(request.query_params.get('limit', 50))
+        limit = min(max(int(request.query_params.get('limit', 50)), 1), 200)
+        cursor = request.query_params.get('cursor')
         
         if not username:
             return Response(
@@ -145,9 +243,15 @@ class ChatHistoryView(APIView):
             )
         
         try:
-            messages = get_chat_history(username, limit)
+            messages, next_cursor = get_chat_history_page(username, limit, cursor)
             serializer = ChatMessageSerializer(messages, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            response = Response(serializer.data, status=status.HTTP_200_OK)
+            if next_cursor:
+                response['X-Next-Cursor'] = next_cursor
+            return response
+        except ValueError as e:
+            # cursor inválido
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response(
                 {"error": f"Error obteniendo historial: {str(e)}"},
@@ -235,6 +339,8 @@ class ClearChatHistoryView(APIView):
             )
         
         try:
+            # que no reaparezcan mensajes aún pendientes en el buffer
+            flush_pending()
             deleted_count, _ = ChatMessage.objects.filter(username=username).delete()
             return Response(
                 {
@@ -262,6 +368,9 @@ class ClearChatHistoryView(APIView):
         "- Lista de tareas creadas automáticamente (si aplica)\n\n"
         "**Formatos soportados:** .m4a, .mp3, .wav, .ogg, .webm\n"
         "**Transcripción:** OpenAI Whisper (español optimizado)\n\n"
+        "**Modo asíncrono:** con `?async=true` responde 202 con `job_id` y `status_url`; "
+        "consultar `GET /api/chatbot/voice/jobs/{job_id}/` hasta `status=done|failed`.\n"
+        "Si la cola de transcripción está llena responde 503 (header Retry-After).\n\n"
         "**No requiere autenticación** para facilitar acceso desde Flutter."
     ),
     request={
@@ -305,6 +414,9 @@ class VoiceChatView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        if str(request.query_params.get('async', '')).lower() in ('1', 'true', 'yes'):
+            return self._submit_async(audio_file, username, request)
+
         # Crear archivo temporal para guardar el audio
         temp_file = None
         try:
@@ -331,6 +443,11 @@ class VoiceChatView(APIView):
             
             return Response(result, status=status.HTTP_200_OK)
             
+        except QueueFull as e:
+            resp = Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            resp['Retry-After'] = '5'
+            return resp
+
         except Exception as e:
             return Response(
                 {"error": f"Error procesando audio: {str(e)}"},
@@ -344,3 +461,63 @@ class VoiceChatView(APIView):
                     os.remove(temp_file_path)
                 except Exception as e:
                     print(f"Error eliminando archivo temporal: {str(e)}")
+
+    def _submit_async(self, audio_file, username, request):
+        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(audio_file.name)[1]) as temp_file:
+            for chunk in audio_file.chunks():
+                temp_file.write(chunk)
+        try:
+            # el job borra el archivo temporal al terminar
+            job = submit_voice_job(temp_file.name, username, process_chatbot_message)
+        except QueueFull as e:
+            resp = Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            resp['Retry-After'] = '5'
+            return resp
+        except Exception as e:
+            return Response(
+                {"error": f"Error procesando audio: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        return Response(
+            {
+                "job_id": job['id'],
+                "status": job['status'],
+                "status_url": request.build_absolute_uri(reverse('chatbot-voice-job', args=[job['id']])),
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+@extend_schema(
+    tags=['Chatbot'],
+    summary='Estado de un mensaje de voz asíncrono',
+    description=(
+        "Devuelve el estado del job creado con `POST /api/chatbot/voice/?async=true`.\n\n"
+        "- status: queued | done | failed\n"
+        "- result: misma respuesta que el modo síncrono (incluye transcribed_text) cuando status=done\n"
+        "- error: detalle cuando status=failed\n\n"
+        "El estado vive en la caché \"default\": con más de un worker se requiere REDIS_URL."
+    ),
+    responses={
+        200: OpenApiExample(
+            'Terminado',
+            value={
+                "id": "3f2c...",
+                "status": "done",
+                "transcribed_text": "¿Necesito regar?",
+                "result": {"response": "✅ La humedad del suelo...", "tasks_created": [], "transcribed_text": "¿Necesito regar?"},
+                "error": None
+            }
+        ),
+        404: OpenApiExample('No encontrado', value={"error": "Job no encontrado o expirado"})
+    }
+)
+class VoiceJobStatusView(APIView):
+    """Estado de transcripciones asíncronas - No requiere autenticación"""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, job_id):
+        job = get_voice_job(job_id)
+        if not job:
+            return Response({"error": "Job no encontrado o expirado"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(job, status=status.HTTP_200_OK)
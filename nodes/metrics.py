@@ -0,0 +1,26 @@
+"""Métricas de la ingesta de nodos (agro_ai_platform.metrics → /api/admin/metrics/)."""
+from agro_ai_platform.metrics import counter, histogram
+
+INGEST_REQUESTS = counter(
+    'agro_ingest_requests_total',
+    'Requests de ingesta por reason (ingesta_aceptada, limite_diario, slot_ocupado, fuera_de_ventana, error, ...).',
+    ['reason', 'status'],
+)
+INGEST_PLAN = counter(
+    'agro_ingest_plan_total',
+    'Lecturas evaluadas contra un plan, aceptadas o rechazadas.',
+    ['plan', 'result'],
+)
+INGEST_LATENCY = histogram(
+    'agro_ingest_duration_ms',
+    'Duración de la ingesta por reason (ms).',
+    ['reason'],
+)
+
+
+def record_ingest(reason: str, status_code: int, plan_id, ms: float):
+    reason = reason or 'desconocido'
+    INGEST_REQUESTS.inc(reason=reason, status=status_code)
+    INGEST_LATENCY.observe(ms, reason=reason)
+    if plan_id is not None:
+        INGEST_PLAN.inc(plan=plan_id, result='aceptada' if status_code < 300 else 'rechazada')
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-19 05:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nodes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='nodosecundario',
+            index=models.Index(fields=['maestro', 'codigo'], name='nodosec_maestro_codigo_idx'),
+        ),
+    ]
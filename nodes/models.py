@@ -57,6 +57,12 @@ class NodoSecundario(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # ingesta: validar codigos de lectura contra el maestro (index-only sobre codigo)
+            models.Index(fields=['maestro', 'codigo'], name='nodosec_maestro_codigo_idx'),
+        ]
+
     def __str__(self):
         return self.codigo
 
@@ -1,5 +1,6 @@
 import secrets
 from datetime import timedelta
+from django.db.models import Count, Prefetch
 from django.utils import timezone
 from rest_framework import serializers
 from .models import TokenNodo, Node, NodoSecundario
@@ -39,17 +40,38 @@ class NodeSerializer(serializers.ModelSerializer):
             'updated_at': {'read_only': True},
         }
 
+    @staticmethod
+    def optimize_queryset(queryset, include_secundarios=False):
+        """
+        Precalcula lo que consumen get_nodos_secundarios/get_token para que listar
+        N nodos cueste un número fijo de queries (en vez de 2N+1).
+        """
+        queryset = queryset.annotate(secundarios_count=Count('secundarios')).prefetch_related(
+            Prefetch(
+                'tokens',
+                queryset=TokenNodo.objects.filter(estado__in=['valido', 'en_gracia']).order_by('-fecha_creacion'),
+                to_attr='tokens_vigentes',
+            )
+        )
+        if include_secundarios:
+            queryset = queryset.prefetch_related('secundarios')
+        return queryset
+
     def get_nodos_secundarios(self, obj):
         secundarios_qs = obj.secundarios.all()
         # Si el contexto pide incluir los secundarios, devolver la lista serializada
         if self.context.get('include_secundarios'):
             return NodoSecundarioSerializer(secundarios_qs, many=True, context=self.context).data
         # Por defecto devolver solo el contador (no null)
-        return {'count': secundarios_qs.count()}
+        count = getattr(obj, 'secundarios_count', None)
+        return {'count': count if count is not None else secundarios_qs.count()}
 
     def get_token(self, obj):
         # obtiene el token más reciente válido/en_gracia
-        token = obj.tokens.filter(estado__in=['valido','en_gracia']).order_by('-fecha_creacion').first()
+        if hasattr(obj, 'tokens_vigentes'):
+            token = obj.tokens_vigentes[0] if obj.tokens_vigentes else None
+        else:
+            token = obj.tokens.filter(estado__in=['valido','en_gracia']).order_by('-fecha_creacion').first()
         if not token:
             return None
         request = self.context.get('request')
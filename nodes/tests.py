@@ -0,0 +1,151 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth import get_user_model
+from django.core import signals
+from django.core.asgi import get_asgi_application
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from agro_ai_platform import metrics
+from parcels.models import Parcela
+from users.models import Rol
+from . import views
+from .metrics import INGEST_REQUESTS, record_ingest
+from .models import Node, NodoSecundario
+from .views import NodeIngestView
+
+User = get_user_model()
+
+
+class NodeListQueryCountTests(TestCase):
+    def setUp(self):
+        rol = Rol.objects.create(nombre='superadmin')
+        self.admin = User.objects.create_user(username='admin01', password='x', rol=rol)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.parcela = Parcela.objects.create(usuario=self.admin, nombre='Lote 1')
+
+    def _add_nodes(self, n):
+        for _ in range(n):
+            node = Node.objects.create(parcela=self.parcela)  # crea también su token
+            NodoSecundario.objects.create(maestro=node)
+            NodoSecundario.objects.create(maestro=node)
+
+    def _list_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        return len(ctx), data['results'] if isinstance(data, dict) else data
+
+    def test_listados_no_crecen_con_el_numero_de_nodos(self):
+        urls = ('/api/nodos/', f'/api/parcelas/{self.parcela.id}/nodos/')
+        self._add_nodes(2)
+        base = {url: self._list_queries(url)[0] for url in urls}
+        self._add_nodes(5)
+        for url in urls:
+            queries, rows = self._list_queries(url)
+            self.assertEqual(queries, base[url], url)
+            self.assertEqual(len(rows), 7)
+            self.assertEqual(rows[0]['nodos_secundarios'], {'count': 2})
+            self.assertEqual(len(rows[0]['token']), 64)
+
+
+class IngestMetricsTests(TestCase):
+    def setUp(self):
+        for metric in metrics.REGISTRY.values():
+            metric.reset()
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        # el archivo de este proceso quedó apuntando al directorio temporal
+        metrics._process_file = None
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_suma_los_procesos_del_directorio_multiproceso(self):
+        directory = self.dir
+        with override_settings(METRICS_MULTIPROC_DIR=directory):
+            # otro worker ya volcó su estado
+            other = {INGEST_REQUESTS.name: {'type': 'counter', 'help': 'x', 'labelnames': ['reason', 'status'],
+                                            'samples': [[['slot_ocupado', '429'], 3]]}}
+            with open(os.path.join(directory, 'metrics_1_abc.json'), 'w') as fh:
+                json.dump(other, fh)
+            record_ingest('slot_ocupado', 429, 7, 12.0)
+            record_ingest('ingesta_aceptada', 200, 7, 30.0)
+            text = metrics.render_prometheus()
+        self.assertIn('agro_ingest_requests_total{reason="slot_ocupado",status="429"} 4', text)
+        self.assertIn('agro_ingest_plan_total{plan="7",result="aceptada"} 1', text)
+        self.assertIn('agro_ingest_duration_ms_count{reason="ingesta_aceptada"} 1', text)
+
+    @override_settings(METRICS_TOKEN='s3cr3t')
+    def test_endpoint_con_bearer_token(self):
+        record_ingest('limite_diario', 429, None, 5.0)
+        client = APIClient()
+        self.assertIn(client.get('/api/admin/metrics/').status_code, (401, 403))
+        resp = client.get('/api/admin/metrics/', HTTP_AUTHORIZATION='Bearer s3cr3t')
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn(b'reason="limite_diario"', resp.content)
+
+    def test_excepcion_se_cuenta_como_error(self):
+        client = APIClient(raise_request_exception=False)
+        with mock.patch.object(NodeIngestView, '_ingest', side_effect=RuntimeError('mongo caído')):
+            self.assertEqual(client.post('/api/nodes/ingest/', {}, format='json').status_code, 500)
+        self.assertIn('agro_ingest_requests_total{reason="error",status="500"} 1', metrics.render_prometheus())
+
+    def test_excepcion_de_drf_se_cuenta_con_su_status(self):
+        resp = APIClient().post('/api/nodes/ingest/', '{no es json', content_type='application/json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('agro_ingest_requests_total{reason="parse_error",status="400"} 1', metrics.render_prometheus())
+
+
+class AsyncIngestViewTests(SimpleTestCase):
+    async def _post(self, body=b'{}', root_path=''):
+        path = root_path + '/api/nodes/ingest/'
+        scope = {'type': 'http', 'method': 'POST', 'path': path, 'raw_path': path.encode(), 'root_path': root_path,
+                 'query_string': b'', 'server': ('testserver', 80), 'client': ('127.0.0.1', 1234),
+                 'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]}
+        comm = ApplicationCommunicator(get_asgi_application(), scope)
+        await comm.send_input({'type': 'http.request', 'body': body, 'more_body': False})
+        start = await comm.receive_output(5)
+        done = await comm.receive_output(5)
+        await comm.wait(5)  # request_finished se envía tras el cuerpo
+        self.headers = {k.decode(): v.decode() for k, v in start['headers']}
+        return start['status'], json.loads(done['body'] or b'{}')
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=1.0)
+    async def test_vista_en_pool_acotado_con_middlewares(self):
+        threads = []
+
+        def ingest(view, request, laps):
+            threads.append(threading.current_thread().name)
+            return Response({'detail': 'No autorizado', 'reason': 'auth_required'}, status=401)
+
+        finished = mock.Mock()
+        signals.request_finished.connect(finished)
+        self.addCleanup(signals.request_finished.disconnect, finished)
+        with mock.patch.object(NodeIngestView, '_ingest', ingest):
+            status, data = await self._post(root_path='/agro')
+        self.assertEqual((status, data['reason']), (401, 'auth_required'))
+        self.assertTrue(threads[0].startswith('ingest'), threads)
+        self.assertRegex(self.headers['Server-Timing'], r'^db;desc="ORM \d+q"')
+        self.assertEqual(self.headers['X-Frame-Options'], 'DENY')
+        finished.assert_called_once()
+
+    async def test_limites_de_cuerpo_y_pendientes(self):
+        with override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=10):
+            self.assertEqual(await self._post(b'x' * 11), (413, {
+                'detail': 'Payload demasiado grande.', 'reason': 'payload_grande'}))
+        full = threading.BoundedSemaphore(1)
+        full.acquire()
+        with mock.patch.object(views, '_get_ingest_pool', return_value=(None, full)):
+            status, data = await self._post()
+        self.assertEqual((status, data['reason'], self.headers['Retry-After']), (503, 'sobrecarga', '5'))
@@ -1,6 +1,6 @@
 from django.urls import path, re_path
 from .views import (
-    NodeIngestView,
+    node_ingest,
     NodoMasterListView, NodoSecundarioListView,
     NodeCreateView, NodeUpdateView, NodoSecundarioCreateView,
     NodeListView, NodeDetailView, NodeDeleteView,
@@ -9,7 +9,7 @@ from .views import (
 )
 
 urlpatterns = [
-    path('nodes/ingest/', NodeIngestView.as_view(), name='nodes-ingest'),
+    path('nodes/ingest/', node_ingest, name='nodes-ingest'),
 
     path('parcelas/<int:parcela_id>/nodos/', NodoMasterListView.as_view(), name='nodos-master-list'),
     path('parcelas/<int:parcela_id>/nodos/create/', NodeCreateView.as_view(), name='nodos-master-create'),
@@ -1,12 +1,23 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, time
+from time import perf_counter
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import RequestDataTooBig
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.http import JsonResponse
 from django.utils import timezone
 from rest_framework import generics, permissions, status, views
 from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema, OpenApiExample
-from rest_framework.exceptions import PermissionDenied, NotFound 
+from rest_framework.exceptions import APIException, PermissionDenied, NotFound
 from .auth import NodeTokenAuthentication
 from .models import Node, NodoSecundario, Parcela
 from agro_ai_platform.mongo import get_db, to_utc, now_utc, to_lima
+from agro_ai_platform.tracing import Stopwatch, traced
+from .metrics import record_ingest
 from .serializers import NodeSerializer, NodoSecundarioSerializer
 # reemplazado: import directo de helpers de permisos del app nodes (reusa users.permissions)
 from .permissions import tiene_permiso, role_name, HasOperationPermission
@@ -125,7 +136,25 @@ class NodeIngestView(GenericAPIView):
     PRE_MARGIN_MINUTES = PRE_MARGIN_DEFAULT
     POST_MARGIN_MINUTES = POST_MARGIN_DEFAULT
 
+    @traced('ingest.total')
     def post(self, request):
+        start = perf_counter()
+        self.plan_id = None
+        # una excepción termina en 500: se cuenta como reason "error"
+        reason, status_code = 'error', 500
+        try:
+            response = self._ingest(request, Stopwatch('ingest'))
+            reason = response.data.get('reason') if isinstance(response.data, dict) else None
+            status_code = response.status_code
+            return response
+        except APIException as exc:
+            # DRF la convierte en respuesta 4xx (p. ej. ParseError al leer request.data)
+            reason, status_code = exc.default_code, exc.status_code
+            raise
+        finally:
+            record_ingest(reason, status_code, self.plan_id, (perf_counter() - start) * 1000)
+
+    def _ingest(self, request, laps):
         payload = request.data.copy()
         ts = payload.get("timestamp")
         try:
@@ -141,6 +170,7 @@ class NodeIngestView(GenericAPIView):
         nodo_auth = getattr(request, "node", None)
         if not token or not nodo_auth:
             return Response({'detail': 'No autorizado', 'reason': 'auth_required'}, status=status.HTTP_401_UNAUTHORIZED)
+        laps.lap('auth')
 
         ts = payload.get("timestamp")
         if isinstance(ts, str):
@@ -182,6 +212,7 @@ class NodeIngestView(GenericAPIView):
                     {"detail": "Nodos secundarios inválidos o no pertenecen al maestro.", "invalid_nodo_codigos": invalid, 'reason': 'nodos_secundarios_invalidos'},
                     status=status.HTTP_403_FORBIDDEN
                 )
+        laps.lap('validar_secundarios')
 
         # Buscar plan aplicable (activo o programado) cuyo inicio <= fecha
         from plans.models import ParcelaPlan
@@ -207,6 +238,8 @@ class NodeIngestView(GenericAPIView):
             )
 
         plan = parcela_plan.plan
+        self.plan_id = plan.id
+        laps.lap('plan')
 
         # Validación: hora local (Lima) dentro de rango permitido del plan
         try:
@@ -224,6 +257,7 @@ class NodeIngestView(GenericAPIView):
         except Exception:
             # si get_schedule_for_date falla, continuar y validar más adelante con la ventana ±5 min existente
             pass
+        laps.lap('horario')
 
         # límite diario = veces_por_dia
         try:
@@ -242,6 +276,7 @@ class NodeIngestView(GenericAPIView):
             current_count = readings_collection("lecturas_sensores").count_documents(mongo_q)
         except Exception:
             current_count = 0
+        laps.lap('conteo_diario')
 
         if limite is not None and current_count >= limite:
             return Response({
@@ -279,6 +314,7 @@ class NodeIngestView(GenericAPIView):
                 "horarios": [h.isoformat() for h in schedule],
                 "reason": "fuera_de_ventana"
             }, status=status.HTTP_400_BAD_REQUEST)
+        laps.lap('ventana')
 
         # Evitar duplicado en slot
         window_start = matched_slot - pre
@@ -292,6 +328,7 @@ class NodeIngestView(GenericAPIView):
             slot_count = readings_collection("lecturas_sensores").count_documents(mongo_q_slot)
         except Exception:
             slot_count = 0
+        laps.lap('conteo_slot')
         if slot_count >= 1:
             return Response({
                 "detail": "Ya existe una lectura en esta ventana.",
@@ -318,6 +355,7 @@ class NodeIngestView(GenericAPIView):
                 present_codes.add(codigo)
 
         readings_collection("lecturas_sensores").insert_one(mongo_doc)
+        laps.lap('insert')
 
         now = timezone.now()
         node.last_seen = now
@@ -331,6 +369,7 @@ class NodeIngestView(GenericAPIView):
                 except Exception:
                     pass
         node.save(update_fields=list(dict.fromkeys(update_fields)))
+        laps.lap('nodo')
 
         if node.bateria is not None and node.bateria < 20:
             upsert_alert(parcela, "Batería baja nodo maestro",
@@ -342,6 +381,7 @@ class NodeIngestView(GenericAPIView):
                          f"Señal {node.senal}dBm", code=f"node_senal_{node.id}",
                          severity='medium', entity_type='node', entity_ref=str(node.id),
                          meta={'senal': node.senal}, source='rules.node')
+        laps.lap('alertas')
 
         for lectura in payload.get("lecturas", []):
             codigo_sec = lectura.get("nodo_codigo")
@@ -380,9 +420,70 @@ class NodeIngestView(GenericAPIView):
         if present_codes:
             qs_absent = qs_absent.exclude(codigo__in=list(present_codes))
         qs_absent.update(estado="inactivo")
+        laps.lap('secundarios')
 
         return Response({"detail": "OK", "reason": "ingesta_aceptada"}, status=status.HTTP_200_OK)
 
+
+_ingest_view = NodeIngestView.as_view()
+_ingest_executor = None
+_ingest_slots = None
+
+
+def _get_ingest_pool():
+    """Pool de INGEST_ASYNC_THREADS hilos y cupo de INGEST_ASYNC_MAX_PENDING ingestas en curso (por proceso)."""
+    global _ingest_executor, _ingest_slots
+    if _ingest_executor is None:
+        _ingest_slots = threading.BoundedSemaphore(settings.INGEST_ASYNC_MAX_PENDING)
+        _ingest_executor = ThreadPoolExecutor(max_workers=settings.INGEST_ASYNC_THREADS, thread_name_prefix='ingest')
+    return _ingest_executor, _ingest_slots
+
+
+def _ingest_in_pool(request):
+    # los hilos del pool se reutilizan: CONN_MAX_AGE se aplica igual que con request_started/finished
+    close_old_connections()
+    try:
+        return _ingest_view(request)
+    finally:
+        close_old_connections()
+
+
+async def node_ingest(request):
+    """
+    POST /api/nodes/ingest/.
+
+    Bajo ASGI, Django ya recibe el cuerpo en el event loop y corre cada vista síncrona
+    en un hilo propio del request, cada uno con su conexión SQL y Mongo: con miles de
+    nodos a la vez no hay tope por proceso. Aquí NodeIngestView corre en un pool de
+    INGEST_ASYNC_THREADS hilos, que acota ese trabajo y las conexiones, y por encima de
+    INGEST_ASYNC_MAX_PENDING ingestas en curso se responde 503 (reason=sobrecarga)
+    para que el nodo reintente. Bajo WSGI o con INGEST_ASYNC=False corre la vista tal cual.
+    """
+    if not settings.INGEST_ASYNC or not isinstance(request, ASGIRequest):
+        return await sync_to_async(_ingest_view)(request)
+    try:
+        request.body  # ya está en memoria; solo se valida DATA_UPLOAD_MAX_MEMORY_SIZE
+    except RequestDataTooBig:
+        record_ingest('payload_grande', 413, None, 0.0)
+        return JsonResponse({'detail': 'Payload demasiado grande.', 'reason': 'payload_grande'}, status=413)
+
+    executor, slots = _get_ingest_pool()
+    if not slots.acquire(blocking=False):
+        record_ingest('sobrecarga', 503, None, 0.0)
+        return JsonResponse({'detail': 'Servidor ocupado, reintentar.', 'reason': 'sobrecarga'}, status=503,
+                            headers={'Retry-After': '5'})
+    try:
+        return await sync_to_async(_ingest_in_pool, thread_sensitive=False, executor=executor)(request)
+    finally:
+        slots.release()
+
+
+# csrf_exempt de Django 4.2 envuelve la vista en una función síncrona; cls/initkwargs: drf-spectacular
+# documenta la ruta con el esquema de NodeIngestView
+node_ingest.csrf_exempt = True
+node_ingest.cls = _ingest_view.cls
+node_ingest.initkwargs = _ingest_view.initkwargs
+
 @extend_schema(
     tags=['Nodos'],
     summary='Listar nodos maestros de una parcela',
@@ -409,10 +510,8 @@ class NodoMasterListView(generics.ListAPIView):
             raise PermissionDenied(detail="No tienes permiso para ver nodos.")
 
         # admin puede ver todo; agricultor solo sus parcelas
-        if role_name(user) in ['superadmin', 'administrador']:
-            return Node.objects.filter(parcela_id=parcela_id)
-        if parcela.usuario == user:
-            return Node.objects.filter(parcela_id=parcela_id)
+        if role_name(user) in ['superadmin', 'administrador'] or parcela.usuario_id == user.id:
+            return NodeSerializer.optimize_queryset(Node.objects.filter(parcela_id=parcela_id))
 
         raise PermissionDenied(detail="No tienes permiso para ver los nodos de esta parcela.")
 
@@ -599,8 +698,8 @@ class NodeListView(generics.ListAPIView):
             raise PermissionDenied(detail="No tienes permiso para ver nodos.")
         if role_name(user) == 'agricultor':
             parcelas = Parcela.objects.filter(usuario=user)
-            return Node.objects.filter(parcela__in=parcelas)
-        return Node.objects.all()
+            return NodeSerializer.optimize_queryset(Node.objects.filter(parcela__in=parcelas))
+        return NodeSerializer.optimize_queryset(Node.objects.all())
 
 @extend_schema(
     tags=['Nodos'],
@@ -617,8 +716,10 @@ class NodeDetailView(generics.RetrieveAPIView):
         if not tiene_permiso(user, 'nodos', 'ver'):
             raise PermissionDenied(detail="No tienes permiso para ver nodos.")
         if role_name(user) in ['superadmin', 'administrador']:
-            return Node.objects.all()
-        return Node.objects.filter(parcela__usuario=user)
+            qs = Node.objects.all()
+        else:
+            qs = Node.objects.filter(parcela__usuario=user)
+        return NodeSerializer.optimize_queryset(qs, include_secundarios=True)
 
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
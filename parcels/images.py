@@ -0,0 +1,62 @@
+"""
+Derivados de imágenes de parcelas (thumb / medium / analysis).
+
+Se generan en el worker de subida (parcels.uploads) antes de enviar a
+almacenamiento: JPEG con el lado mayor acotado, orientación EXIF aplicada y
+sin metadatos. Sin Pillow instalado no se generan y se sirve el original.
+"""
+import os
+import tempfile
+
+from django.conf import settings
+
+from agro_ai_platform.optional import pillow_available, get_pil
+
+# nombre → campo en ParcelaImage
+DERIVATIVE_FIELDS = {
+    'thumb': 'thumb_url',
+    'medium': 'medium_url',
+    'analysis': 'analysis_url',
+}
+
+
+def derivative_sizes() -> dict[str, int]:
+    return {
+        'analysis': getattr(settings, 'PARCEL_IMAGE_ANALYSIS_PX', 2048),
+        'medium': getattr(settings, 'PARCEL_IMAGE_MEDIUM_PX', 1280),
+        'thumb': getattr(settings, 'PARCEL_IMAGE_THUMB_PX', 320),
+    }
+
+
+def make_derivatives(path: str) -> dict[str, str]:
+    """
+    Genera los derivados de la imagen en `path` y devuelve {nombre: ruta_temporal}.
+    El llamador borra los archivos. Devuelve {} sin Pillow o si no es una imagen.
+    """
+    if not pillow_available():
+        return {}
+    Image, ImageOps = get_pil()
+    quality = getattr(settings, 'PARCEL_IMAGE_JPEG_QUALITY', 82)
+    out = {}
+    try:
+        with Image.open(path) as src:
+            # las fotos de celular vienen rotadas por EXIF
+            current = ImageOps.exif_transpose(src)
+            if current.mode != 'RGB':
+                current = current.convert('RGB')
+            # de mayor a menor: cada tamaño se reduce desde el anterior (más rápido que desde el original)
+            for name, max_px in sorted(derivative_sizes().items(), key=lambda kv: -kv[1]):
+                if max(current.size) > max_px:
+                    current = current.copy()
+                    current.thumbnail((max_px, max_px), Image.LANCZOS)
+                fd, dest = tempfile.mkstemp(prefix=f'parcel_{name}_', suffix='.jpg',
+                                            dir=getattr(settings, 'PARCEL_UPLOAD_SPOOL_DIR', '') or None)
+                with os.fdopen(fd, 'wb') as fh:
+                    current.save(fh, 'JPEG', quality=quality, optimize=True, progressive=True)
+                out[name] = dest
+    except Exception as e:
+        print(f"Error generando derivados de imagen: {str(e)}")
+        for dest in out.values():
+            os.remove(dest)
+        return {}
+    return out
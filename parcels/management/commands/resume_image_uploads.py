@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from parcels.models import ParcelaImage
+from parcels.uploads import upload_image
+
+
+class Command(BaseCommand):
+    help = ("Sube las imágenes de parcelas que quedaron pendientes (p. ej. tras reiniciar el worker) "
+            "desde el directorio spool. Con --failed también reintenta las fallidas.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--failed', action='store_true', help='Reintentar también las imágenes en estado failed.')
+
+    def handle(self, *args, **options):
+        statuses = [ParcelaImage.STATUS_PENDING]
+        if options['failed']:
+            statuses.append(ParcelaImage.STATUS_FAILED)
+        qs = ParcelaImage.objects.filter(status__in=statuses).order_by('created_at')
+        self.stdout.write(self.style.NOTICE(f"[resume_image_uploads] {qs.count()} imagen(es) ({', '.join(statuses)})"))
+
+        ready = failed = 0
+        for image_id in qs.values_list('id', flat=True).iterator():
+            ParcelaImage.objects.filter(pk=image_id).update(status=ParcelaImage.STATUS_PENDING)
+            upload_image(image_id)
+            status = ParcelaImage.objects.filter(pk=image_id).values_list('status', flat=True).first()
+            if status == ParcelaImage.STATUS_READY:
+                ready += 1
+            else:
+                failed += 1
+        self.stdout.write(self.style.SUCCESS(f"Listo: {ready} subidas, {failed} fallidas."))
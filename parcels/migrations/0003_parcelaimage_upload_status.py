@@ -0,0 +1,33 @@
+# Generated by Django 4.2.11 on 2026-10-19 05:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parcels', '0002_parcela_imagen_public_id_parcela_imagen_url_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='parcelaimage',
+            name='error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='parcelaimage',
+            name='spool_path',
+            field=models.CharField(blank=True, default='', max_length=512),
+        ),
+        migrations.AddField(
+            model_name='parcelaimage',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pendiente'), ('ready', 'Lista'), ('failed', 'Fallida')], default='ready', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='parcelaimage',
+            name='image_url',
+            field=models.URLField(blank=True, default='', max_length=1024),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.11 on 2026-10-19 05:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parcels', '0003_parcelaimage_upload_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='parcelaimage',
+            name='analysis_url',
+            field=models.URLField(blank=True, default='', max_length=1024),
+        ),
+        migrations.AddField(
+            model_name='parcelaimage',
+            name='medium_url',
+            field=models.URLField(blank=True, default='', max_length=1024),
+        ),
+        migrations.AddField(
+            model_name='parcelaimage',
+            name='thumb_url',
+            field=models.URLField(blank=True, default='', max_length=1024),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-19 05:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parcels', '0004_parcelaimage_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ciclo',
+            index=models.Index(fields=['parcela', 'estado', 'created_at'], name='ciclo_parcela_estado_idx'),
+        ),
+    ]
@@ -37,12 +37,30 @@ class Parcela(models.Model):
 
 # Añadir ParcelaImage separado (para IA / análisis, muchas por parcela)
 class ParcelaImage(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_READY = 'ready'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pendiente'),
+        (STATUS_READY, 'Lista'),
+        (STATUS_FAILED, 'Fallida'),
+    )
+
     parcela = models.ForeignKey('parcels.Parcela', on_delete=models.CASCADE, related_name='images')
-    image_url = models.URLField(max_length=1024)
+    # vacío mientras la subida está pendiente (parcels.uploads)
+    image_url = models.URLField(max_length=1024, blank=True, default='')
     public_id = models.CharField(max_length=255, blank=True, null=True)
     filename = models.CharField(max_length=255, blank=True, null=True)
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
     created_at = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_READY)
+    error = models.TextField(blank=True, default='')
+    # archivo local a subir; se limpia al terminar
+    spool_path = models.CharField(max_length=512, blank=True, default='')
+    # derivados (parcels.images); vacíos si no hay Pillow o la imagen es anterior
+    thumb_url = models.URLField(max_length=1024, blank=True, default='')
+    medium_url = models.URLField(max_length=1024, blank=True, default='')
+    analysis_url = models.URLField(max_length=1024, blank=True, default='')
 
     class Meta:
         db_table = 'parcels_parcelaimage'
@@ -51,6 +69,13 @@ class ParcelaImage(models.Model):
     def __str__(self):
         return f'Image {self.pk} for parcela {self.parcela_id}'
 
+    def derivative_public_ids(self) -> list[str]:
+        # los derivados se suben como "<public_id>_<nombre>" (parcels.uploads)
+        if not self.public_id:
+            return []
+        return [f'{self.public_id}_{name}' for name in ('thumb', 'medium', 'analysis')
+                if getattr(self, f'{name}_url')]
+
 
 class Ciclo(models.Model):
     ESTADO_CHOICES = (
@@ -73,6 +98,10 @@ class Ciclo(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # ciclo activo más reciente de una parcela
+            models.Index(fields=['parcela', 'estado', 'created_at'], name='ciclo_parcela_estado_idx'),
+        ]
 
     def __str__(self):
         return f'Ciclo {self.pk} - {self.parcela.nombre} ({self.cultivo.nombre if self.cultivo else "sin cultivo"})'
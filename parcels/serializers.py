@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
 from rest_framework import serializers
 from typing import Any, Optional, Dict
 
@@ -6,7 +7,7 @@ from .models import Parcela, Ciclo, ParcelaImage
 from crops.models import Cultivo, Variedad, Etapa
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema_field
-import cloudinary.uploader
+from .uploads import enqueue_parcela_preview
 
 User = get_user_model()
 
@@ -49,7 +50,9 @@ class CicloReadSerializer(serializers.ModelSerializer):
     def _to_basic(self, obj):
         if not obj:
             return None
-        return {'id': obj.id, 'nombre': getattr(obj, 'nombre', str(obj))}
+        # no usar str(obj) como default de getattr: se evalúa siempre y __str__ recorre FKs
+        nombre = obj.nombre if hasattr(obj, 'nombre') else str(obj)
+        return {'id': obj.id, 'nombre': nombre}
 
     @extend_schema_field(OpenApiTypes.STR)
     def get_cultivo(self, obj):
@@ -62,11 +65,31 @@ class CicloReadSerializer(serializers.ModelSerializer):
         return self._to_basic(obj.etapa_actual)
 
 
+# ?size= → campo de ParcelaImage
+IMAGE_SIZE_FIELDS = {
+    'thumb': 'thumb_url',
+    'medium': 'medium_url',
+    'analysis': 'analysis_url',
+    'original': 'image_url',
+}
+
+
 class ParcelaImageSerializer(serializers.ModelSerializer):
+    # URL del tamaño pedido en context['image_size'] (listas: thumb); si no hay derivado, el original
+    image_url = serializers.SerializerMethodField()
+    original_url = serializers.CharField(source='image_url', read_only=True)
+
     class Meta:
         model = ParcelaImage
-        fields = ('id', 'image_url', 'public_id', 'filename', 'uploaded_by', 'created_at')
-        read_only_fields = ('id', 'image_url', 'public_id', 'filename', 'uploaded_by', 'created_at')
+        fields = ('id', 'image_url', 'original_url', 'thumb_url', 'medium_url', 'analysis_url', 'public_id',
+                  'filename', 'uploaded_by', 'created_at', 'status', 'error')
+        read_only_fields = ('id', 'thumb_url', 'medium_url', 'analysis_url', 'public_id', 'filename',
+                            'uploaded_by', 'created_at', 'status', 'error')
+
+    @extend_schema_field(OpenApiTypes.URI)
+    def get_image_url(self, obj):
+        field = IMAGE_SIZE_FIELDS.get(self.context.get('image_size'), 'image_url')
+        return getattr(obj, field) or obj.image_url
 
 
 # -----------------------
@@ -88,22 +111,13 @@ class ParcelaCreateSerializer(serializers.ModelSerializer):
         if ciclo_data:
             Ciclo.objects.create(parcela=parcela, **ciclo_data)
 
-        # Si se subió un fichero 'imagen' en la request (multipart/form-data), subirlo a Cloudinary y guardar URL
+        # Si se subió un fichero 'imagen' en la request (multipart/form-data), encolar su subida (parcels.uploads)
         request = self.context.get('request')
         if request and hasattr(request, 'FILES'):
             file_obj = request.FILES.get('imagen')
             if file_obj:
                 try:
-                    res = cloudinary.uploader.upload(
-                        file_obj,
-                        folder=f"agro_ai/parcels_preview/{parcela.id}",
-                        resource_type="image",
-                        use_filename=True,
-                        unique_filename=True
-                    )
-                    parcela.imagen_url = res.get('secure_url')
-                    parcela.imagen_public_id = res.get('public_id')
-                    parcela.save(update_fields=['imagen_url', 'imagen_public_id', 'updated_at'])
+                    enqueue_parcela_preview(parcela, file_obj)
                 except Exception:
                     # no romper la creación por fallo en upload; puedes loggear aquí
                     pass
@@ -119,6 +133,17 @@ class ParcelaReadSerializer(serializers.ModelSerializer):
         model = Parcela
         fields = ('id', 'usuario', 'nombre', 'ubicacion', 'tamano_hectareas', 'latitud', 'longitud', 'altitud', 'ciclos', 'images', 'imagen_url')
 
+    @staticmethod
+    def optimize_queryset(queryset):
+        """
+        Trae usuario, ciclos (con cultivo/variedad/etapa) e imágenes en un número fijo
+        de queries; sin esto CicloReadSerializer consulta 3 FKs por ciclo y por parcela.
+        """
+        return queryset.select_related('usuario').prefetch_related(
+            Prefetch('ciclos', queryset=Ciclo.objects.select_related('cultivo', 'variedad', 'etapa_actual')),
+            'images',
+        )
+
 
 class ParcelaUpdateSerializer(serializers.ModelSerializer):
     class Meta:
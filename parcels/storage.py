@@ -0,0 +1,91 @@
+"""
+Almacenamiento de imágenes de parcelas.
+
+- CloudinaryStorage: producción (CLOUDINARY_URL).
+- LocalFileSystemStorage: copia a MEDIA_ROOT; sirve para desarrollo y tests
+  sin credenciales ni red.
+
+Ambos reciben la ruta de un archivo ya guardado en disco (ver parcels.uploads)
+y devuelven {"url": ..., "public_id": ...}.
+"""
+import os
+import shutil
+import uuid
+
+from django.conf import settings
+
+from agro_ai_platform.optional import get_cloudinary_uploader
+
+
+class ImageStorage:
+    name = 'base'
+
+    def upload(self, path: str, folder: str, filename: str | None = None, public_id: str | None = None) -> dict:
+        """public_id explícito (derivados) reemplaza folder/filename."""
+        raise NotImplementedError
+
+    def destroy(self, public_id: str):
+        raise NotImplementedError
+
+
+class CloudinaryStorage(ImageStorage):
+    name = 'cloudinary'
+
+    def upload(self, path, folder, filename=None, public_id=None):
+        if public_id:
+            res = get_cloudinary_uploader().upload(path, public_id=public_id, resource_type="image", overwrite=True)
+        else:
+            res = get_cloudinary_uploader().upload(
+                path,
+                folder=folder,
+                resource_type="image",
+                use_filename=True,
+                unique_filename=True,
+                filename_override=filename,
+            )
+        return {'url': res.get('secure_url'), 'public_id': res.get('public_id')}
+
+    def destroy(self, public_id):
+        get_cloudinary_uploader().destroy(public_id, invalidate=True, resource_type='image')
+
+
+class LocalFileSystemStorage(ImageStorage):
+    name = 'local'
+
+    def __init__(self, root=None, base_url=None):
+        self.root = str(root or settings.MEDIA_ROOT)
+        self.base_url = base_url or settings.MEDIA_URL
+
+    def upload(self, path, folder, filename=None, public_id=None):
+        base, ext = os.path.splitext(filename or os.path.basename(path))
+        if public_id:
+            ext = os.path.splitext(path)[1]
+        else:
+            public_id = f"{folder.strip('/')}/{base}_{uuid.uuid4().hex[:8]}"
+        dest = os.path.join(self.root, public_id + ext)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.copyfile(path, dest)
+        return {'url': f"{self.base_url.rstrip('/')}/{public_id}{ext}", 'public_id': public_id}
+
+    def destroy(self, public_id):
+        folder = os.path.join(self.root, os.path.dirname(public_id))
+        prefix = os.path.basename(public_id)
+        if not os.path.isdir(folder):
+            return
+        for name in os.listdir(folder):
+            if os.path.splitext(name)[0] == prefix:
+                os.remove(os.path.join(folder, name))
+
+
+STORAGES = {
+    'cloudinary': CloudinaryStorage,
+    'local': LocalFileSystemStorage,
+}
+
+
+def get_image_storage() -> ImageStorage:
+    name = getattr(settings, 'PARCEL_IMAGE_STORAGE', 'cloudinary')
+    try:
+        return STORAGES[name]()
+    except KeyError:
+        raise ValueError(f"PARCEL_IMAGE_STORAGE no soportado: {name}")
@@ -0,0 +1,120 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from crops.models import Cultivo, Variedad, Etapa
+from users.models import Rol
+from .models import Parcela, Ciclo, ParcelaImage
+from .serializers import ParcelaImageSerializer
+from .storage import LocalFileSystemStorage
+from .uploads import create_pending_image, enqueue_destroy
+
+User = get_user_model()
+
+
+class ImageUploadQueueTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        rol = Rol.objects.create(nombre='agricultor')
+        self.user = User.objects.create_user(username='agri01', password='x', rol=rol)
+        self.parcela = Parcela.objects.create(usuario=self.user, nombre='Lote 1')
+
+    def test_sube_imagen_pendiente_con_almacenamiento_local(self):
+        with override_settings(PARCEL_IMAGE_STORAGE='local', PARCEL_UPLOAD_ASYNC=False,
+                               MEDIA_ROOT=self.media, PARCEL_UPLOAD_SPOOL_DIR=os.path.join(self.media, 'spool')):
+            with self.captureOnCommitCallbacks(execute=True):
+                image = create_pending_image(self.parcela, SimpleUploadedFile('foto.jpg', b'jpeg'), self.user)
+                self.assertEqual(image.status, ParcelaImage.STATUS_PENDING)
+                spool = image.spool_path
+
+            image.refresh_from_db()
+            self.assertEqual(image.status, ParcelaImage.STATUS_READY)
+            self.assertTrue(image.image_url.startswith('/media/agro_ai/parcels_images/'))
+            self.assertFalse(os.path.exists(spool))
+            stored = os.path.join(self.media, image.public_id + '.jpg')
+            self.assertTrue(os.path.exists(stored))
+
+            with self.captureOnCommitCallbacks(execute=True):
+                enqueue_destroy(image.public_id)
+            self.assertFalse(os.path.exists(stored))
+
+    def test_genera_derivados_y_lista_miniatura(self):
+        try:
+            from PIL import Image
+        except ImportError:
+            self.skipTest('Pillow no instalado')
+        src = os.path.join(self.media, 'foto.png')
+        Image.new('RGB', (4000, 3000), 'green').save(src)
+        with open(src, 'rb') as fh, override_settings(PARCEL_IMAGE_STORAGE='local', PARCEL_UPLOAD_ASYNC=False,
+                                                      MEDIA_ROOT=self.media):
+            with self.captureOnCommitCallbacks(execute=True):
+                image = create_pending_image(self.parcela, SimpleUploadedFile('foto.png', fh.read()), self.user)
+
+        image.refresh_from_db()
+        self.assertTrue(image.thumb_url.endswith('_thumb.jpg'))
+        with Image.open(os.path.join(self.media, image.public_id + '_thumb.jpg')) as thumb:
+            self.assertEqual(max(thumb.size), 320)
+        self.assertEqual(ParcelaImageSerializer(image, context={'image_size': 'thumb'}).data['image_url'],
+                         image.thumb_url)
+        self.assertEqual(ParcelaImageSerializer(image).data['image_url'], image.image_url)
+
+    def test_borrar_durante_la_subida_no_deja_archivos_remotos(self):
+        upload = LocalFileSystemStorage.upload
+
+        def delete_then_upload(storage, path, folder, *args, **kwargs):
+            # primera subida (el original): el usuario borra la imagen aún "pending"
+            ParcelaImage.objects.filter(pk=image.pk).delete()
+            return upload(storage, path, folder, *args, **kwargs)
+
+        with override_settings(PARCEL_IMAGE_STORAGE='local', PARCEL_UPLOAD_ASYNC=False, MEDIA_ROOT=self.media,
+                               PARCEL_UPLOAD_SPOOL_DIR=os.path.join(self.media, 'spool')), \
+                mock.patch.object(LocalFileSystemStorage, 'upload', delete_then_upload):
+            with self.captureOnCommitCallbacks(execute=True):
+                image = create_pending_image(self.parcela, SimpleUploadedFile('foto.jpg', b'jpeg'), self.user)
+
+        folder = os.path.join(self.media, 'agro_ai', 'parcels_images', str(self.parcela.pk))
+        self.assertEqual(os.listdir(folder), [])
+        self.assertFalse(ParcelaImage.objects.filter(pk=image.pk).exists())
+
+
+class ParcelaListQueryCountTests(TestCase):
+    def setUp(self):
+        rol = Rol.objects.create(nombre='superadmin')
+        self.admin = User.objects.create_user(username='admin01', password='x', rol=rol)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        cultivo = Cultivo.objects.create(nombre='Cacao')
+        self.variedad = Variedad.objects.create(cultivo=cultivo, nombre='CCN-51')
+        self.etapa = Etapa.objects.create(variedad=self.variedad, nombre='Floración')
+
+    def _add_parcelas(self, n):
+        for i in range(n):
+            parcela = Parcela.objects.create(usuario=self.admin, nombre=f'Lote {Parcela.objects.count()}')
+            Ciclo.objects.create(parcela=parcela, cultivo=self.variedad.cultivo, variedad=self.variedad,
+                                 etapa_actual=self.etapa)
+            Ciclo.objects.create(parcela=parcela, estado='cerrado')
+            ParcelaImage.objects.create(parcela=parcela, image_url='/media/x.jpg')
+
+    def _list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get('/api/parcelas/')
+        self.assertEqual(resp.status_code, 200)
+        return len(ctx), resp.json()
+
+    def test_listado_no_crece_con_el_numero_de_parcelas(self):
+        self._add_parcelas(2)
+        base, _ = self._list_queries()
+        self._add_parcelas(5)
+        queries, data = self._list_queries()
+        self.assertEqual(queries, base)
+        rows = data['results'] if isinstance(data, dict) else data
+        self.assertEqual(len(rows), 7)
+        activo = next(c for c in rows[0]['ciclos'] if c['estado'] == 'activo')
+        self.assertEqual(activo['etapa_actual'], {'id': self.etapa.id, 'nombre': 'Floración'})
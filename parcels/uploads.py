@@ -0,0 +1,188 @@
+"""
+Cola de subida de imágenes de parcelas.
+
+El request solo guarda el archivo en un directorio local (spool) y crea la
+ParcelaImage en estado "pending"; un pool de hilos lo sube al almacenamiento
+(parcels.storage) con reintentos y backoff exponencial, y marca la imagen como
+"ready" o "failed". Antes de subir se generan los derivados (parcels.images).
+Los borrados remotos también van por la cola.
+
+Con PARCEL_UPLOAD_ASYNC=False todo se ejecuta en línea (tests, scripts).
+Si el proceso muere con subidas pendientes, `manage.py resume_image_uploads`
+las reencola desde el spool.
+"""
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Parcela, ParcelaImage
+from .images import make_derivatives, DERIVATIVE_FIELDS
+from .storage import get_image_storage
+
+# espera antes del reintento n: BACKOFF_BASE * 2**n segundos
+BACKOFF_BASE = 1.0
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'PARCEL_UPLOAD_WORKERS', 2),
+                    thread_name_prefix='parcel-upload',
+                )
+    return _executor
+
+
+def _submit(fn, *args):
+    # on_commit: el worker debe ver la fila recién creada
+    if getattr(settings, 'PARCEL_UPLOAD_ASYNC', True):
+        transaction.on_commit(lambda: _get_executor().submit(_in_worker, fn, *args))
+    else:
+        transaction.on_commit(lambda: fn(*args))
+
+
+def _in_worker(fn, *args):
+    close_old_connections()
+    try:
+        fn(*args)
+    except Exception as e:
+        print(f"Error en cola de imágenes: {str(e)}")
+    finally:
+        close_old_connections()
+
+
+def _with_retries(fn, *args, **kwargs):
+    attempts = max(1, getattr(settings, 'PARCEL_UPLOAD_RETRIES', 3))
+    for attempt in range(attempts):
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(BACKOFF_BASE * 2 ** attempt)
+
+
+def spool_upload(file_obj) -> str:
+    """Copia el archivo subido a disco local y devuelve la ruta."""
+    spool_dir = getattr(settings, 'PARCEL_UPLOAD_SPOOL_DIR', '') or None
+    if spool_dir:
+        os.makedirs(spool_dir, exist_ok=True)
+    ext = os.path.splitext(getattr(file_obj, 'name', '') or '')[1]
+    fd, path = tempfile.mkstemp(prefix='parcel_', suffix=ext, dir=spool_dir)
+    with os.fdopen(fd, 'wb') as out:
+        for chunk in file_obj.chunks():
+            out.write(chunk)
+    return path
+
+
+def discard_spool(path: str):
+    try:
+        if path and os.path.exists(path):
+            os.remove(path)
+    except OSError as e:
+        print(f"Error eliminando archivo temporal: {str(e)}")
+
+
+# ---------- ParcelaImage ----------
+def create_pending_image(parcela, file_obj, user) -> ParcelaImage:
+    """Guarda el archivo en el spool, crea la imagen "pending" y encola su subida."""
+    path = spool_upload(file_obj)
+    image = ParcelaImage.objects.create(
+        parcela=parcela,
+        filename=getattr(file_obj, 'name', None),
+        uploaded_by=user,
+        status=ParcelaImage.STATUS_PENDING,
+        spool_path=path,
+    )
+    _submit(upload_image, image.pk)
+    return image
+
+
+def _update_if_exists(image, fields) -> bool:
+    """Guarda `fields` de la imagen; False si se borró mientras se subía."""
+    return ParcelaImage.objects.filter(pk=image.pk).update(**{f: getattr(image, f) for f in fields}) > 0
+
+
+def upload_image(image_id: int):
+    image = ParcelaImage.objects.filter(pk=image_id).first()
+    if image is None or image.status == ParcelaImage.STATUS_READY:
+        return
+    if not image.spool_path or not os.path.exists(image.spool_path):
+        image.status, image.error = ParcelaImage.STATUS_FAILED, 'Archivo temporal no disponible.'
+        _update_if_exists(image, ['status', 'error'])
+        return
+    storage = get_image_storage()
+    derivatives = make_derivatives(image.spool_path)
+    try:
+        try:
+            res = _with_retries(storage.upload, image.spool_path,
+                                f"agro_ai/parcels_images/{image.parcela_id}", image.filename)
+        except Exception as e:
+            # se conserva el spool para reintentar con resume_image_uploads --failed
+            image.status, image.error = ParcelaImage.STATUS_FAILED, str(e)[:500]
+            _update_if_exists(image, ['status', 'error'])
+            return
+        for name, path in derivatives.items():
+            try:
+                d = _with_retries(storage.upload, path, None, public_id=f"{res['public_id']}_{name}")
+                setattr(image, DERIVATIVE_FIELDS[name], d['url'])
+            except Exception as e:
+                # sin derivado se sirve el original
+                print(f"Error subiendo derivado {name} de imagen {image.pk}: {str(e)}")
+    finally:
+        for path in derivatives.values():
+            discard_spool(path)
+    discard_spool(image.spool_path)
+    image.image_url = res['url']
+    image.public_id = res['public_id']
+    image.status, image.error, image.spool_path = ParcelaImage.STATUS_READY, '', ''
+    if not _update_if_exists(image, ['image_url', 'public_id', 'status', 'error', 'spool_path',
+                                   *DERIVATIVE_FIELDS.values()]):
+        # borrada durante la subida: su perform_destroy no tenía public_id que borrar
+        for public_id in [image.public_id, *image.derivative_public_ids()]:
+            destroy_remote(public_id)
+
+
+# ---------- imagen de portada de Parcela ----------
+def enqueue_parcela_preview(parcela, file_obj):
+    path = spool_upload(file_obj)
+    _submit(upload_parcela_preview, parcela.pk, path, getattr(file_obj, 'name', None))
+
+
+def upload_parcela_preview(parcela_id: int, path: str, filename: str | None = None):
+    try:
+        res = _with_retries(get_image_storage().upload, path, f"agro_ai/parcels_preview/{parcela_id}", filename)
+    except Exception as e:
+        print(f"Error subiendo imagen de parcela {parcela_id}: {str(e)}")
+        return
+    finally:
+        discard_spool(path)
+    Parcela.objects.filter(pk=parcela_id).update(
+        imagen_url=res['url'], imagen_public_id=res['public_id'], updated_at=timezone.now()
+    )
+
+
+# ---------- borrado remoto ----------
+def enqueue_destroy(*public_ids: str | None):
+    for public_id in public_ids:
+        if public_id:
+            _submit(destroy_remote, public_id)
+
+
+def destroy_remote(public_id: str):
+    try:
+        _with_retries(get_image_storage().destroy, public_id)
+    except Exception as e:
+        # no bloquear: la imagen local ya se borró
+        print(f"Error borrando imagen remota {public_id}: {str(e)}")
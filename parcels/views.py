@@ -6,13 +6,13 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.parsers import JSONParser
-import cloudinary.uploader
 
 from drf_spectacular.utils import extend_schema_view, extend_schema, OpenApiParameter, OpenApiTypes, OpenApiExample
 from users.permissions import HasOperationPermission, role_name, tiene_permiso
 
 # models
 from .models import Parcela, Ciclo, ParcelaImage
+from .uploads import create_pending_image, enqueue_parcela_preview, enqueue_destroy, discard_spool
 # serializers (asegúrate que ParcelaImageSerializer esté definido en serializers.py)
 from .serializers import (
     CicloCreateSerializer,
@@ -20,9 +20,24 @@ from .serializers import (
     ParcelaCreateSerializer,
     ParcelaReadSerializer,
     ParcelaUpdateSerializer,
-    ParcelaImageSerializer
+    ParcelaImageSerializer,
+    IMAGE_SIZE_FIELDS,
 )
 
+class ImageSizeContextMixin:
+    """
+    Pasa ?size=thumb|medium|analysis|original al serializer de imágenes.
+    Las vistas que listan imágenes (galerías) usan 'thumb' por defecto.
+    """
+    default_image_size = 'original'
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        size = self.request.query_params.get('size') if self.request else None
+        context['image_size'] = size if size in IMAGE_SIZE_FIELDS else self.default_image_size
+        return context
+
+
 # ----------------------------------------
 # Ciclo endpoints
 # ----------------------------------------
@@ -346,10 +361,11 @@ class CicloAdvanceActiveView(APIView):
         examples=[OpenApiExample('Crear parcela', value={"nombre":"Parcela Demo","ubicacion":"Valle","tamano_hectareas":5.0}, request_only=True)]
     )
 )
-class ParcelaListCreateView(generics.ListCreateAPIView):
+class ParcelaListCreateView(ImageSizeContextMixin, generics.ListCreateAPIView):
     """
     Lista parcelas visibles para el usuario y permite crear nuevas parcelas.
     """
+    default_image_size = 'thumb'
     queryset = Parcela.objects.select_related('usuario').order_by('nombre')
     parser_classes = [MultiPartParser, FormParser, JSONParser]  # aceptar multipart/form-data y application/json
 
@@ -366,6 +382,8 @@ class ParcelaListCreateView(generics.ListCreateAPIView):
             return Parcela.objects.none()
         r = role_name(user)
         qs = self.queryset
+        if self.request.method == 'GET':
+            qs = ParcelaReadSerializer.optimize_queryset(qs)
         if r in ['superadmin', 'administrador', 'tecnico']:
             return qs
         return qs.filter(usuario=user)
@@ -393,11 +411,12 @@ class ParcelaListCreateView(generics.ListCreateAPIView):
     patch=extend_schema(tags=['parcelas'], summary='Actualizar parcialmente parcela', request=ParcelaUpdateSerializer, responses={200: ParcelaReadSerializer}),
     delete=extend_schema(tags=['parcelas'], summary='Eliminar parcela', responses={204: None})
 )
-class ParcelaDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ParcelaDetailView(ImageSizeContextMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Recuperar / actualizar / eliminar una parcela.
     Permisos controlados por módulo 'parcelas'.
     """
+    default_image_size = 'thumb'
     queryset = Parcela.objects.select_related('usuario')
     serializer_class = ParcelaReadSerializer
     parser_classes = [MultiPartParser, FormParser, JSONParser]  # aceptar JSON en update
@@ -424,6 +443,8 @@ class ParcelaDetailView(generics.RetrieveUpdateDestroyAPIView):
             return Parcela.objects.none()
         r = role_name(user)
         qs = self.queryset
+        if self.request.method == 'GET':
+            qs = ParcelaReadSerializer.optimize_queryset(qs)
         if r in ['superadmin', 'administrador', 'tecnico']:
             return qs
         return qs.filter(usuario=user)
@@ -438,20 +459,11 @@ class ParcelaDetailView(generics.RetrieveUpdateDestroyAPIView):
             raise PermissionDenied("No puede actualizar una parcela que no es suya.")
         parcela = serializer.save()
 
-        # si se subió campo 'imagen' en multipart update, subirlo a Cloudinary y guardar en parcela.imagen_url
+        # si se subió campo 'imagen' en multipart update, se encola su subida; imagen_url se actualiza al terminar
         file_obj = self.request.FILES.get('imagen')
         if file_obj:
             try:
-                res = cloudinary.uploader.upload(
-                    file_obj,
-                    folder=f"agro_ai/parcels_preview/{parcela.id}",
-                    resource_type="image",
-                    use_filename=True,
-                    unique_filename=True
-                )
-                parcela.imagen_url = res.get('secure_url')
-                parcela.imagen_public_id = res.get('public_id')
-                parcela.save(update_fields=['imagen_url', 'imagen_public_id', 'updated_at'])
+                enqueue_parcela_preview(parcela, file_obj)
             except Exception:
                 pass
 
@@ -503,16 +515,21 @@ class ParcelaCreateOwnView(generics.CreateAPIView):
     post=extend_schema(
         tags=['imagenes'],
         summary='Subir imagen para análisis',
-        description='Enviar multipart/form-data con campo "image". Requiere parcelas.actualizar.',
+        description=(
+            'Enviar multipart/form-data con campo "image". Requiere parcelas.actualizar.\n\n'
+            'Responde 202 con la imagen en estado `pending`: la subida al almacenamiento se hace en segundo plano. '
+            'Consultar GET /parcelas/{id}/images/{image_id}/ hasta `status` = `ready` (o `failed`, ver `error`).'
+        ),
         request=None,
-        responses={201: ParcelaImageSerializer}
+        responses={202: ParcelaImageSerializer}
     )
 )
-class ParcelaImageListCreateView(generics.ListCreateAPIView):
+class ParcelaImageListCreateView(ImageSizeContextMixin, generics.ListCreateAPIView):
     """
     GET: lista imágenes asociadas a una parcela (requiere 'parcelas.ver')
-    POST: sube una imagen (form-data field 'image') a Cloudinary y crea ParcelaImage (requiere 'parcelas.actualizar')
+    POST: recibe una imagen (form-data field 'image'), crea ParcelaImage "pending" y encola su subida (requiere 'parcelas.actualizar')
     """
+    default_image_size = 'thumb'
     serializer_class = ParcelaImageSerializer
     parser_classes = [MultiPartParser, FormParser, JSONParser]
 
@@ -554,31 +571,18 @@ class ParcelaImageListCreateView(generics.ListCreateAPIView):
             return Response({'detail': 'Archivo "image" requerido (form-data).'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            res = cloudinary.uploader.upload(
-                file_obj,
-                folder=f"agro_ai/parcels_images/{parcela.id}",
-                resource_type="image",
-                use_filename=True,
-                unique_filename=True
-            )
-        except Exception as e:
-            return Response({'detail': 'Error al subir a Cloudinary', 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        image = ParcelaImage.objects.create(
-            parcela=parcela,
-            image_url=res.get('secure_url'),
-            public_id=res.get('public_id'),
-            filename=res.get('original_filename') or getattr(file_obj, 'name', None),
-            uploaded_by=request.user
-        )
+            image = create_pending_image(parcela, file_obj, request.user)
+        except OSError as e:
+            return Response({'detail': 'Error al guardar la imagen', 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
         serializer = self.get_serializer(image, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
 
 
-class ParcelaImageDetailView(generics.RetrieveDestroyAPIView):
+class ParcelaImageDetailView(ImageSizeContextMixin, generics.RetrieveDestroyAPIView):
     """
     GET: detalle de una imagen
-    DELETE: borrar imagen (también intenta borrar en Cloudinary) — requiere 'parcelas.actualizar'
+    DELETE: borrar imagen (el borrado remoto se encola) — requiere 'parcelas.actualizar'
     """
     serializer_class = ParcelaImageSerializer
     lookup_url_kwarg = 'image_id'
@@ -600,14 +604,12 @@ class ParcelaImageDetailView(generics.RetrieveDestroyAPIView):
         return qs.filter(parcela__usuario=user)
 
     def perform_destroy(self, instance):
-        # intentar borrar en Cloudinary si public_id existe
-        try:
-            if instance.public_id:
-                cloudinary.uploader.destroy(instance.public_id, invalidate=True, resource_type='image')
-        except Exception:
-            # ignorar error de borrado remoto para no bloquear eliminación local
-            pass
+        # borrado remoto en segundo plano; un error no bloquea la eliminación local
+        public_ids, spool_path = [instance.public_id, *instance.derivative_public_ids()], instance.spool_path
         instance.delete()
+        enqueue_destroy(*public_ids)
+        if spool_path:
+            discard_spool(spool_path)
 
 
 
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-19 05:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0002_remove_plan_frecuencia_minutos_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='parcelaplan',
+            index=models.Index(fields=['parcela', 'estado', 'fecha_inicio', 'fecha_fin'], name='parcelaplan_vigente_idx'),
+        ),
+    ]
@@ -127,6 +127,10 @@ class ParcelaPlan(models.Model):
                 name='un_plan_activo_por_parcela'
             )
         ]
+        indexes = [
+            # plan vigente en la ingesta: parcela + estado + rango de fechas
+            models.Index(fields=['parcela', 'estado', 'fecha_inicio', 'fecha_fin'], name='parcelaplan_vigente_idx'),
+        ]
 
     def __str__(self):
         return f'{self.parcela_id} -> {self.plan.nombre} ({self.estado})'
@@ -2,6 +2,7 @@ from datetime import datetime
 from rest_framework import generics, permissions
 from rest_framework.exceptions import PermissionDenied, NotFound
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
+from agro_ai_platform.pagination import HighVolumePagination
 from users.permissions import HasOperationPermission, role_name
 from .permissions import tiene_permiso, OwnsObjectOrAdmin
 from .models import Recommendation
@@ -30,6 +31,7 @@ class RecommendationByParcelaListView(generics.ListAPIView):
     No permite creación vía API pública.
     """
     serializer_class = RecommendationSerializer
+    pagination_class = HighVolumePagination
 
     def get_permissions(self):
         return [permissions.IsAuthenticated(), HasOperationPermission('alertas', 'ver')]
@@ -73,6 +75,7 @@ class RecommendationByParcelaListView(generics.ListAPIView):
 )
 class RecommendationUserListView(generics.ListAPIView):
     serializer_class = RecommendationSerializer
+    pagination_class = HighVolumePagination
 
     def get_permissions(self):
         return [permissions.IsAuthenticated(), HasOperationPermission('alertas', 'ver')]
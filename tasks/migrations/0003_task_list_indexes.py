@@ -0,0 +1,21 @@
+# Generated by Django 4.2.11 on 2026-10-19 05:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_task_recomendacion_alter_task_estado'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['parcela', 'deleted_at', 'created_at'], name='tasks_task_parcela_4dbfd8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['created_at'], name='task_active_created_idx'),
+        ),
+    ]
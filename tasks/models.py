@@ -55,6 +55,16 @@ class Task(models.Model):
     objects = ActiveManager()
     all_objects = models.Manager()
 
+    class Meta:
+        indexes = [
+            # listados por parcela: WHERE parcela=? AND deleted_at IS NULL ORDER BY created_at DESC
+            models.Index(fields=['parcela', 'deleted_at', 'created_at']),
+            # listado global (admin/técnico): solo tareas activas
+            models.Index(fields=['created_at'], condition=models.Q(deleted_at__isnull=True), name='task_active_created_idx'),
+            # rule_tasks_due / mark_overdue_tasks: rango de fecha_programada + estado, solo activas
+            models.Index(fields=['fecha_programada', 'estado'], condition=models.Q(deleted_at__isnull=True), name='task_due_idx'),
+        ]
+
     def __str__(self):
         return f"Tarea {self.tipo} para {self.parcela.nombre}"
 
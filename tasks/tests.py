@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from parcels.models import Parcela
+from users.models import Rol
+from .models import Task
+
+User = get_user_model()
+
+
+class TaskListPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        rol = Rol.objects.create(nombre='superadmin')
+        self.admin = User.objects.create_user(username='admin01', password='x', rol=rol)
+        self.parcela = Parcela.objects.create(usuario=self.admin, nombre='Lote 1')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        for i in range(25):
+            self._task(i)
+
+    def _task(self, i):
+        return Task.objects.create(parcela=self.parcela, tipo='riego', descripcion=f'Riego {i}',
+                                   fecha_programada=timezone.now())
+
+    def test_cursor_recorre_todas_las_tareas_sin_repetir(self):
+        resp = self.client.get('/api/tareas/', {'paginacion': 'cursor', 'include_count': 'true'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['count'], 25)
+        ids = [t['id'] for t in resp.data['results']]
+        next_url = resp.data['next']
+        while next_url:
+            resp = self.client.get(next_url)
+            self.assertEqual(resp.data['count'], 25)
+            ids += [t['id'] for t in resp.data['results']]
+            next_url = resp.data['next']
+        self.assertEqual(len(ids), 25)
+        self.assertEqual(ids, sorted(ids, reverse=True))
+
+    def test_total_por_pagina_exacto_salvo_count_cached(self):
+        self.assertEqual(self.client.get('/api/tareas/', {'count': 'cached'}).data['count'], 25)
+        self._task(99)
+        self.assertEqual(self.client.get('/api/tareas/', {'page': 2, 'count': 'cached'}).data['count'], 25)
+        # sin opt-in: total exacto, la última página real existe
+        resp = self.client.get('/api/tareas/', {'page': 2})
+        self.assertEqual((resp.status_code, resp.data['count']), (200, 26))
+        self.assertIn('count=cached', self.client.get('/api/tareas/', {'count': 'cached'}).data['next'])
+        with self.settings(PAGINATION_COUNT_CACHE_TTL=0):
+            self.assertEqual(self.client.get('/api/tareas/', {'count': 'cached'}).data['count'], 26)
@@ -4,6 +4,7 @@ from rest_framework.exceptions import PermissionDenied, NotFound, ValidationErro
 from drf_spectacular.utils import (
     extend_schema, OpenApiParameter, OpenApiTypes, OpenApiExample
 )
+from agro_ai_platform.pagination import HighVolumePagination
 from users.permissions import HasOperationPermission, role_name
 from .permissions import tiene_permiso, OwnsObjectOrAdmin
 from .models import Task
@@ -85,6 +86,7 @@ from parcels.models import Parcela
 class TaskListCreateView(generics.ListCreateAPIView):
     queryset = Task.objects.select_related('parcela', 'recomendacion').all().order_by('-created_at')
     serializer_class = TaskSerializer
+    pagination_class = HighVolumePagination
 
     def get_permissions(self):
         op = 'ver' if self.request.method == 'GET' else 'crear'
@@ -176,6 +178,7 @@ class TaskListCreateView(generics.ListCreateAPIView):
 )
 class TaskByParcelaListCreateView(generics.ListCreateAPIView):
     serializer_class = TaskSerializer
+    pagination_class = HighVolumePagination
 
     def get_permissions(self):
         op = 'ver' if self.request.method == 'GET' else 'crear'
@@ -0,0 +1,108 @@
+"""
+Compara el throughput de la ingesta según cómo se sirve la app:
+
+  wsgi        gunicorn con workers síncronos (un request por worker, incluida la subida)
+  asgi-sync   gunicorn + UvicornWorker con INGEST_ASYNC=False (vista síncrona en un hilo nuevo por request)
+  asgi-async  gunicorn + UvicornWorker con INGEST_ASYNC=True (nodes.views.node_ingest: pool acotado + 503)
+
+    python manage.py provision_fleet --maestros 1000 --output fleet.json
+    python tools/compare_ingest_servers.py --workers 2 -- --fleet fleet.json --concurrency 1000 --upload-bps 4000
+
+Levanta cada servidor en --port con el mismo número de workers y el entorno
+actual (DJANGO_SETTINGS_MODULE, DATABASE_URL, MONGO_URL...), le aplica la misma
+carga con tools/load_ingest.py (lo que va después de `--`) y lo detiene. Cada
+modo usa un día distinto (--date + k días) para no chocar con los slots del
+anterior. Los que van antes de `--` son opciones de este script.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import load_ingest  # noqa: E402
+
+MODES = ("wsgi", "asgi-sync", "asgi-async")
+
+
+def server_command(mode: str, opts) -> tuple[list[str], dict]:
+    bind = f"127.0.0.1:{opts.port}"
+    env = dict(os.environ, INGEST_ASYNC="True" if mode == "asgi-async" else "False")
+    if mode == "wsgi":
+        cmd = [sys.executable, "-m", "gunicorn", opts.wsgi_app, "--workers", str(opts.workers), "--bind", bind]
+    else:
+        cmd = [sys.executable, "-m", "gunicorn", opts.asgi_app, "-k", "uvicorn.workers.UvicornWorker",
+               "--workers", str(opts.workers), "--bind", bind]
+    return cmd + ["--timeout", "120", "--log-level", "warning"], env
+
+
+def wait_port(port: int, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def run_mode(mode: str, opts, load_args, day: date) -> dict:
+    cmd, env = server_command(mode, opts)
+    proc = subprocess.Popen(cmd, env=env, cwd=opts.cwd)
+    try:
+        if not wait_port(opts.port, opts.startup_s):
+            raise RuntimeError(f"{mode}: el servidor no abrió el puerto {opts.port}")
+        time.sleep(1)  # que arranquen todos los workers, no solo el primero
+        load_args.url = f"http://127.0.0.1:{opts.port}"
+        load_args.date = day.isoformat()
+        return asyncio.run(load_ingest.run(load_args))
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    argv = sys.argv[1:]
+    own, load_argv = (argv[:argv.index("--")], argv[argv.index("--") + 1:]) if "--" in argv else (argv, [])
+    parser = argparse.ArgumentParser(description="Throughput de la ingesta: WSGI vs ASGI síncrono vs ASGI async.")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--workers", type=int, default=2, help="Procesos por servidor (igual en todos los modos).")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--date", default="", help="Día del primer modo (default: hace 30 días en Lima).")
+    parser.add_argument("--wsgi-app", default="agro_ai_platform.wsgi:application")
+    parser.add_argument("--asgi-app", default="agro_ai_platform.asgi:application")
+    parser.add_argument("--cwd", default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser.add_argument("--startup-s", type=float, default=30.0)
+    parser.add_argument("--json", default="", help="Guardar los reportes por modo en este archivo.")
+    opts = parser.parse_args(own)
+    load_args = load_ingest.build_parser().parse_args(load_argv)
+
+    first = date.fromisoformat(opts.date) if opts.date else datetime.now(load_ingest.LIMA).date() - timedelta(days=30)
+    reports = {}
+    for k, mode in enumerate(opts.modes):
+        print(f"== {mode} ({opts.workers} workers) ==", file=sys.stderr)
+        reports[mode] = run_mode(mode, opts, load_args, first + timedelta(days=k))
+
+    print(f"{'modo':<11} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ok':>6} {'errores':>8}  reasons")
+    for mode, r in reports.items():
+        lat = r["latencia_ms"]
+        errores = r["reasons"].get("error_de_red", 0) + sum(n for s, n in r["status"].items() if int(s) >= 500)
+        print(f"{mode:<11} {r['throughput_rps']:>8} {lat['p50']:>9} {lat['p95']:>9} {lat['p99']:>9} "
+              f"{r['reasons'].get('ingesta_aceptada', 0):>6} {errores:>8}  {r['reasons']}")
+    if opts.json:
+        with open(opts.json, "w", encoding="utf-8") as fh:
+            json.dump(reports, fh, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
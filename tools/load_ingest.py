@@ -0,0 +1,304 @@
+"""
+Generador de carga para POST /api/nodes/ingest/ alineado a los horarios del plan.
+
+    python manage.py provision_fleet --maestros 2000 --nodos 3 --output fleet.json
+    python tools/load_ingest.py --url http://localhost:8000 --fleet fleet.json --concurrency 200
+
+Cada maestro de la flota envía una lectura por horario del plan (07:00, 15:00,
+22:00...) del día --date. El instante real de envío es horario + jitter (normal,
+--jitter-s) y el timestamp que pone el equipo incluye un desfase de reloj fijo
+por nodo (--skew-s), así que algunos caen fuera de la ventana de ±5 min como en
+campo. --duplicate-rate reenvía lecturas (ACK perdido → slot_ocupado).
+
+Sin --time-scale las lecturas se envían en orden cronológico tan rápido como
+permite --concurrency (peor caso: todos los maestros en el mismo horario). Con
+--time-scale 60 un minuto de la simulación dura un segundo. Errores de red y
+5xx se reintentan (--retries, backoff exponencial); 4xx/429 son rechazos de la
+ingesta y se reportan por 'reason'.
+
+--upload-bps simula enlaces lentos (2G ≈ 4000 B/s): el cuerpo se envía en trozos
+al ritmo indicado, como un módem que ocupa la conexión durante toda la subida.
+
+Solo usa la biblioteca estándar (cliente HTTP/1.1 con keep-alive sobre asyncio).
+Para repetir una fecha, borrar antes con provision_fleet --reset o usar otra --date.
+"""
+import argparse
+import asyncio
+import json
+import random
+import ssl
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from urllib.parse import urlsplit
+from zoneinfo import ZoneInfo
+
+LIMA = ZoneInfo("America/Lima")
+INGEST_PATH = "/api/nodes/ingest/"
+
+SENSORES = (
+    ("temperatura", "°C", (15.0, 35.0)),
+    ("humedad_aire", "%", (30.0, 90.0)),
+    ("humedad_suelo", "%", (10.0, 60.0)),
+)
+
+
+class HttpConnection:
+    """Una conexión HTTP/1.1 persistente (una por worker)."""
+
+    def __init__(self, host: str, port: int, use_ssl: bool, timeout: float, upload_bps: float = 0.0):
+        self.host, self.port, self.timeout, self.upload_bps = host, port, timeout, upload_bps
+        self.ssl = ssl.create_default_context() if use_ssl else None
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+    async def post(self, path: str, body: bytes, headers: dict) -> tuple[int, bytes]:
+        return await asyncio.wait_for(self._post(path, body, headers), self.timeout)
+
+    async def _post(self, path, body, headers):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+        head = [f"POST {path} HTTP/1.1", f"Host: {self.host}", "Content-Type: application/json",
+                f"Content-Length: {len(body)}", "Connection: keep-alive"]
+        head += [f"{k}: {v}" for k, v in headers.items()]
+        if self.upload_bps:
+            self.writer.write(("\r\n".join(head) + "\r\n\r\n").encode())
+            step = 512
+            for i in range(0, len(body), step):
+                self.writer.write(body[i:i + step])
+                await self.writer.drain()
+                await asyncio.sleep(len(body[i:i + step]) / self.upload_bps)
+        else:
+            self.writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+            await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("conexión cerrada por el servidor")
+        status = int(status_line.split()[1])
+        length, chunked, close = None, False, False
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip().lower(), value.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "transfer-encoding" and "chunked" in value:
+                chunked = True
+            elif name == "connection" and value == "close":
+                close = True
+
+        if chunked:
+            parts = []
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                parts.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            data = b"".join(parts)
+        elif length is not None:
+            data = await self.reader.readexactly(length)
+        else:
+            data, close = await self.reader.read(), True
+        if close:
+            await self.close()
+        return status, data
+
+
+def payload_for(rng: random.Random, node: dict, device_ts: datetime, tag: str) -> dict:
+    lecturas = []
+    for codigo in node["secundarios"]:
+        lecturas.append({
+            "nodo_codigo": codigo,
+            "last_seen": (device_ts - timedelta(seconds=rng.randint(0, 600))).isoformat(),
+            "bateria": rng.randint(15, 100),
+            "sensores": [
+                {"sensor": name, "valor": round(rng.uniform(lo, hi), 2), "unidad": unit}
+                for name, unit, (lo, hi) in SENSORES
+            ],
+        })
+    return {"codigo_nodo_maestro": node["codigo"], "timestamp": device_ts.isoformat(), "seed_tag": tag,
+            "senal": rng.randint(-100, -60), "lecturas": lecturas}
+
+
+def build_schedule(fleet: dict, day: date, horarios, jitter_s: float, skew_s: float, duplicate_rate: float,
+                   rng: random.Random) -> list[tuple[datetime, dict, datetime]]:
+    """[(instante_real_de_envío, nodo, timestamp_del_equipo)] ordenado por instante de envío."""
+    schedule = []
+    skews = {n["codigo"]: timedelta(seconds=rng.gauss(0, skew_s)) for n in fleet["nodes"]}
+    for hh in horarios:
+        h, m = map(int, hh.split(":"))
+        slot = datetime(day.year, day.month, day.day, h, m, tzinfo=LIMA)
+        for node in fleet["nodes"]:
+            send_at = slot + timedelta(seconds=rng.gauss(0, jitter_s))
+            device_ts = send_at + skews[node["codigo"]]
+            schedule.append((send_at, node, device_ts))
+            if rng.random() < duplicate_rate:
+                schedule.append((send_at + timedelta(seconds=rng.uniform(5, 60)), node, device_ts))
+    schedule.sort(key=lambda item: item[0])
+    return schedule
+
+
+class Stats:
+    def __init__(self):
+        self.latencies_ms = []
+        self.status = Counter()
+        self.reasons = Counter()
+        self.retries = 0
+        self.transport_errors = Counter()
+        self.lag_s = []  # retraso del envío respecto del instante planificado (con --time-scale)
+
+
+async def producer(schedule, queue: asyncio.Queue, workers: int, time_scale: float, stats: Stats):
+    loop = asyncio.get_running_loop()
+    t0 = loop.time()
+    first = schedule[0][0] if schedule else None
+    for item in schedule:
+        if time_scale:
+            due = (item[0] - first).total_seconds() / time_scale
+            delay = due - (loop.time() - t0)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                stats.lag_s.append(-delay * time_scale)
+        await queue.put(item)
+    for _ in range(workers):
+        await queue.put(None)
+
+
+async def worker(queue: asyncio.Queue, conn: HttpConnection, args, rng: random.Random, stats: Stats):
+    while True:
+        item = await queue.get()
+        if item is None:
+            await conn.close()
+            return
+        _, node, device_ts = item
+        body = json.dumps(payload_for(rng, node, device_ts, args.tag)).encode()
+        headers = {"Authorization": f"Node {node['token']}"}
+        for attempt in range(args.retries + 1):
+            start = time.perf_counter()
+            try:
+                status, data = await conn.post(INGEST_PATH, body, headers)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+                stats.transport_errors[type(e).__name__] += 1
+                await conn.close()
+                status, data = None, b""
+            if (status is None or status >= 500) and attempt < args.retries:
+                stats.retries += 1
+                await asyncio.sleep(args.backoff_s * (2 ** attempt) * (0.5 + rng.random()))
+                continue
+            break
+        if status is None:
+            stats.reasons["error_de_red"] += 1
+            continue
+        stats.latencies_ms.append((time.perf_counter() - start) * 1000)
+        stats.status[status] += 1
+        try:
+            reason = json.loads(data).get("reason") or f"http_{status}"
+        except (ValueError, AttributeError):
+            reason = f"http_{status}"
+        stats.reasons[reason] += 1
+
+
+def pct(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run(args) -> dict:
+    with open(args.fleet, encoding="utf-8") as fh:
+        fleet = json.load(fh)
+    if args.max_nodes:
+        fleet["nodes"] = fleet["nodes"][:args.max_nodes]
+    args.tag = args.tag or fleet.get("tag", "loadtest")
+    rng = random.Random(args.seed)
+    day = date.fromisoformat(args.date) if args.date else datetime.now(LIMA).date()
+    horarios = [h.strip() for h in args.slots.split(",")] if args.slots else fleet["horarios"]
+    schedule = build_schedule(fleet, day, horarios, args.jitter_s, args.skew_s, args.duplicate_rate, rng)
+
+    url = urlsplit(args.url)
+    use_ssl = url.scheme == "https"
+    port = url.port or (443 if use_ssl else 80)
+    stats = Stats()
+    queue = asyncio.Queue(maxsize=args.concurrency * 2)
+    workers = [
+        worker(queue, HttpConnection(url.hostname, port, use_ssl, args.timeout_s, args.upload_bps), args,
+               random.Random(args.seed * 1000 + i), stats)
+        for i in range(args.concurrency)
+    ]
+    start = time.perf_counter()
+    await asyncio.gather(producer(schedule, queue, args.concurrency, args.time_scale, stats), *workers)
+    elapsed = time.perf_counter() - start
+
+    done = sum(stats.status.values())
+    return {
+        "fecha": day.isoformat(),
+        "horarios": horarios,
+        "maestros": len(fleet["nodes"]),
+        "enviados": len(schedule),
+        "completados": done,
+        "duracion_s": round(elapsed, 2),
+        "throughput_rps": round(done / elapsed, 1) if elapsed else 0.0,
+        "latencia_ms": {
+            "p50": round(pct(stats.latencies_ms, 0.5), 1),
+            "p95": round(pct(stats.latencies_ms, 0.95), 1),
+            "p99": round(pct(stats.latencies_ms, 0.99), 1),
+            "max": round(max(stats.latencies_ms, default=0.0), 1),
+        },
+        "status": dict(sorted(stats.status.items())),
+        "reasons": dict(stats.reasons.most_common()),
+        "reintentos": stats.retries,
+        "errores_transporte": dict(stats.transport_errors),
+        "retraso_envio_p95_s": round(pct(stats.lag_s, 0.95), 1) if args.time_scale else None,
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Carga sintética de la ingesta alineada a los horarios del plan.")
+    parser.add_argument("--url", default="http://localhost:8000", help="Base del servidor (sin /api/...).")
+    parser.add_argument("--fleet", default="fleet.json", help="Manifiesto de manage.py provision_fleet.")
+    parser.add_argument("--concurrency", type=int, default=50, help="Conexiones/requests simultáneos.")
+    parser.add_argument("--date", default="", help="Día simulado YYYY-MM-DD (default: hoy en Lima).")
+    parser.add_argument("--slots", default="", help="Subconjunto de horarios, p. ej. '07:00' (default: los del plan).")
+    parser.add_argument("--jitter-s", type=float, default=90.0, help="Desvío estándar del envío respecto del horario.")
+    parser.add_argument("--skew-s", type=float, default=60.0, help="Desvío estándar del reloj de cada nodo.")
+    parser.add_argument("--duplicate-rate", type=float, default=0.02, help="Fracción de lecturas reenviadas.")
+    parser.add_argument("--time-scale", type=float, default=0.0,
+                        help="0: sin esperas; N: N segundos simulados por segundo real.")
+    parser.add_argument("--retries", type=int, default=2, help="Reintentos ante error de red o 5xx.")
+    parser.add_argument("--backoff-s", type=float, default=0.5)
+    parser.add_argument("--timeout-s", type=float, default=30.0)
+    parser.add_argument("--upload-bps", type=float, default=0.0, help="Bytes/s de subida por conexión (0: sin límite).")
+    parser.add_argument("--max-nodes", type=int, default=0, help="Usar solo los primeros N maestros.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tag", default="", help="seed_tag de los documentos (default: el del manifiesto).")
+    parser.add_argument("--json", default="", help="Guardar el reporte en este archivo.")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -77,4 +77,13 @@ class OwnsObjectOrAdmin(BasePermission):
         # comparar por PK (o por el valor si no existe .pk) para evitar falsos negativos
         owner_value = getattr(cur, 'pk', cur)
         user_value = getattr(request.user, 'pk', request.user)
-        return owner_value == user_value
\ No newline at end of file
+        return owner_value == user_value
+
+
+class IsAdminRole(BasePermission):
+    # Solo superadmin/administrador (endpoints de operación: métricas, perfiles).
+    admin_roles = {'superadmin', 'administrador'}
+
+    def has_permission(self, request, view):
+        user = getattr(request, 'user', None)
+        return bool(user and user.is_authenticated and role_name(user) in self.admin_roles)